@@ -0,0 +1,212 @@
+"""
+Incident response workflow for the SRE agent.
+An alert maps to a DAG: Alertmanager state, the alert's playbook metrics,
+anomalies, its services' error logs and recent restarts are gathered in
+parallel, a rule-based triage is drafted as soon as they are in, and the LLM
+summary follows. Shared inputs are memoized, so an alert storm of incident
+responses costs one fetch of each.
+"""
+
+import os
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.services.workflow import Step, StepResult, Workflow
+from app.tools.anomaly_detector import describe_anomaly
+from app.tools.intent_router import IntentRouter
+from app.tools.query_cache import QueryCache
+from app.tools.range_query import parse_duration
+from app.tools.sre_tools import ANOMALIES_IN_SUMMARY, METRIC_GETTERS, SRETool
+
+# Alert name -> metric keys worth pulling for it; the demo stack's rules (prometheus/rules/*.yml)
+PLAYBOOKS = {
+    'HighCPUUsage': ['cpu', 'requests'],
+    'HighCPU': ['cpu', 'requests'],
+    'HighMemoryUsage': ['memory'],
+    'LowMemoryWarning': ['memory'],
+    'HighLoginRate': ['requests', 'errors'],
+    'HighPaymentRate': ['requests', 'errors'],
+    'HighPaymentErrorRate': ['errors', 'requests'],
+    'HighErrorRate': ['errors', 'requests'],
+    'HighResponseTime': ['requests', 'errors', 'cpu'],
+    'ServiceDown': ['health'],
+    'InstanceDown': ['health'],
+}
+# Keys gathered by their own steps rather than as metrics
+OWN_STEPS = ('logs', 'alerts')
+
+# Process restarts stand in for deploys: every rollout restarts the processes it replaces
+RESTART_QUERY = 'changes(process_start_time_seconds[{window}]) > 0'
+
+TOOLS_USED = ['alertmanager', 'prometheus', 'anomaly_detector', 'loki', 'incident_responder']
+
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+
+
+def playbook(alert_name: str, router: IntentRouter) -> List[str]:
+    """Metric keys for an alert: its playbook, else whatever its name routes to ("HighCPU" -> cpu)"""
+    if alert_name in PLAYBOOKS:
+        return list(PLAYBOOKS[alert_name])
+    metrics = [m for m in router.plan(_CAMEL_BOUNDARY.sub(' ', alert_name))['metrics'] if m not in OWN_STEPS]
+    return metrics or ['health']
+
+
+class IncidentResponder:
+    """Builds and streams the incident response DAG for an alert"""
+
+    def __init__(self, tool: SRETool, step_timeout: Optional[float] = None,
+                 summary_timeout: Optional[float] = None, window: Optional[str] = None,
+                 memo: Optional[QueryCache] = None):
+        self.tool = tool
+        # Budget for each gathering step; the triage is ready once the slowest of them is done
+        self.step_timeout = step_timeout or float(os.getenv('INCIDENT_STEP_TIMEOUT', '2'))
+        self.summary_timeout = summary_timeout or float(os.getenv('INCIDENT_SUMMARY_TIMEOUT', '20'))
+        # How far back restarts and error logs count as part of the incident
+        self.window = window or os.getenv('INCIDENT_LOOKBACK', '15m')
+        self.memo = memo or QueryCache(ttl=float(os.getenv('INCIDENT_MEMO_TTL', '15')))
+
+    def workflow(self, alert_name: str, severity: str) -> Workflow:
+        metrics = {key: METRIC_GETTERS[key] for key in playbook(alert_name, self.tool.router)}
+        keys = ','.join(metrics)
+        timeout = self.step_timeout
+        return Workflow('incident_response', [
+            Step('alerts', lambda _: self.tool.alertmanager.get_alert_digest(), timeout=timeout, memo_key='digest'),
+            Step('metrics', lambda _: self._metrics(metrics), timeout=timeout, memo_key=keys),
+            Step('anomalies', lambda _: self._anomalies(metrics), timeout=timeout, memo_key=keys),
+            Step('logs', lambda _: self._logs(alert_name), after=['alerts'], timeout=timeout,
+                 memo_key=lambda _: self._log_query(alert_name)),
+            Step('restarts', lambda _: self._restarts(), timeout=timeout, memo_key=self.window),
+            Step('triage', lambda inputs: self._triage(alert_name, severity, inputs),
+                 after=['alerts', 'metrics', 'anomalies', 'logs', 'restarts'], timeout=timeout),
+            Step('summary', lambda inputs: self._summary(alert_name, severity, inputs['triage']),
+                 after=['triage'], timeout=self.summary_timeout),
+        ], memo=self.memo)
+
+    def _firing(self, alert_name: str) -> List[Dict[str, Any]]:
+        return [a for a in self.tool.alertmanager.alert_set.active() if a['alertname'] == alert_name]
+
+    async def _metrics(self, metrics: Dict[str, str]) -> StepResult:
+        data = await self.tool._collect_metrics(metrics)
+        return {'status': 'success', 'metrics': data,
+                'summary': ' | '.join(f"{key}: {result.get('summary') or result.get('error', 'no data')}"
+                                      for key, result in data.items())}
+
+    async def _anomalies(self, metrics: Dict[str, str]) -> StepResult:
+        anomalies = self.tool._anomalies(metrics)
+        return {'status': 'success', 'anomalies': anomalies,
+                'summary': '; '.join(describe_anomaly(a) for a in anomalies[:ANOMALIES_IN_SUMMARY])
+                           or 'No anomalies'}
+
+    def _log_query(self, alert_name: str) -> str:
+        """The error query, narrowed to the services the alert is firing for"""
+        services = sorted({a['labels'].get('service_name') or a['labels'].get('job') or ''
+                           for a in self._firing(alert_name)} - {''})
+        query = self.tool.loki.error_query
+        if not services:
+            return query
+        # Names are matched literally; the regex then goes inside a double-quoted LogQL string
+        pattern = '|'.join(re.escape(s) for s in services).replace('\\', '\\\\').replace('"', '\\"')
+        return f'{query} | service_name=~"{pattern}"'
+
+    async def _logs(self, alert_name: str) -> StepResult:
+        # Leave a quarter of the step for the summary, so a large window returns partial templates
+        return await self.tool.loki.analyze_errors(self._log_query(alert_name), parse_duration(self.window),
+                                                   time_budget=self.step_timeout * 0.75)
+
+    async def _restarts(self) -> StepResult:
+        result = await self.tool.prometheus.query_prometheus(RESTART_QUERY.format(window=self.window))
+        if result.get('status') != 'success':
+            return result
+        restarted = [{'instance': s['metric'].get('instance', 'unknown'), 'job': s['metric'].get('job', ''),
+                      'restarts': int(float(s['value'][1]))}
+                     for s in result['data']['result'] if float(s['value'][1]) > 0]
+        named = ', '.join(f"{r['instance']} ({r['job']})" if r['job'] else r['instance'] for r in restarted[:5])
+        return {'status': 'success', 'metric': 'recent_restarts', 'restarted': restarted,
+                'summary': f"{len(restarted)} instances restarted in the last {self.window}: {named}"
+                           if restarted else f"No restarts in the last {self.window}"}
+
+    async def _triage(self, alert_name: str, severity: str, inputs: Dict[str, StepResult]) -> StepResult:
+        """Rule-based first triage from whatever the gathering steps returned"""
+        firing = self._firing(alert_name)
+        instances = sorted({a['instance'] for a in firing if a['instance']})
+        parts = [f"{alert_name} ({severity}) firing on {', '.join(instances[:5]) or 'the fleet'}"
+                 if firing else f"{alert_name} ({severity}) is not currently firing in Alertmanager"]
+
+        restarts = inputs['restarts']
+        suspects = [r for r in restarts.get('restarted', []) if r['instance'] in instances]
+        if suspects:
+            parts.append("Restarted while alerting, likely a rollout: "
+                         + ", ".join(r['instance'] for r in suspects))
+
+        anomalies = inputs['anomalies'].get('anomalies', [])
+        if anomalies:
+            parts.append("Anomalies: " + inputs['anomalies']['summary'])
+        data: Dict[str, Any] = dict(inputs['metrics'].get('metrics') or {'metrics': inputs['metrics']})
+        for key in {a['metric'] for a in anomalies} & set(data):
+            data[key] = {**data[key], 'anomalies': [a for a in anomalies if a['metric'] == key]}
+        parts.extend(f"{key}: {result.get('summary') or 'Error - ' + result.get('error', 'Unknown error')}"
+                     for key, result in data.items())
+        for key in ('logs', 'restarts'):
+            result = inputs[key]
+            parts.append(f"{key}: {result.get('summary') or 'Error - ' + result.get('error', 'Unknown error')}")
+
+        data.update(alerts=inputs['alerts'], logs=inputs['logs'], restarts=restarts)
+        return {'status': 'success', 'summary': ' | '.join(parts), 'firing_on': instances,
+                'suspects': suspects, 'anomalies': anomalies, 'prometheus_data': data}
+
+    async def _summary(self, alert_name: str, severity: str, triage: StepResult) -> StepResult:
+        if triage.get('status') != 'success':
+            return triage
+        question = (f"{severity} incident: {alert_name} is firing. "
+                    f"What is the likely cause and what should we do first?")
+        analysis = await self.tool.executor.run_blocking(
+            self.tool._generate_analysis, triage['prometheus_data'], TOOLS_USED, question, triage['summary'])
+        return {'status': 'success', **analysis}
+
+    async def stream(self, alert_name: str, severity: str) -> AsyncIterator[Dict[str, Any]]:
+        """Progress events for one incident: step_started/step_finished, triage, then done with the response"""
+        print(f"🚨 Incident response for '{alert_name}' (severity: {severity})")
+        first_triage_ms = None
+        async for event in self.workflow(alert_name, severity).stream():
+            data = event['data']
+            if event['event'] == 'step_finished':
+                result = data.pop('result')
+                data['summary'] = result.get('summary') or result.get('natural_summary') or result.get('error')
+                if data['step'] == 'triage' and result.get('status') == 'success':
+                    first_triage_ms = data['elapsed_ms']
+                    yield event
+                    yield {'event': 'triage', 'data': {
+                        'summary': result['summary'], 'firing_on': result['firing_on'],
+                        'suspects': result['suspects'], 'elapsed_ms': first_triage_ms}}
+                    continue
+            elif event['event'] == 'done':
+                event = {'event': 'done', 'data': self._response(
+                    alert_name, severity, data, first_triage_ms)}
+            yield event
+
+    def _response(self, alert_name: str, severity: str, run: Dict[str, Any],
+                  first_triage_ms: Optional[float]) -> Dict[str, Any]:
+        results, steps = run['results'], run['steps']
+        triage, summary = results['triage'], results['summary']
+        if summary.get('status') != 'success':
+            # No LLM draft in time: the rule-based summary from the same data
+            summary = {'natural_summary': self.tool._fallback_summary(
+                triage.get('prometheus_data', {}), TOOLS_USED, f"the {alert_name} alert"),
+                'recommendations': []}
+        return {
+            'alert_name': alert_name,
+            'severity': severity,
+            'status': 'success' if all(s['status'] == 'success' for s in steps.values()) else 'partial',
+            'triage': triage.get('summary', 'Triage unavailable'),
+            'natural_summary': summary['natural_summary'],
+            'recommendations': summary['recommendations'],
+            'firing_on': triage.get('firing_on', []),
+            'suspects': triage.get('suspects', []),
+            'anomalies': triage.get('anomalies', []),
+            'findings': {name: result.get('summary') or result.get('error')
+                         for name, result in results.items() if name not in ('triage', 'summary')},
+            'tools_used': TOOLS_USED,
+            'steps': steps,
+            'first_triage_ms': first_triage_ms,
+            'duration_ms': run['duration_ms'],
+        }
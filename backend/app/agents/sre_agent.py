@@ -1,47 +1,156 @@
-from app.services.llm_service import LLMService
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+from app.agents.incident_response import IncidentResponder
+from app.services.async_runner import run_sync
+from app.services.registry import get_fleet_health, get_llm_service
+from app.services.response_cache import ResponseCache
+from app.services.tracing import tracer
 from app.tools.sre_tools import SRETool
 
 
 class SREAgent:
     def __init__(self):
         self.tool = SRETool()
-        self.llm_service = LLMService()
+        # The name the tools health route and CLI use
+        self.tools = self.tool
+        self.llm_service = get_llm_service()
+        self.response_cache = ResponseCache()
+        self.incidents = IncidentResponder(self.tool)
+        self.fleet_health = get_fleet_health()
 
-    def ask_question(self, question: str) -> dict:
+    def ask_question(self, question: str, include_insights: bool = False,
+                     max_staleness: Optional[float] = None) -> dict:
+        """Synchronous wrapper around aask_question for the CLI"""
+        return run_sync(self.aask_question(question, include_insights, max_staleness))
+
+    async def aask_question(self, question: str, include_insights: bool = False,
+                            max_staleness: Optional[float] = None) -> dict:
+        """Answer a question with one LLM generation; deeper insights only on request.
+
+        Questions that route to the same tools within one metric time bucket
+        share a cached answer, so paraphrases skip metric collection and the LLM.
+        max_staleness overrides how old prefetched metrics may be for this question.
+        """
+        with tracer.span("sre_agent.ask_question", include_insights=include_insights) as span:
+            try:
+                route = self.tool.route(question)
+                intent = self.tool.intent_key(route) + (include_insights,)
+                computed = []
+
+                def answer_fresh():
+                    computed.append(True)
+                    return self._answer(question, route, include_insights, max_staleness)
+
+                if max_staleness is not None and max_staleness < self.response_cache.ttl:
+                    # A cached answer could be older than the caller is willing to accept
+                    answer = await answer_fresh()
+                else:
+                    answer = await self.response_cache.get_or_fetch(intent, answer_fresh)
+
+                # Generate LLM thought about the question
+                llm_thought = f"Analyzing SRE question: '{question}' - {answer['tool_summary']}"
+                span.set("cached", not computed)
+                return {**answer, "llm_thought": llm_thought, "cached": not computed}
+            except Exception as e:
+                span.status = "error"
+                span.set("error", str(e))
+                return {
+                    "tool_summary": "Error occurred during tool execution",
+                    "natural_summary": f"Error processing question: {str(e)}",
+                    "recommendations": [],
+                    "tools_used": ["error_handler"],
+                    "llm_thought": f"Error processing question: {str(e)}",
+                    "cached": False
+                }
+
+    async def _answer(self, question: str, route: dict, include_insights: bool,
+                      max_staleness: Optional[float] = None) -> dict:
+        # Execute tool: metrics plus a single summary + recommendations generation
+        tool_result = await self.tool.aexecute(question, route, max_staleness)
+
+        response = {
+            "tool_summary": tool_result["tool_summary"],
+            "natural_summary": tool_result["natural_summary"],
+            "recommendations": tool_result.get("recommendations", []),
+            "tools_used": tool_result["tools_used"]
+        }
+        # Errored or timed-out metrics, or a rule-based summary: answered, but not worth caching
+        degraded = tool_result.get("fallback", False) or any(
+            data.get("status") != "success" for data in tool_result.get("prometheus_data", {}).values())
+        if include_insights:
+            response.update(await self.get_insights(question, tool_result))
+            degraded = degraded or any(response[name].get("status") == "error" for name in ("langgraph", "llama"))
+        response["degraded"] = degraded
+        return response
+
+    async def get_insights(self, question: str, tool_result: dict) -> dict:
+        """Secondary root-cause / next-steps generation, run only when a client asks for it"""
+        context = dict(
+            question=question,
+            tools_used=tool_result.get("tools_used"),
+            tool_summary=tool_result.get("tool_summary"),
+            natural_summary=tool_result.get("natural_summary")
+        )
+        langgraph_response, llama_response = await asyncio.gather(
+            self.tool.executor.run_blocking(self.llm_service.ask_langgraph, **context),
+            self.tool.executor.run_blocking(self.llm_service.ask_llama, **context)
+        )
+        return {"langgraph": langgraph_response, "llama": llama_response}
+
+    async def astream_question(self, question: str,
+                               max_staleness: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Answer a question as a sequence of events: metrics first, then summary tokens.
+
+        Yields {"event": "tool_summary"}, any number of {"event": "token"} and a
+        final {"event": "done"} carrying the complete natural summary and
+        recommendations.
+        """
         try:
-            # Execute tool and get summary
-            tool_result = self.tool.execute(question)
-            
-            # Generate LLM thought about the question
-            llm_thought = f"Analyzing SRE question: '{question}' - {tool_result['tool_summary']}"
-            
-            # Get LLM responses with tool context
-            langgraph_response = self.llm_service.ask_langgraph(
-                question=question,
-                tools_used=tool_result.get("tools_used"),
-                tool_summary=tool_result.get("tool_summary"),
-                natural_summary=tool_result.get("natural_summary")
-            )
-            llama_response = self.llm_service.ask_llama(
-                question=question,
-                tools_used=tool_result.get("tools_used"),
-                tool_summary=tool_result.get("tool_summary"),
-                natural_summary=tool_result.get("natural_summary")
-            )
-
-            return {
-                "tool_summary": tool_result["tool_summary"],
-                "natural_summary": tool_result["natural_summary"],
-                "tools_used": tool_result["tools_used"],
-                "llm_thought": llm_thought,
-                "langgraph": langgraph_response,
-                "llama": llama_response
-            }
+            tool_result = await self.tool.acollect(question, max_staleness=max_staleness)
         except Exception as e:
-            return {
-                "tool_summary": "Error occurred during tool execution",
-                "tools_used": ["error_handler"],
-                "llm_thought": f"Error processing question: {str(e)}",
-                "langgraph": {"error": "Failed to get response"},
-                "llama": {"error": "Failed to get response"}
+            yield {"event": "error", "data": {"error": f"Error processing question: {str(e)}"}}
+            return
+
+        prometheus_data = tool_result.get("prometheus_data", {})
+        yield {"event": "tool_summary", "data": {
+            "tool_summary": tool_result["tool_summary"],
+            "tools_used": tool_result["tools_used"],
+            "metrics": {
+                metric: data.get("summary") if data.get("status") == "success"
+                else f"Error - {data.get('error', 'Unknown error')}"
+                for metric, data in prometheus_data.items()
             }
+        }}
+
+        async for part in self.tool.astream_analysis(
+                prometheus_data, tool_result["tools_used"], question,
+                tool_result["tool_summary"]):
+            if "token" in part:
+                yield {"event": "token", "data": {"text": part["token"]}}
+            else:
+                yield {"event": "done", "data": part["analysis"]}
+
+    def get_system_health(self) -> dict:
+        """Synchronous wrapper around aget_system_health for the CLI"""
+        return run_sync(self.aget_system_health())
+
+    async def aget_system_health(self) -> dict:
+        """Fleet health report: per-section status, per-service up counts and the top offenders"""
+        return await self.fleet_health.current()
+
+    def execute_incident_response(self, alert_name: str, severity: str) -> dict:
+        """Synchronous wrapper around aexecute_incident_response for the CLI"""
+        return run_sync(self.aexecute_incident_response(alert_name, severity))
+
+    async def aexecute_incident_response(self, alert_name: str, severity: str) -> dict:
+        """Run the incident response workflow for an alert and return its final report"""
+        with tracer.span("sre_agent.incident_response", alert=alert_name, severity=severity) as span:
+            async for event in self.incidents.stream(alert_name, severity):
+                if event["event"] == "done":
+                    span.set("status", event["data"]["status"])
+                    return event["data"]
+        raise RuntimeError(f"Incident response for '{alert_name}' ended without a report")
+
+    def astream_incident_response(self, alert_name: str, severity: str) -> AsyncIterator[Dict[str, Any]]:
+        """Incident response as progress events: steps as they start and finish, the triage, then the report"""
+        return self.incidents.stream(alert_name, severity)
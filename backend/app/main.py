@@ -1,11 +1,51 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.routes.sre import router as sre_router
+from app.services import telemetry
+from app.services.registry import (get_alertmanager_client, get_anomaly_detector, get_fleet_health,
+                                   get_prometheus_client, get_snapshot_store, peek)
+from app.services.tracing import tracer
+from app.tools.http_pool import close_http_clients
+from app.tools.metric_snapshot import MetricPrefetcher
+from app.tools.mock_mode import log_mock_mode
+from app.tools.sre_tools import ANOMALY_QUERIES
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Probe Prometheus and prefetch core metrics and anomaly ranges in the background; release connections on shutdown"""
+    # MOCK_MODE once flipped meaning, so say which backends this process will use
+    log_mock_mode()
+    # Startup does not wait on Prometheus; a failed probe opens its circuit breaker
+    probe = asyncio.create_task(get_prometheus_client().probe())
+    # Anomaly ranges ride the same loop, so questions never wait on range queries
+    prefetcher = MetricPrefetcher(get_prometheus_client(), get_snapshot_store(),
+                                  anomaly_detector=get_anomaly_detector(),
+                                  anomaly_queries=ANOMALY_QUERIES)
+    prefetcher.start()
+    # Alert diffs accumulate between questions, so the alert set is polled on its own cadence
+    alertmanager = get_alertmanager_client()
+    alertmanager.start()
+    # The health report is rebuilt from the snapshots in the background and served from memory
+    fleet_health = get_fleet_health()
+    fleet_health.start()
+    yield
+    await fleet_health.stop()
+    await alertmanager.stop()
+    await prefetcher.stop()
+    probe.cancel()
+    await close_http_clients()
+
 
 app = FastAPI(
     title="AegisNexus SRE Agent API",
     description="AI-powered SRE agent with monitoring tools",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware - Allow all origins
@@ -33,4 +73,68 @@ async def root():
         ]
     }
 
+
+
+@app.middleware("http")
+async def record_route_latency(request: Request, call_next):
+    """Trace every request and observe its latency, labelled by route template rather than raw path"""
+    started = time.perf_counter()
+    status = 500
+    # Joins the caller's trace when it sends a W3C traceparent header
+    with tracer.span(f"HTTP {request.method}", request.headers.get("traceparent"),
+                     **{"http.method": request.method}) as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["traceparent"] = span.traceparent
+            return response
+        finally:
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            span.name = f"HTTP {request.method} {route}"
+            span.set("http.status_code", status)
+            telemetry.HTTP_REQUEST_SECONDS.labels(request.method, route, status).observe(
+                time.perf_counter() - started)
+
+
+@telemetry.REGISTRY.collector
+def collect_pipeline_counters():
+    """Cache and executor counters, read from the shared instances at scrape time"""
+    cache_lookups = {}
+    prometheus = peek('prometheus')
+    if prometheus is not None:
+        cache_lookups.update(_cache_samples('query', prometheus.cache.stats()))
+    agent = peek('sre_agent')
+    if agent is not None:
+        cache_lookups.update(_cache_samples('response', agent.response_cache.stats()))
+    snapshots = peek('snapshots')
+    if snapshots is not None:
+        cache_lookups.update(_cache_samples('snapshot', snapshots.stats()))
+    yield telemetry.counter_family(
+        'sre_cache_lookups_total', 'Cache lookups by cache and result',
+        ['cache', 'result'], cache_lookups)
+
+    executor = peek('agent_executor')
+    if executor is not None:
+        yield telemetry.histogram_family(
+            'sre_agent_queue_wait_seconds', 'Time questions waited for an agent worker',
+            executor.queue_wait)
+        yield telemetry.histogram_family(
+            'sre_agent_execution_seconds', 'Time questions held an agent worker',
+            executor.execution)
+        yield telemetry.counter_family(
+            'sre_agent_rejected_total', 'Questions refused by admission control',
+            [], {(): executor.rejected})
+
+
+def _cache_samples(cache: str, stats: dict) -> dict:
+    return {(cache, result): stats.get(result, 0)
+            for result in ('hits', 'misses', 'coalesced') if result in stats}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint for the backend's own pipeline metrics"""
+    return PlainTextResponse(telemetry.REGISTRY.render(),
+                             media_type="text/plain; version=0.0.4")
+
 app.include_router(sre_router)
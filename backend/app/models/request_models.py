@@ -0,0 +1,15 @@
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+
+
+class SRERequest(BaseModel):
+    question: str = Field(..., min_length=1)
+    # Run the secondary LLM insights pass as well; off by default to keep one generation per question
+    include_insights: bool = False
+    # How old (seconds) prefetched metrics may be for this question; 0 forces live queries
+    max_staleness: Optional[float] = Field(None, ge=0)
+
+
+class BatchMetricsRequest(BaseModel):
+    queries: Dict[str, str] = Field(..., min_length=1, max_length=50)
+    summarize: bool = True
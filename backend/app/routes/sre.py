@@ -1,38 +1,214 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from app.agents.sre_agent import SREAgent
-from app.models.request_models import SRERequest
+from typing import AsyncIterator, Callable, Optional
+from app.services.agent_executor import AgentOverloaded
+from app.services.registry import get_agent_executor, get_sre_agent
+from app.services.tracing import tracer
+from app.models.request_models import SRERequest, BatchMetricsRequest
+from app.tools.query_cache import normalize_query
 
 router = APIRouter()
-sre_agent = SREAgent()
+
+# Most series a hotspots query may return; keeps one call from dumping the whole index
+HOTSPOTS_MAX_K = 100
 
 class IncidentRequest(BaseModel):
     alert_name: str
     severity: str
 
+def _overloaded(e: AgentOverloaded) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e),
+                         headers={"Retry-After": str(e.retry_after)})
+
+async def _deadline_events(events, remaining: float):
+    """Pass streamed events through until the request deadline, then end with an error event"""
+    try:
+        async with asyncio.timeout(remaining):
+            async for event in events:
+                yield event
+    except TimeoutError:
+        yield {"event": "error", "data": {"error": f"Request exceeded its {get_agent_executor().deadline:g}s deadline"}}
+
+class _SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that gives its executor slot back however the response ends"""
+
+    def __init__(self, slot: AsyncExitStack, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        # A client that drops before the first chunk cancels the response before the
+        # body generator ever starts, so a finally inside the generator never runs
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.slot.aclose()
+
+async def _slot_sse(events_for: Callable[[], AsyncIterator[dict]]) -> StreamingResponse:
+    """Stream agent events as Server-Sent Events while holding one executor slot"""
+    # Admission happens before the response starts, so saturation is still a proper 429/503
+    slot = AsyncExitStack()
+    try:
+        remaining = await slot.enter_async_context(get_agent_executor().slot())
+    except AgentOverloaded as e:
+        raise _overloaded(e)
+
+    async def event_stream():
+        async for event in _deadline_events(events_for(), remaining):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return _SlotStreamingResponse(slot, event_stream(), media_type="text/event-stream",
+                                  headers={"Cache-Control": "no-cache",
+                                           "X-Accel-Buffering": "no"})
+
+# Set this header (any value) on /sre/ask to get a per-stage timing breakdown in the response
+DEBUG_HEADER = "X-SRE-Debug"
+
 @router.post("/sre/ask")
-async def ask_sre_question(request: SRERequest):
+async def ask_sre_question(request: SRERequest, http_request: Request):
     try:
-        response = sre_agent.ask_question(request.question)
+        agent = get_sre_agent()
+        response = await get_agent_executor().submit(lambda: agent.aask_question(
+            request.question, request.include_insights, request.max_staleness))
+        if DEBUG_HEADER in http_request.headers and tracer.current() is not None:
+            return {"response": response, "timing": tracer.breakdown(tracer.current().trace_id)}
         return {"response": response}
+    except AgentOverloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/sre/ask/stream")
+async def ask_sre_question_stream(request: SRERequest):
+    """Answer a question as Server-Sent Events: metrics summary first, then LLM tokens"""
+    return await _slot_sse(lambda: get_sre_agent().astream_question(request.question, request.max_staleness))
+
+@router.websocket("/sre/ws/ask")
+async def ask_sre_question_ws(websocket: WebSocket):
+    """Answer questions over a WebSocket; send {"question": "..."} and receive streamed events"""
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_json()
+            question = (message.get("question") or "").strip()
+            if not question:
+                await websocket.send_json({"event": "error", "data": {"error": "question is required"}})
+                continue
+            try:
+                async with get_agent_executor().slot() as remaining:
+                    events = get_sre_agent().astream_question(question, message.get("max_staleness"))
+                    async for event in _deadline_events(events, remaining):
+                        await websocket.send_json(event)
+            except AgentOverloaded as e:
+                await websocket.send_json({"event": "error", "data": {
+                    "error": str(e), "status_code": e.status_code, "retry_after": e.retry_after}})
+    except WebSocketDisconnect:
+        pass
+
+@router.post("/sre/metrics/batch")
+async def query_metrics_batch(request: BatchMetricsRequest):
+    """Evaluate several named PromQL queries in one round trip"""
+    try:
+        started = time.perf_counter()
+        results = await get_sre_agent().tool.prometheus.query_many(request.queries, request.summarize)
+        return {
+            "results": results,
+            "unique_queries": len({normalize_query(q) for q in request.queries.values()}),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/sre/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the PromQL result cache, the response cache and metric snapshots, plus the health report version"""
+    return {
+        "query_cache": get_sre_agent().tool.prometheus.cache.stats(),
+        "response_cache": get_sre_agent().response_cache.stats(),
+        "snapshots": get_sre_agent().tool.snapshots.stats(),
+        "fleet_health": get_sre_agent().fleet_health.stats()
+    }
+
+@router.get("/sre/traces")
+async def list_traces(limit: int = 20):
+    """Most recent traces held in the in-process span buffer"""
+    return {"traces": tracer.buffer.recent_traces(limit)}
+
+@router.get("/sre/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Stage timing breakdown for one trace from the span buffer"""
+    timing = tracer.breakdown(trace_id)
+    if not timing["stages"]:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return timing
+
+@router.get("/sre/hotspots")
+async def get_hotspots(metric: str = "cpu", k: int = Query(5, ge=1, le=HOTSPOTS_MAX_K),
+                       order: str = "top",
+                       instance: Optional[str] = None, job: Optional[str] = None,
+                       service: Optional[str] = None):
+    """Top-K, bottom-K or outlier series of a metric from the latest indexed results"""
+    index = get_sre_agent().tool.series_index
+    if metric not in index.metrics():
+        raise HTTPException(status_code=404, detail=f"No indexed series for '{metric}'")
+    matchers = {label: value for label, value in
+                (("instance", instance), ("job", job), ("service", service)) if value}
+    if order == "top":
+        series = index.top_k(metric, k, **matchers)
+    elif order == "bottom":
+        series = index.bottom_k(metric, k, **matchers)
+    elif order == "outliers":
+        series = index.outliers(metric, direction="both", limit=k, **matchers)
+    else:
+        raise HTTPException(status_code=400, detail="order must be top, bottom or outliers")
+    return {"metric": metric, "order": order, "matchers": matchers, "series": series}
+
+@router.get("/sre/executor/stats")
+async def get_executor_stats():
+    """Admission counters plus queue-wait and execution-time histograms for agent work"""
+    return get_agent_executor().stats()
+
 @router.post("/sre/incident-response")
 async def trigger_incident_response(request: IncidentRequest):
     """Trigger a complete incident response workflow"""
     try:
-        response = sre_agent.execute_incident_response(request.alert_name, request.severity)
+        agent = get_sre_agent()
+        response = await get_agent_executor().submit(lambda: agent.aexecute_incident_response(
+            request.alert_name, request.severity))
         return {"response": response}
+    except AgentOverloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/sre/incident-response/stream")
+async def trigger_incident_response_stream(request: IncidentRequest):
+    """Run the incident response workflow as Server-Sent Events: step progress, the first triage, then the report"""
+    return await _slot_sse(lambda: get_sre_agent().astream_incident_response(request.alert_name, request.severity))
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
 @router.get("/sre/health")
-async def get_system_health():
-    """Get comprehensive system health report"""
+async def get_system_health(request: Request):
+    """Fleet health report from memory; send If-None-Match with the last ETag to get a 304 while it is unchanged"""
     try:
-        response = sre_agent.get_system_health()
-        return {"response": response}
+        agent = get_sre_agent()
+        # Rebuilt here only when no background refresher keeps the report current
+        report = await agent.aget_system_health()
+        etag, body = agent.fleet_health.rendered(report)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(b'{"response":' + body + b'}', media_type="application/json", headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -40,10 +216,12 @@ async def get_system_health():
 async def demo_sre_tools():
     """Demonstrate SRE tools functionality"""
     try:
-        from app.tools.sre_tools import demo_sre_tools
+        from app.tools.sre_tools import ademo_sre_tool
         # In a real scenario, you'd capture the output, but for demo purposes:
-        demo_sre_tools()
+        await get_agent_executor().submit(ademo_sre_tool)
         return {"message": "SRE tools demo executed successfully. Check console output."}
+    except AgentOverloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -51,7 +229,7 @@ async def demo_sre_tools():
 async def check_tools_health():
     """Check the health status of all SRE tools"""
     try:
-        health_status = sre_agent.tools.health_check()
+        health_status = await get_sre_agent().tools.ahealth_check()
         return {"tools_health": health_status}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Bounded executor for agent work.
+Caps how many questions run at once and how many may wait, rejects the rest
+with a Retry-After hint, enforces a per-request deadline, and runs blocking
+SDK calls on a dedicated thread pool instead of the event loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .telemetry import Histogram
+from .tracing import tracer
+
+
+class AgentOverloaded(Exception):
+    """The executor refused or abandoned a request; carries the HTTP status and a retry hint"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AgentExecutor:
+    """Admission control, deadlines and a bounded thread pool for the agent pipeline"""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 max_queue: Optional[int] = None,
+                 deadline: Optional[float] = None):
+        self.max_workers = max_workers or int(os.getenv('AGENT_MAX_WORKERS', '8'))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv('AGENT_MAX_QUEUE', '32'))
+        self.deadline = deadline if deadline is not None else float(os.getenv('AGENT_REQUEST_DEADLINE_SECONDS', '30'))
+        # Blocking LLM SDK calls run here, so they can never starve the event loop's default pool
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                        thread_name_prefix='sre-agent')
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_wait = Histogram()
+        self.execution = Histogram()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._slots:
+            self._slots[loop] = asyncio.Semaphore(self.max_workers)
+        return self._slots[loop]
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the observed mean execution time"""
+        mean = self.execution.mean or 1.0
+        backlog = (self.waiting + 1) / self.max_workers
+        return max(1, round(mean * backlog))
+
+    async def run_blocking(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call on the agent thread pool, carrying the caller's trace context.
+
+        Cancelling the await (e.g. at a submit() deadline) abandons the result but cannot stop
+        the thread: the call runs to completion and keeps its pool worker busy until then.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._pool, functools.partial(context.run, fn, *args, **kwargs))
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None):
+        """Hold one worker slot; raises AgentOverloaded if the queue is full or the wait outlives the deadline"""
+        if self.waiting >= self.max_queue and self.active >= self.max_workers:
+            self.rejected += 1
+            raise AgentOverloaded("Agent queue is full", 429, self.retry_after())
+
+        deadline = self.deadline if deadline is None else deadline
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            with tracer.span("agent_executor.queue_wait"):
+                await asyncio.wait_for(self._semaphore().acquire(), deadline)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise AgentOverloaded(f"No agent worker free within {deadline:g}s", 503, self.retry_after())
+        finally:
+            self.waiting -= 1
+            self.queue_wait.observe(time.perf_counter() - queued_at)
+
+        self.active += 1
+        started = time.perf_counter()
+        try:
+            yield max(deadline - (started - queued_at), 0)
+        finally:
+            self.active -= 1
+            self.execution.observe(time.perf_counter() - started)
+            self._semaphore().release()
+
+    async def submit(self, work: Callable[[], Awaitable[Any]],
+                     deadline: Optional[float] = None) -> Any:
+        """Run a coroutine under admission control; past the deadline it is cancelled, outstanding I/O included"""
+        async with self.slot(deadline) as remaining:
+            try:
+                async with asyncio.timeout(remaining):
+                    return await work()
+            except TimeoutError:
+                self.timed_out += 1
+                raise AgentOverloaded(f"Request exceeded its {self.deadline if deadline is None else deadline:g}s deadline",
+                                      504, self.retry_after())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'deadline_seconds': self.deadline,
+            'active': self.active,
+            'waiting': self.waiting,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'queue_wait_seconds': self.queue_wait.to_dict(),
+            'execution_seconds': self.execution.to_dict(),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
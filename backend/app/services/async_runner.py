@@ -0,0 +1,34 @@
+"""
+Bridge for calling the async agent pipeline from synchronous code (CLI, demos).
+Coroutines run on one long-lived background event loop so pooled connections
+survive between calls.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="sre-async-runner",
+                             daemon=True).start()
+        return _loop
+
+
+def run_sync(awaitable: Awaitable[Any]) -> Any:
+    """Run a coroutine to completion from synchronous code and return its result"""
+    loop = _get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync() cannot be called from the runner loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(awaitable, loop).result()
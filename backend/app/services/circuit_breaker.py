@@ -0,0 +1,119 @@
+"""
+Circuit breakers for the agent's backends.
+One breaker per dependency (Prometheus, Loki, Alertmanager, the Llama API).
+After repeated failures a breaker opens and calls fail at once instead of
+waiting out a timeout. Once its backoff has passed it lets a single trial
+call through (half-open): success closes it, failure reopens it with the
+backoff doubled.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """A call was refused because its backend's breaker is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is unavailable (circuit open, next retry in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker with exponential backoff between trial calls"""
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 backoff: Optional[float] = None, max_backoff: Optional[float] = None):
+        self.name = name
+        # Consecutive failures that open a closed breaker
+        self.failure_threshold = failure_threshold or int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))
+        self.base_backoff = backoff or float(os.getenv('CIRCUIT_BACKOFF_SECONDS', '5'))
+        self.max_backoff = max_backoff or float(os.getenv('CIRCUIT_MAX_BACKOFF_SECONDS', '300'))
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = self.base_backoff
+        self.trips = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self._retry_at = 0.0
+        self._trial_at: Optional[float] = None
+        # Blocking LLM calls report from the agent's thread pool
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; in half-open state only one trial at a time does"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now >= self._retry_at:
+                self.state = HALF_OPEN
+                self._trial_at = None
+            # A trial that never reported back (cancelled by a deadline) expires after one backoff
+            if self.state == HALF_OPEN and (self._trial_at is None or now - self._trial_at > self.backoff):
+                self._trial_at = now
+                return True
+            self.rejected += 1
+            return False
+
+    def check(self):
+        """Raise CircuitOpen unless a call may go through now"""
+        if not self.allow():
+            raise CircuitOpen(self.name, self.retry_in)
+
+    def record_success(self):
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.failures = 0
+            self.backoff = self.base_backoff
+            self._trial_at = None
+        if recovered:
+            logger.info(f"✅ {self.name} is back - circuit closed")
+
+    def record_failure(self, error: Any = None, trip: bool = False):
+        """Count a failed call; trip opens a closed breaker at once (a failed health probe)"""
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error is not None else None
+            if self.state == HALF_OPEN:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            elif self.state == OPEN or (self.failures < self.failure_threshold and not trip):
+                return
+            self.state = OPEN
+            self.trips += 1
+            self._trial_at = None
+            self._retry_at = time.monotonic() + self.backoff
+        logger.warning(f"🔌 {self.name} circuit open for {self.backoff:g}s after {self.failures} failures: {error}")
+
+    def record_status(self, status_code: int):
+        """Feed an HTTP response: the backend answering at all is success, a 5xx is not"""
+        if status_code >= 500:
+            self.record_failure(f'HTTP {status_code}')
+        else:
+            self.record_success()
+
+    @property
+    def retry_in(self) -> float:
+        return max(self._retry_at - time.monotonic(), 0.0) if self.state == OPEN else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'trips': self.trips,
+            'rejected': self.rejected,
+            'backoff_seconds': self.backoff,
+            'retry_in_seconds': round(self.retry_in, 1),
+            'last_error': self.last_error,
+        }
@@ -1,46 +1,94 @@
+import functools
+import threading
+import time
+from typing import AsyncIterator
 from langgraph_sdk import get_client
-from llama_api_client import LlamaAPIClient
+from llama_api_client import AsyncLlamaAPIClient, LlamaAPIClient
 import os
 from dotenv import load_dotenv
+from app.services.prompt_builder import CRITICAL, DETAIL, INFO, PromptBuilder, dedupe, truncate
+from app.services.circuit_breaker import CircuitOpen
+from app.services.registry import get_circuit_breaker, get_llm_service
+from app.services.telemetry import LLM_CALL_ERRORS, LLM_CALL_SECONDS
+from app.services.tracing import tracer
 
 # Load environment variables from .env.local
 load_dotenv('.env.local')
 
+LLAMA_MODEL = "Llama-4-Maverick-17B-128E-Instruct-FP8"
+
+
+def _instrumented(method):
+    """Trace an LLM call, record its latency and count responses with status 'error'"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        with tracer.span(f"llm.{method.__name__}") as span:
+            try:
+                result = method(self, *args, **kwargs)
+            except Exception:
+                LLM_CALL_ERRORS.labels(method.__name__).inc()
+                raise
+            finally:
+                LLM_CALL_SECONDS.labels(method.__name__).observe(time.perf_counter() - started)
+            if isinstance(result, dict) and result.get("status") == "error":
+                LLM_CALL_ERRORS.labels(method.__name__).inc()
+                span.status = "error"
+                span.set("error", result.get("error", "unknown"))
+        return result
+    return wrapper
+
 
 class LLMService:
     def __init__(self):
-        self.langgraph_client = get_client(
-            url=os.getenv("LANGGRAPH_API_URL"),
-            api_key=os.getenv("LANGGRAPH_API_KEY")
-        )
-        self.llama_api = LlamaAPIClient(api_key=os.getenv("LLAMA_API_KEY"))
+        # SDK clients are built on first use, not at construction
+        self._langgraph_client = None
+        self._llama_api = None
+        self._async_llama_api = None
+        self._lock = threading.Lock()
+        self._prompt_builders = {name: PromptBuilder(name) for name in ("langgraph", "insights")}
+
+    @property
+    def langgraph_client(self):
+        if self._langgraph_client is None:
+            with self._lock:
+                if self._langgraph_client is None:
+                    self._langgraph_client = get_client(
+                        url=os.getenv("LANGGRAPH_API_URL"),
+                        api_key=os.getenv("LANGGRAPH_API_KEY")
+                    )
+        return self._langgraph_client
+
+    @property
+    def llama_api(self) -> LlamaAPIClient:
+        if self._llama_api is None:
+            with self._lock:
+                if self._llama_api is None:
+                    self._llama_api = LlamaAPIClient(api_key=os.getenv("LLAMA_API_KEY"))
+        return self._llama_api
+
+    @property
+    def breaker(self):
+        return get_circuit_breaker("llama")
+
+    async def probe(self, timeout: float = 5.0) -> bool:
+        """Check that the Llama API answers (lists models, no retries), feeding its circuit breaker"""
+        try:
+            await self.async_llama_api.with_options(max_retries=0).models.list(timeout=timeout)
+        except Exception as e:
+            self.breaker.record_failure(e, trip=True)
+            return False
+        self.breaker.record_success()
+        return True
 
+    @_instrumented
     def ask_langgraph(self, question: str, tools_used: list = None,
                       tool_summary: str = None, 
                       natural_summary: str = None) -> dict:
         try:
             # Build context-aware prompt including tool information
-            enhanced_question = question
-            
-            # Add tool context if available
-            if tools_used or tool_summary:
-                context_parts = []
-                if tools_used:
-                    tools_list = ', '.join(tools_used)
-                    context_parts.append(f"Tools used: {tools_list}")
-                if tool_summary:
-                    context_parts.append(f"Tool analysis: {tool_summary}")
-                if natural_summary:
-                    context_parts.append(f"Summary: {natural_summary}")
-
-                tool_context = "\n".join(context_parts)
-                enhanced_question = f"""Based on the following SRE tool analysis, please provide additional insights and recommendations:
-
-{tool_context}
-
-Original question: {question}
-
-Please provide actionable SRE insights, potential root causes, and recommended next steps."""
+            enhanced_question = self._insights_prompt("langgraph", question, tools_used,
+                                                      tool_summary, natural_summary)
 
             # This is a placeholder - adjust based on your LangGraph setup
             response = {
@@ -51,54 +99,107 @@ Please provide actionable SRE insights, potential root causes, and recommended n
         except Exception as e:
             return {"error": str(e), "status": "error"}
 
+    def _insights_prompt(self, prompt: str, question: str, tools_used: list = None,
+                         tool_summary: str = None, natural_summary: str = None) -> str:
+        """Wrap a question in its tool context, within the prompt's token budget"""
+        if not (tools_used or tool_summary):
+            return question
+
+        builder = self._prompt_builders[prompt]
+        preamble = "Based on the following SRE tool analysis, please provide additional insights and recommendations:"
+        if tools_used:
+            preamble += f"\n\nTools used: {', '.join(dedupe(tools_used))}"
+        # Anomalies outrank routine readings; the natural summary restates them, so it goes first when space runs out
+        facts = [(CRITICAL if part.startswith("Anomalies:") else INFO, part)
+                 for part in (tool_summary or "").split(" | ")]
+        facts.append((DETAIL, f"Summary: {natural_summary}" if natural_summary else ""))
+        instructions = (f"Original question: {truncate(question, builder.budget // 4)}\n\n"
+                        "Please provide actionable SRE insights, potential root causes, and recommended next steps.")
+        return builder.build(preamble, facts, instructions, heading="Tool analysis:")["text"]
+
+    def _build_llama_messages(self, question: str, tools_used: list = None,
+                              tool_summary: str = None,
+                              natural_summary: str = None) -> list:
+        # Build context-aware prompt including tool information
+        system_context = ("You are an expert Site Reliability Engineer "
+                         "(SRE) assistant. You have access to various "
+                         "monitoring and operational tools to help "
+                         "diagnose and resolve system issues.")
+
+        enhanced_question = self._insights_prompt("insights", question, tools_used,
+                                                  tool_summary, natural_summary)
+        return [
+            {"role": "system", "content": system_context},
+            {"role": "user", "content": enhanced_question}
+        ]
+
+    @_instrumented
     def ask_llama(self, question: str, tools_used: list = None,
                   tool_summary: str = None, 
                   natural_summary: str = None) -> dict:
         try:
-            # Build context-aware prompt including tool information
-            system_context = ("You are an expert Site Reliability Engineer "
-                             "(SRE) assistant. You have access to various "
-                             "monitoring and operational tools to help "
-                             "diagnose and resolve system issues.")
-
-            # Add tool context if available
-            if tools_used or tool_summary:
-                context_parts = []
-                if tools_used:
-                    tools_list = ', '.join(tools_used)
-                    context_parts.append(f"Tools used: {tools_list}")
-                if tool_summary:
-                    context_parts.append(f"Tool analysis: {tool_summary}")
-                if natural_summary:
-                    context_parts.append(f"Summary: {natural_summary}")
-
-                tool_context = "\n".join(context_parts)
-                enhanced_question = f"""Based on the following SRE tool analysis, please provide additional insights and recommendations:
-
-{tool_context}
-
-Original question: {question}
-
-Please provide actionable SRE insights, potential root causes, and recommended next steps."""
-            else:
-                enhanced_question = question
-
-            messages = [
-                {"role": "system", "content": system_context},
-                {"role": "user", "content": enhanced_question}
-            ]
+            # Fail at once while the Llama API is known to be down
+            self.breaker.check()
+        except CircuitOpen as e:
+            return {"error": str(e), "status": "error"}
+        try:
+            messages = self._build_llama_messages(question, tools_used,
+                                                  tool_summary, natural_summary)
 
             response = self.llama_api.chat.completions.create(
                 messages=messages,
-                model="Llama-4-Maverick-17B-128E-Instruct-FP8",
+                model=LLAMA_MODEL,
                 stream=False
             )
-            return {
-                "response": response.completion_message.content.text,
-                "status": "success"
-            }
+            text = response.completion_message.content.text
         except Exception as e:
+            self.breaker.record_failure(e)
             return {"error": str(e), "status": "error"}
+        self.breaker.record_success()
+        return {
+            "response": text,
+            "status": "success"
+        }
+
+    @property
+    def async_llama_api(self) -> AsyncLlamaAPIClient:
+        # Only streaming needs the async client
+        if self._async_llama_api is None:
+            with self._lock:
+                if self._async_llama_api is None:
+                    self._async_llama_api = AsyncLlamaAPIClient(api_key=os.getenv("LLAMA_API_KEY"))
+        return self._async_llama_api
+
+    async def astream_llama(self, question: str, tools_used: list = None,
+                            tool_summary: str = None,
+                            natural_summary: str = None) -> AsyncIterator[str]:
+        """Yield the Llama completion text as it is generated"""
+        self.breaker.check()
+        messages = self._build_llama_messages(question, tools_used,
+                                              tool_summary, natural_summary)
+        started = time.perf_counter()
+        # Not made current: the generator suspends between tokens, so it only records timing
+        span = tracer.start_span("llm.astream_llama")
+        try:
+            stream = await self.async_llama_api.chat.completions.create(
+                messages=messages,
+                model=LLAMA_MODEL,
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.event.delta
+                if getattr(delta, "type", None) == "text" and delta.text:
+                    yield delta.text
+            self.breaker.record_success()
+        except Exception as e:
+            self.breaker.record_failure(e)
+            LLM_CALL_ERRORS.labels("astream_llama").inc()
+            span.status = "error"
+            span.set("error", str(e))
+            raise
+        finally:
+            LLM_CALL_SECONDS.labels("astream_llama").observe(time.perf_counter() - started)
+            tracer.end_span(span)
 
     def format_response(self, langgraph_response: dict,
                         llama_response: dict) -> dict:
@@ -108,11 +209,11 @@ Please provide actionable SRE insights, potential root causes, and recommended n
         }
 
 
-# Standalone functions for backward compatibility
+# Standalone functions for backward compatibility; they share the registry's LLMService
 def send_to_langgraph(question: str, tools_used: list = None,
                       tool_summary: str = None,
                       natural_summary: str = None) -> dict:
-    llm_service = LLMService()
+    llm_service = get_llm_service()
     return llm_service.ask_langgraph(question, tools_used,
                                      tool_summary, natural_summary)
 
@@ -120,6 +221,6 @@ def send_to_langgraph(question: str, tools_used: list = None,
 def send_to_llama_api(question: str, tools_used: list = None,
                       tool_summary: str = None,
                       natural_summary: str = None) -> dict:
-    llm_service = LLMService()
+    llm_service = get_llm_service()
     return llm_service.ask_llama(question, tools_used, tool_summary,
                                  natural_summary)
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Token-budgeted prompt builder.
+Assembles LLM prompts from a fixed preamble and instructions plus a list of
+facts ranked by severity. Facts are deduplicated and added in rank order
+until the token budget is spent, so the same inputs always give the same prompt.
+"""
+
+import logging
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.telemetry import LLM_PROMPT_TOKENS
+from app.services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Fact severities, highest first in the prompt
+CRITICAL = 3
+WARNING = 2
+INFO = 1
+DETAIL = 0
+
+# The Llama tokenizer isn't shipped with the SDK; ~4 characters per token is close for English and numbers
+CHARS_PER_TOKEN = 4
+
+Fact = Tuple[int, str]
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, on a word boundary where possible"""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:max(limit - 1, 0)]
+    if ' ' in cut[limit // 2:]:
+        cut = cut[:cut.rindex(' ')]
+    return cut.rstrip() + '…'
+
+
+def dedupe(items: Iterable[str]) -> List[str]:
+    """Drop repeats, keeping first-seen order"""
+    return list(dict.fromkeys(item for item in items if item))
+
+
+class PromptBuilder:
+    """Builds one kind of prompt within a token budget and records its size"""
+
+    def __init__(self, name: str, budget: Optional[int] = None):
+        self.name = name
+        self.budget = budget if budget is not None else int(os.getenv('PROMPT_TOKEN_BUDGET', '768'))
+
+    def build(self, preamble: str, facts: Iterable[Fact], instructions: str = '',
+              heading: str = 'Facts:') -> Dict[str, object]:
+        """Preamble, then as many facts as fit (most severe first), then the instructions"""
+        fixed = estimate_tokens(preamble) + estimate_tokens(instructions) + estimate_tokens(heading)
+        # A repeated fact keeps its highest severity and its first position
+        severities: Dict[str, int] = {}
+        for severity, text in facts:
+            if text and severity > severities.get(text, -1):
+                severities[text] = severity
+        # Stable sort: equal severities keep the order the caller listed them in
+        ranked = sorted(severities.items(), key=lambda fact: -fact[1])
+
+        remaining = self.budget - fixed
+        included: List[str] = []
+        dropped = 0
+        for text, _ in ranked:
+            line = f"• {text}"
+            cost = estimate_tokens(line) + 1
+            if cost <= remaining:
+                included.append(line)
+                remaining -= cost
+            else:
+                dropped += 1
+        if dropped:
+            # The omission note counts against the budget too; make room for it from the bottom
+            while included and estimate_tokens(f"• (+{dropped} lower-priority facts omitted)") + 1 > remaining:
+                remaining += estimate_tokens(included.pop()) + 1
+                dropped += 1
+            included.append(f"• (+{dropped} lower-priority facts omitted)")
+
+        parts = [preamble]
+        if included:
+            parts.append('\n'.join([heading] + included))
+        if instructions:
+            parts.append(instructions)
+        text = '\n\n'.join(parts)
+        tokens = estimate_tokens(text)
+
+        LLM_PROMPT_TOKENS.labels(self.name).observe(tokens)
+        span = tracer.current()
+        if span is not None:
+            span.set(f"{self.name}_prompt_tokens", tokens)
+        logger.info(f"🧮 {self.name} prompt: ~{tokens} tokens (budget {self.budget}, "
+                    f"{len(ranked) - dropped} facts, {dropped} dropped)")
+        return {'text': text, 'tokens': tokens, 'facts': len(ranked) - dropped, 'dropped': dropped}
@@ -0,0 +1,96 @@
+"""
+Shared client registry.
+Every long-lived client (LLM service, Prometheus/Loki/Alertmanager clients, metric snapshots,
+the fleet health report, the per-backend circuit breakers, the SRE agent) is built once, on first
+use, and then reused by the agent, the tools and the module-level helpers.
+"""
+
+import threading
+from typing import Any, Callable, Dict
+
+_instances: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def _get_or_create(name: str, factory: Callable[[], Any]) -> Any:
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            # Double-checked so concurrent first callers build exactly one instance;
+            # re-entrant because building the agent builds the shared clients too
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+
+def get_llm_service():
+    from app.services.llm_service import LLMService
+    return _get_or_create('llm_service', LLMService)
+
+
+def get_prometheus_client():
+    from app.tools.async_prometheus_client import AsyncPrometheusClient
+    return _get_or_create('prometheus', AsyncPrometheusClient)
+
+
+def get_loki_client():
+    from app.tools.loki_client import LokiClient
+    return _get_or_create('loki', LokiClient)
+
+
+def get_alertmanager_client():
+    from app.tools.alertmanager_client import AlertmanagerClient
+    return _get_or_create('alertmanager', AlertmanagerClient)
+
+
+def get_circuit_breaker(name: str):
+    from app.services.circuit_breaker import CircuitBreaker
+    return _get_or_create(f'circuit:{name}', lambda: CircuitBreaker(name))
+
+
+def get_agent_executor():
+    from app.services.agent_executor import AgentExecutor
+    return _get_or_create('agent_executor', AgentExecutor)
+
+
+def get_prometheus_simulator():
+    from app.tools.prometheus_simulator import simulator_from_env
+    return _get_or_create('prometheus_simulator', simulator_from_env)
+
+
+def get_snapshot_store():
+    from app.tools.metric_snapshot import MetricSnapshotStore
+    return _get_or_create('snapshots', MetricSnapshotStore)
+
+
+def get_series_index():
+    from app.tools.series_index import SeriesIndex
+    return _get_or_create('series_index', SeriesIndex)
+
+
+def get_anomaly_detector():
+    from app.tools.anomaly_detector import AnomalyDetector
+    return _get_or_create('anomaly_detector', AnomalyDetector)
+
+
+def get_fleet_health():
+    from app.tools.fleet_health import FleetHealth
+    return _get_or_create('fleet_health', lambda: FleetHealth(
+        get_prometheus_client(), get_snapshot_store(), get_series_index()))
+
+
+def get_sre_agent():
+    from app.agents.sre_agent import SREAgent
+    return _get_or_create('sre_agent', SREAgent)
+
+
+def peek(name: str) -> Any:
+    """The shared instance if it has been built already, without building it"""
+    return _instances.get(name)
+
+
+def reset():
+    """Forget every shared instance (tests and config reloads)"""
+    with _lock:
+        _instances.clear()
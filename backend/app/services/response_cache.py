@@ -0,0 +1,33 @@
+"""
+Response cache for SRE questions.
+Answers are keyed on the question's normalized intent (the tools and metrics it
+routes to) plus the time bucket of the metrics behind it, so paraphrases of the
+same question over unchanged metrics are answered without any tool or LLM work.
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.tools.query_cache import QueryCache
+
+
+class ResponseCache(QueryCache):
+    """Bounded TTL cache of agent answers keyed by intent and metric time bucket"""
+
+    def __init__(self, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        ttl = ttl if ttl is not None else float(os.getenv('RESPONSE_CACHE_TTL', '30'))
+        super().__init__(
+            ttl=ttl,
+            max_entries=max_entries or int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256')),
+            bucket_seconds=ttl or 30
+        )
+
+    def key(self, intent: Tuple, eval_time: Optional[float] = None) -> Tuple[Tuple, int]:
+        eval_time = time.time() if eval_time is None else eval_time
+        return intent, int(eval_time // self.bucket_seconds)
+
+    def cacheable(self, result: Dict[str, Any]) -> bool:
+        # A degraded answer would be served to every paraphrase until it expired
+        return not result.get("degraded", False)
@@ -0,0 +1,190 @@
+"""
+Self-instrumentation for the SRE backend.
+Counters and histograms for each pipeline stage, rendered in the Prometheus
+text exposition format on /metrics. Recording is a dict lookup plus a few
+additions under a lock, cheap enough to leave on permanently.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; upper bounds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Intent routing is a single regex scan, so it needs finer buckets
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+# Estimated tokens per prompt
+TOKEN_BUCKETS = (64, 128, 256, 512, 768, 1024, 2048, 4096, 8192)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else f'{bound:g}', total))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'buckets': dict(self.cumulative()), 'sum': round(self.sum, 6), 'count': self.count}
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class MetricFamily:
+    """One named metric and its children, one per label combination"""
+
+    def __init__(self, name: str, documentation: str, kind: str,
+                 labelnames: Sequence[str] = (), factory: Callable[[], Any] = Counter):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+        for values, child in sorted(self._children.items()):
+            if self.kind == 'histogram':
+                for bound, count in child.cumulative():
+                    le = 'le="' + bound + '"'
+                    yield f'{self.name}_bucket{self._label_text(values, le)} {count}'
+                yield f'{self.name}_sum{self._label_text(values)} {child.sum}'
+                yield f'{self.name}_count{self._label_text(values)} {child.count}'
+            else:
+                yield f'{self.name}{self._label_text(values)} {child.value}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+class TelemetryRegistry:
+    """Every metric family the backend exports, plus collectors that read existing counters at scrape time"""
+
+    def __init__(self):
+        self.families: List[MetricFamily] = []
+        self.collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> MetricFamily:
+        family = MetricFamily(name, documentation, 'counter', labelnames)
+        self.families.append(family)
+        return family
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> MetricFamily:
+        family = MetricFamily(name, documentation, 'histogram', labelnames,
+                              factory=lambda: Histogram(buckets))
+        self.families.append(family)
+        return family
+
+    def collector(self, collect: Callable[[], Iterable[MetricFamily]]):
+        self.collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines = []
+        for family in self.families:
+            lines.extend(family.render())
+        for collect in self.collectors:
+            for family in collect():
+                lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = TelemetryRegistry()
+
+ROUTING_SECONDS = REGISTRY.histogram(
+    'sre_intent_routing_seconds', 'Time to route a question to tools and metrics',
+    buckets=FAST_BUCKETS)
+PROMETHEUS_QUERY_SECONDS = REGISTRY.histogram(
+    'sre_prometheus_query_seconds', 'Time for a PrometheusClient getter, cache included',
+    ['getter'])
+PROMETHEUS_QUERY_ERRORS = REGISTRY.counter(
+    'sre_prometheus_query_errors_total', 'PrometheusClient getters that returned an error',
+    ['getter'])
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    'sre_llm_call_seconds', 'Time for an LLMService call', ['method'])
+LLM_CALL_ERRORS = REGISTRY.counter(
+    'sre_llm_call_errors_total', 'LLMService calls that failed', ['method'])
+LLM_PROMPT_TOKENS = REGISTRY.histogram(
+    'sre_llm_prompt_tokens', 'Estimated prompt size per LLM request', ['prompt'],
+    buckets=TOKEN_BUCKETS)
+WORKFLOW_STEP_SECONDS = REGISTRY.histogram(
+    'sre_workflow_step_seconds', 'Time for one workflow step, timeouts included', ['workflow', 'step'])
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'sre_http_request_seconds', 'HTTP request latency by route', ['method', 'route', 'status'])
+
+
+def counter_family(name: str, documentation: str, labelnames: Sequence[str],
+                   samples: Dict[Tuple[str, ...], float]) -> MetricFamily:
+    """Family for values that are already counted elsewhere, rendered at scrape time"""
+    family = MetricFamily(name, documentation, 'counter', labelnames)
+    for values, value in samples.items():
+        family.labels(*values).value = value
+    return family
+
+
+def histogram_family(name: str, documentation: str,
+                     histogram: Histogram) -> MetricFamily:
+    family = MetricFamily(name, documentation, 'histogram')
+    family._children[()] = histogram
+    return family
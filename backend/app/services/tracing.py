@@ -0,0 +1,215 @@
+"""
+Per-request stage tracing.
+OpenTelemetry-compatible spans for agent -> tool -> Prometheus getters -> LLM,
+with W3C trace-context propagation, an in-process ring buffer of recent spans
+and an optional OTLP/JSON file exporter.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_current: ContextVar[Optional["Span"]] = ContextVar('sre_current_span', default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f'{random.getrandbits(bits):0{bits // 4}x}'
+
+
+class Span:
+    """One timed stage; ids and timestamps follow the OTLP data model"""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns',
+                 'attributes', 'status', 'remote_parent')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None, remote_parent: bool = False):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.remote_parent = remote_parent
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in self.attributes.items()],
+            'status': {'code': 2 if self.status == 'error' else 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Dict[str, str]]:
+    """Trace and parent span id from a W3C traceparent header, or None if it is absent or invalid"""
+    match = _TRACEPARENT.match((header or '').strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return {'trace_id': match.group(1), 'parent_id': match.group(2)}
+
+
+class RingBufferExporter:
+    """Keeps the most recent finished spans in memory, grouped by trace"""
+
+    def __init__(self, max_spans: Optional[int] = None):
+        self.max_spans = max_spans or int(os.getenv('TRACE_BUFFER_SPANS', '2048'))
+        self._spans: Deque[Span] = deque(maxlen=self.max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def trace(self, trace_id: str) -> List[Span]:
+        with self._lock:
+            return [s for s in self._spans if s.trace_id == trace_id]
+
+    def recent_traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest traces first, each with its root span and span count"""
+        with self._lock:
+            spans = list(self._spans)
+        traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        for span in reversed(spans):
+            traces.setdefault(span.trace_id, []).append(span)
+        result = []
+        for trace_id, trace_spans in list(traces.items())[:limit]:
+            ids = {s.span_id for s in trace_spans}
+            root = min((s for s in trace_spans if s.parent_id not in ids),
+                       key=lambda s: s.start_ns)
+            result.append({'trace_id': trace_id, 'root': root.name,
+                           'duration_ms': round(root.duration_ms, 2),
+                           'spans': len(trace_spans)})
+        return result
+
+
+class OTLPFileExporter:
+    """Appends each finished span as one OTLP/JSON ExportTraceServiceRequest line"""
+
+    def __init__(self, path: str, service_name: str = 'aegisnexus-sre-backend'):
+        self.path = path
+        self.resource = {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps({'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{'scope': {'name': 'app.services.tracing'}, 'spans': [span.to_otlp()]}],
+        }]})
+        try:
+            with self._lock, open(self.path, 'a') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to write span to {self.path}: {e}")
+
+
+class Tracer:
+    """Creates spans, tracks the current one per task/thread and hands finished spans to exporters"""
+
+    def __init__(self, exporters: Optional[List[Any]] = None):
+        self.buffer = RingBufferExporter()
+        self.exporters = exporters if exporters is not None else [self.buffer]
+        otlp_file = os.getenv('TRACE_OTLP_FILE')
+        if exporters is None and otlp_file:
+            self.exporters.append(OTLPFileExporter(otlp_file))
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        return _current.get()
+
+    def start_span(self, name: str, traceparent: Optional[str] = None,
+                   **attributes) -> Span:
+        """Start a child of the current span, of a remote traceparent, or a new root"""
+        remote = parse_traceparent(traceparent) if traceparent else None
+        parent = _current.get()
+        if remote:
+            return Span(name, remote['trace_id'], remote['parent_id'], attributes, remote_parent=True)
+        if parent is not None:
+            return Span(name, parent.trace_id, parent.span_id, attributes)
+        return Span(name, _new_id(128), None, attributes)
+
+    def end_span(self, span: Span):
+        span.end_ns = time.time_ns()
+        for exporter in self.exporters:
+            exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """Run a block as the current span; exceptions mark it as an error and propagate"""
+        span = self.start_span(name, traceparent, **attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.set('error', str(e) or type(e).__name__)
+            raise
+        finally:
+            _current.reset(token)
+            self.end_span(span)
+
+    def inject(self) -> Dict[str, str]:
+        """Outgoing headers carrying the current span as W3C trace context"""
+        span = _current.get()
+        return {'traceparent': span.traceparent} if span is not None else {}
+
+    def breakdown(self, trace_id: str) -> Dict[str, Any]:
+        """Compact timing of a trace's finished spans, offsets relative to the first one"""
+        spans = sorted(self.buffer.trace(trace_id), key=lambda s: s.start_ns)
+        if not spans:
+            return {'trace_id': trace_id, 'stages': []}
+        origin = spans[0].start_ns
+        return {
+            'trace_id': trace_id,
+            'stages': [{'name': s.name,
+                        'start_ms': round((s.start_ns - origin) / 1e6, 2),
+                        'duration_ms': round(s.duration_ms, 2),
+                        **({'status': 'error'} if s.status == 'error' else {})}
+                       for s in spans],
+        }
+
+
+# One tracer for the process, like the metric registry
+tracer = Tracer()
@@ -0,0 +1,140 @@
+"""
+DAG workflow engine.
+Steps name the steps they depend on; every step whose dependencies have
+finished starts at once under its own timeout, and progress is streamed as
+events while the DAG runs. Steps with a memo key share one result, single-
+flight, with every concurrent run that needs the same input.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from .telemetry import WORKFLOW_STEP_SECONDS
+from .tracing import tracer
+from ..tools.query_cache import QueryCache
+
+StepResult = Dict[str, Any]
+
+
+class Step:
+    """One node of a workflow: an async function of its dependencies' results"""
+
+    def __init__(self, name: str, run: Callable[[Dict[str, StepResult]], Awaitable[StepResult]],
+                 after: Iterable[str] = (), timeout: float = 5.0,
+                 memo_key: Union[None, str, Callable[[Dict[str, StepResult]], str]] = None):
+        self.name = name
+        self.run = run
+        self.after = tuple(after)
+        self.timeout = timeout
+        # Results are shared between runs whose inputs produce the same key
+        self.memo_key = memo_key
+
+
+class Workflow:
+    """Runs a DAG of steps with maximal concurrency, streaming progress events"""
+
+    def __init__(self, name: str, steps: List[Step], memo: Optional[QueryCache] = None):
+        self.name = name
+        self.steps = {step.name: step for step in steps}
+        self.memo = memo
+        self._check(steps)
+
+    def _check(self, steps: List[Step]):
+        """Reject unknown dependencies and cycles up front rather than hanging mid-run"""
+        if len(self.steps) != len(steps):
+            raise ValueError(f"Workflow '{self.name}' has duplicate step names")
+        for step in steps:
+            unknown = [dep for dep in step.after if dep not in self.steps]
+            if unknown:
+                raise ValueError(f"Step '{step.name}' depends on unknown steps: {', '.join(unknown)}")
+        ordered: set = set()
+        remaining = list(steps)
+        while remaining:
+            ready = [step for step in remaining if all(dep in ordered for dep in step.after)]
+            if not ready:
+                raise ValueError(f"Workflow '{self.name}' has a cycle through: "
+                                 f"{', '.join(step.name for step in remaining)}")
+            ordered.update(step.name for step in ready)
+            remaining = [step for step in remaining if step.name not in ordered]
+
+    async def _run_step(self, step: Step, inputs: Dict[str, StepResult]) -> StepResult:
+        started = time.perf_counter()
+        with tracer.span(f"workflow.{self.name}.{step.name}") as span:
+            try:
+                if step.memo_key is not None and self.memo is not None:
+                    key = step.memo_key(inputs) if callable(step.memo_key) else step.memo_key
+                    work = self.memo.get_or_fetch(f"{step.name}:{key}", lambda: step.run(inputs))
+                else:
+                    work = step.run(inputs)
+                result = await asyncio.wait_for(work, step.timeout)
+            except asyncio.TimeoutError:
+                result = {'status': 'error', 'error': f'Timed out after {step.timeout:.1f}s', 'timed_out': True}
+            except Exception as e:
+                result = {'status': 'error', 'error': str(e) or type(e).__name__}
+            if result.get('status') != 'success':
+                span.status = 'error'
+                span.set('error', result.get('error', 'unknown'))
+        WORKFLOW_STEP_SECONDS.labels(self.name, step.name).observe(time.perf_counter() - started)
+        return result
+
+    async def stream(self) -> AsyncIterator[Dict[str, Any]]:
+        """Run the DAG, yielding step_started/step_finished events and a final done event.
+
+        A step always runs once its dependencies have finished, whether they
+        succeeded or not: it receives their results, error results included.
+        """
+        started = time.perf_counter()
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 1)
+
+        results: Dict[str, StepResult] = {}
+        durations: Dict[str, float] = {}
+        pending = dict(self.steps)
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while pending or running:
+                for name in [n for n, step in pending.items() if all(dep in results for dep in step.after)]:
+                    step = pending.pop(name)
+                    task = asyncio.ensure_future(self._run_step(step, {dep: results[dep] for dep in step.after}))
+                    running[task] = name
+                    durations[name] = time.perf_counter()
+                    yield {'event': 'step_started', 'data': {'step': name, 'elapsed_ms': elapsed_ms()}}
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    results[name] = task.result()
+                    durations[name] = round((time.perf_counter() - durations[name]) * 1000, 1)
+                    yield {'event': 'step_finished', 'data': {
+                        'step': name,
+                        'status': _status(results[name]),
+                        'duration_ms': durations[name],
+                        'elapsed_ms': elapsed_ms(),
+                        'result': results[name],
+                    }}
+        finally:
+            # The consumer went away (or its deadline fired): stop every step still running
+            for task in running:
+                task.cancel()
+
+        yield {'event': 'done', 'data': {
+            'results': results,
+            'steps': {name: {'status': _status(results[name]), 'duration_ms': durations[name]}
+                      for name in self.steps},
+            'duration_ms': elapsed_ms(),
+        }}
+
+    async def run(self) -> Dict[str, Any]:
+        """Run the DAG to completion and return the done event's data"""
+        async for event in self.stream():
+            if event['event'] == 'done':
+                return event['data']
+        raise RuntimeError(f"Workflow '{self.name}' ended without a result")
+
+
+def _status(result: StepResult) -> str:
+    if result.get('timed_out'):
+        return 'timed_out'
+    return 'success' if result.get('status') == 'success' else 'error'
@@ -0,0 +1,322 @@
+"""
+Alertmanager Client for SRE Tools
+Polls /api/v2/alerts in the background into an in-memory alert set keyed by
+fingerprint. Each poll records only what changed (new, resolved, changed) in
+a bounded change log, and the active set is kept in severity order, so
+questions during an alert storm read the poller's state and the recent deltas
+instead of re-reading and re-sorting the whole alert list.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from .http_pool import get_http_client
+from .mock_mode import mock_mode_enabled
+from .range_query import parse_duration
+from ..services.registry import get_circuit_breaker, get_prometheus_simulator
+from ..services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_ORDER = {'critical': 0, 'error': 1, 'warning': 2, 'info': 3}
+# Alerts listed per section of a digest; the counts always cover everything
+DIGEST_LIMIT = 10
+
+# Mock mode: the demo stack's rules (prometheus/rules/*.yml), evaluated against the Prometheus simulator
+MOCK_RULES = [
+    {'alertname': 'HighCPUUsage', 'signal': 'cpu', 'above': 80, 'severity': 'critical', 'service': 'system',
+     'summary': 'E-commerce System High CPU Usage'},
+    {'alertname': 'HighMemoryUsage', 'signal': 'memory', 'above': 85, 'severity': 'critical', 'service': 'system',
+     'summary': 'E-commerce System High Memory Usage'},
+    {'alertname': 'LowMemoryWarning', 'signal': 'memory', 'above': 70, 'severity': 'warning', 'service': 'system',
+     'summary': 'E-commerce System Memory Warning'},
+    {'alertname': 'HighErrorRate', 'signal': 'errors', 'above': 5, 'severity': 'warning', 'service': 'application',
+     'summary': 'High Application Error Rate'},
+    {'alertname': 'InstanceDown', 'signal': 'up', 'below': 1, 'severity': 'critical', 'service': 'system',
+     'summary': 'Instance is down'},
+]
+
+
+def fingerprint(labels: Dict[str, str]) -> str:
+    """Stable id for a label set, in the shape of Alertmanager's own fingerprints"""
+    return hashlib.sha1(repr(sorted(labels.items())).encode()).hexdigest()[:16]
+
+
+def _normalize(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the fields the agent reasons about from an /api/v2/alerts entry"""
+    labels = raw.get('labels', {})
+    return {
+        'fingerprint': raw.get('fingerprint') or fingerprint(labels),
+        'alertname': labels.get('alertname', 'unknown'),
+        'severity': labels.get('severity', 'none'),
+        'service': labels.get('service') or labels.get('job', ''),
+        'instance': labels.get('instance', ''),
+        'state': raw.get('status', {}).get('state', 'active'),
+        'starts_at': raw.get('startsAt'),
+        'summary': raw.get('annotations', {}).get('summary', ''),
+        'labels': labels,
+    }
+
+
+def _signature(alert: Dict[str, Any]) -> Tuple[str, str]:
+    # Labels (severity included) are the fingerprint itself; a change is a silence/inhibition or a new
+    # summary. Annotation values that move on every evaluation, like the description, don't count
+    return alert['state'], alert['summary']
+
+
+def _severity_rank(severity: str) -> Tuple[int, str]:
+    return SEVERITY_ORDER.get(severity, len(SEVERITY_ORDER)), severity
+
+
+class AlertSet:
+    """Active alerts by fingerprint, bucketed by severity, plus a time-ordered log of changes"""
+
+    def __init__(self, max_changes: int = 1000):
+        self.alerts: Dict[str, Dict[str, Any]] = {}
+        # Severity -> alerts in arrival order. Severity is a label, so an alert never changes bucket
+        self._buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._severities: List[str] = []
+        self._log: deque = deque(maxlen=max_changes)
+        self.version = 0
+        self.polls = 0
+
+    def _add(self, alert: Dict[str, Any]):
+        bucket = self._buckets.get(alert['severity'])
+        if bucket is None:
+            bucket = self._buckets[alert['severity']] = {}
+            bisect.insort(self._severities, alert['severity'], key=_severity_rank)
+        bucket[alert['fingerprint']] = alert
+
+    def _remove(self, fp: str) -> Dict[str, Any]:
+        alert = self.alerts.pop(fp)
+        bucket = self._buckets[alert['severity']]
+        del bucket[fp]
+        if not bucket:
+            del self._buckets[alert['severity']]
+            self._severities.remove(alert['severity'])
+        return alert
+
+    def apply(self, alerts: List[Dict[str, Any]], now: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Replace the active set with one poll's alerts and return only what differs"""
+        now = time.time() if now is None else now
+        diff: Dict[str, List[Dict[str, Any]]] = {'new': [], 'resolved': [], 'changed': []}
+        incoming = {alert['fingerprint']: alert for alert in alerts}
+        for fp, alert in incoming.items():
+            current = self.alerts.get(fp)
+            if current is None:
+                diff['new'].append(alert)
+            elif _signature(current) != _signature(alert):
+                diff['changed'].append({**alert, 'previous': dict(zip(('state', 'summary'), _signature(current)))})
+                # Same fingerprint, same bucket: replacing keeps its place in the order
+                self.alerts[fp] = self._buckets[alert['severity']][fp] = alert
+        for fp in [fp for fp in self.alerts if fp not in incoming]:
+            diff['resolved'].append(self._remove(fp))
+        # Only the new alerts are ordered, oldest first, before they join their buckets
+        diff['new'].sort(key=lambda a: a['starts_at'] or '')
+        for alert in diff['new']:
+            self.alerts[alert['fingerprint']] = alert
+            self._add(alert)
+
+        self.polls += 1
+        if any(diff.values()):
+            self.version += 1
+            for kind, changed in diff.items():
+                self._log.extend((now, kind, alert) for alert in changed)
+        return diff
+
+    def changes_since(self, since: float) -> Dict[str, List[Dict[str, Any]]]:
+        """Changes logged after `since`; a bisect plus one pass over the matching entries"""
+        start = bisect.bisect_right(self._log, since, key=lambda entry: entry[0])
+        changes: Dict[str, List[Dict[str, Any]]] = {'new': [], 'resolved': [], 'changed': []}
+        for i in range(start, len(self._log)):
+            _, kind, alert = self._log[i]
+            changes[kind].append(alert)
+        return changes
+
+    def iter_active(self) -> Iterator[Dict[str, Any]]:
+        """Active alerts, most severe first and in arrival order within a severity; no sort"""
+        for severity in self._severities:
+            yield from self._buckets[severity].values()
+
+    def active(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(islice(self.iter_active(), limit))
+
+    def counts(self) -> Dict[str, int]:
+        """Active alerts per severity, most severe first"""
+        return {severity: len(self._buckets[severity]) for severity in self._severities}
+
+
+class AlertmanagerClient:
+    """Async Alertmanager client maintaining an incrementally diffed alert set"""
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None,
+                 alert_set: Optional[AlertSet] = None, poll_interval: Optional[float] = None):
+        self.base_url = url or os.getenv('ALERTMANAGER_URL', 'http://localhost:9093')
+        self.mock_mode = mock_mode_enabled()
+        self.timeout = httpx.Timeout(timeout or float(os.getenv('ALERTMANAGER_TIMEOUT', '10')))
+        self.alert_set = alert_set or AlertSet()
+        # How far back a digest reports new/resolved/changed alerts
+        self.diff_window = parse_duration(os.getenv('ALERT_DIFF_WINDOW', '5m'))
+        # 0 disables the background poller; digests then poll on demand
+        self.poll_interval = (poll_interval if poll_interval is not None
+                              else float(os.getenv('ALERTMANAGER_POLL_INTERVAL', '5')))
+        self._polled_at: Optional[float] = None
+        self._poll_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+        if self.mock_mode:
+            logger.info("🎭 Running in mock mode for Alertmanager")
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return get_http_client(self.base_url, self.timeout, 4)
+
+    @property
+    def breaker(self):
+        return get_circuit_breaker('alertmanager')
+
+    async def probe(self) -> bool:
+        """Check that Alertmanager is healthy, feeding the answer to its circuit breaker"""
+        try:
+            response = await self.http.get('/-/healthy')
+            if response.status_code != 200:
+                raise RuntimeError(f'HTTP {response.status_code}')
+        except Exception as e:
+            self.breaker.record_failure(e, trip=True)
+            return False
+        self.breaker.record_success()
+        return True
+
+    async def fetch_alerts(self) -> List[Dict[str, Any]]:
+        """Raw /api/v2/alerts entries (active, silenced and inhibited alike)"""
+        if self.mock_mode:
+            return self._mock_alerts(time.time())
+        self.breaker.check()
+        try:
+            response = await self.http.get('/api/v2/alerts', headers=tracer.inject())
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_status(response.status_code)
+        if response.status_code != 200:
+            raise RuntimeError(f'HTTP {response.status_code}: {response.text}')
+        return response.json()
+
+    def _mock_alerts(self, now: float) -> List[Dict[str, Any]]:
+        """Fire the demo rules on the simulator's current values"""
+        simulator = get_prometheus_simulator()
+        alerts = []
+        for rule in MOCK_RULES:
+            values = simulator.values(rule['signal'], now)
+            for i, value in enumerate(values):
+                if value > rule.get('above', float('inf')) or value < rule.get('below', float('-inf')):
+                    labels = {'alertname': rule['alertname'], 'severity': rule['severity'],
+                              'service': rule['service'], 'instance': simulator.names[i],
+                              'job': simulator.jobs[i]}
+                    alerts.append({'labels': labels, 'annotations': {'summary': rule['summary']},
+                                   'fingerprint': fingerprint(labels), 'status': {'state': 'active'},
+                                   'startsAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))})
+        return alerts
+
+    async def poll(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch the current alerts and fold them into the alert set"""
+        with tracer.span("alertmanager.poll") as span:
+            try:
+                alerts = [_normalize(raw) for raw in await self.fetch_alerts()]
+            except Exception as e:
+                self._poll_error = str(e) or type(e).__name__
+                raise
+            diff = self.alert_set.apply(alerts)
+            self._polled_at = time.monotonic()
+            self._poll_error = None
+            for kind, changed in diff.items():
+                span.set(kind, len(changed))
+        if any(diff.values()):
+            logger.info(f"🚨 Alerts: +{len(diff['new'])} new, -{len(diff['resolved'])} resolved, "
+                        f"~{len(diff['changed'])} changed ({len(self.alert_set.alerts)} active)")
+        return diff
+
+    async def get_alert_digest(self) -> Dict[str, Any]:
+        """Report the active alerts and the changes within the diff window from the poller's state.
+
+        Polls first only when no background poller is running and the state is
+        older than the poll interval.
+        """
+        stale = self._polled_at is None or time.monotonic() - self._polled_at > self.poll_interval
+        if self._task is None and stale:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"❌ Error polling Alertmanager: {e}")
+        if self._poll_error is not None:
+            return {'status': 'error', 'error': self._poll_error}
+
+        # Bounded reads: counts per bucket and the first few alerts, never the whole set
+        firing = len(self.alert_set.alerts)
+        by_severity = self.alert_set.counts()
+        changes = self.alert_set.changes_since(time.time() - self.diff_window)
+        return {
+            'status': 'success',
+            'metric': 'active_alerts',
+            'firing': firing,
+            'by_severity': by_severity,
+            'active': self.alert_set.active(DIGEST_LIMIT),
+            'changes': {kind: alerts[-DIGEST_LIMIT:] for kind, alerts in changes.items()},
+            'change_counts': {kind: len(alerts) for kind, alerts in changes.items()},
+            'version': self.alert_set.version,
+            'summary': self._summarize(firing, by_severity, changes),
+            'mock': self.mock_mode
+        }
+
+    async def run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.warning(f"⚠️ Alertmanager poll failed: {e}")
+            # Fixed cadence, so diffs accumulate between questions at a steady Alertmanager load
+            await asyncio.sleep(max(self.poll_interval - (time.monotonic() - started), 0))
+
+    def start(self) -> Optional[asyncio.Task]:
+        if self.poll_interval <= 0 or self._task is not None:
+            return self._task
+        logger.info(f"🚨 Polling Alertmanager every {self.poll_interval:g}s")
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _summarize(self, firing: int, by_severity: Dict[str, int],
+                   changes: Dict[str, List[Dict[str, Any]]]) -> str:
+        if not firing and not any(changes.values()):
+            return "No active alerts"
+        # by_severity is already most severe first
+        severities = ", ".join(f"{count} {severity}" for severity, count in by_severity.items())
+        text = f"{firing} firing" + (f" ({severities})" if severities else "")
+        new = changes['new']
+        if new:
+            named = ", ".join(f"{a['alertname']} on {a['instance'] or a['service']}" for a in new[-3:])
+            text += f"; {len(new)} new in the last {self.diff_window / 60:g}m ({named})"
+        if changes['resolved']:
+            text += f"; {len(changes['resolved'])} resolved"
+        if changes['changed']:
+            text += f"; {len(changes['changed'])} changed"
+        return text
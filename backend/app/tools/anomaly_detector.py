@@ -0,0 +1,218 @@
+"""
+Anomaly Detection Engine for SRE Tools
+Incremental per-series detection over range data: a Welford running
+mean/variance as the baseline, an EWMA for the current level, and z-score
+plus median/MAD checks for change points. Each refresh only ingests the
+points that arrived since the last one.
+"""
+
+import logging
+import math
+import os
+import statistics
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .metric_summary import _series_name
+from .range_query import SeriesMatrix, parse_duration
+
+logger = logging.getLogger(__name__)
+
+SeriesKey = Tuple[Tuple[str, str], ...]
+
+
+class SeriesState:
+    """Running baseline and current anomaly run of one series"""
+
+    __slots__ = ('labels', 'count', 'mean', 'm2', 'ewma', 'last_ts', 'window',
+                 'onset', 'peak', 'peak_value', 'run', 'kind')
+
+    def __init__(self, labels: Dict[str, str], window: int):
+        self.labels = labels
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma: Optional[float] = None
+        self.last_ts = -math.inf
+        # Recent baseline values for the robust (median/MAD) check
+        self.window: deque = deque(maxlen=window)
+        self.onset: Optional[float] = None
+        self.peak = 0.0
+        self.peak_value = 0.0
+        self.run = 0
+        self.kind = ''
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def learn(self, value: float):
+        """Welford update of the baseline"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.window.append(value)
+
+    def relearn(self):
+        """Drop the baseline: a shift that outlasts the window becomes the new normal"""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.window.clear()
+        self.end_run()
+
+    def end_run(self):
+        self.onset = None
+        self.peak = 0.0
+        self.peak_value = 0.0
+        self.run = 0
+        self.kind = ''
+
+
+class AnomalyDetector:
+    """Per-metric, per-series incremental anomaly detection"""
+
+    def __init__(self, z_threshold: float = 3.0, mad_threshold: float = 3.5,
+                 shift_threshold: float = 3.0, alpha: float = 0.3,
+                 min_points: int = 20, window: int = 30, min_run: int = 2,
+                 lookback: Optional[float] = None, step: Optional[float] = None):
+        self.z_threshold = z_threshold
+        self.mad_threshold = mad_threshold
+        self.shift_threshold = shift_threshold
+        self.alpha = alpha
+        self.min_points = min_points
+        self.window = window
+        # Consecutive flagged points before a run is reported; one outlier in a
+        # few thousand noisy points is expected and not worth a page
+        self.min_run = min_run
+        # How much history the first refresh of a metric pulls, and the range-query resolution
+        self.lookback = lookback if lookback is not None else parse_duration(os.getenv('ANOMALY_LOOKBACK', '30m'))
+        self.step = step if step is not None else parse_duration(os.getenv('ANOMALY_STEP', '30s'))
+        self._series: Dict[str, Dict[SeriesKey, SeriesState]] = {}
+        self._last_ts: Dict[str, float] = {}
+        self.points_ingested = 0
+
+    def observe(self, state: SeriesState, ts: float, value: float):
+        """Score one new point against the baseline, then fold it in if it is normal"""
+        if ts <= state.last_ts or not math.isfinite(value):
+            return
+        state.last_ts = ts
+        state.ewma = value if state.ewma is None else self.alpha * value + (1 - self.alpha) * state.ewma
+        if state.count < self.min_points:
+            state.learn(value)
+            return
+
+        # Floor the deviation so a perfectly flat series still has a finite score
+        std = max(state.std, 1e-3 * max(abs(state.mean), 1.0))
+        z = (value - state.mean) / std
+        shift = (state.ewma - state.mean) / std
+        spike = abs(z) >= self.z_threshold and self._robust_outlier(state, value)
+        # The smoothed level has moved, and this point agrees (not just the tail of one spike)
+        level_shift = abs(shift) >= self.shift_threshold and abs(z) >= 1 and z * shift > 0
+
+        if not (spike or level_shift):
+            if state.onset is not None:
+                state.end_run()
+            state.learn(value)
+            return
+
+        if state.onset is None:
+            state.onset = ts
+        state.run += 1
+        if abs(z) >= abs(state.peak):
+            state.peak = z
+            state.peak_value = value
+        state.kind = 'level_shift' if level_shift and state.run > 1 else 'spike'
+        if state.run >= self.window:
+            state.relearn()
+
+    def _robust_outlier(self, state: SeriesState, value: float) -> bool:
+        """Median/MAD confirmation so one noisy baseline doesn't trigger on its own"""
+        if len(state.window) < 3:
+            return True
+        median = statistics.median(state.window)
+        mad = statistics.median(abs(v - median) for v in state.window)
+        if mad == 0:
+            return value != median
+        return abs(0.6745 * (value - median) / mad) >= self.mad_threshold
+
+    def ingest(self, metric: str, matrix: SeriesMatrix) -> int:
+        """Feed a range result; points at or before each series' last timestamp are skipped"""
+        states = self._series.setdefault(metric, {})
+        ingested = 0
+        last_ts = self._last_ts.get(metric, -math.inf)
+        for columns in matrix:
+            key = SeriesMatrix.series_key(columns.labels)
+            state = states.get(key)
+            if state is None:
+                state = states[key] = SeriesState(columns.labels, self.window)
+            for ts, value in zip(columns.timestamps, columns.values):
+                if ts > state.last_ts:
+                    self.observe(state, ts, value)
+                    ingested += 1
+            if len(columns):
+                last_ts = max(last_ts, columns.timestamps[-1])
+        self._last_ts[metric] = last_ts
+        self.points_ingested += ingested
+        self._prune(metric, last_ts - self.lookback)
+        return ingested
+
+    def _prune(self, metric: str, before: float):
+        # Series that stopped reporting (removed instances) age out with the lookback
+        states = self._series.get(metric, {})
+        for key in [k for k, s in states.items() if s.last_ts < before]:
+            del states[key]
+
+    async def refresh(self, client, metric: str, query: str,
+                      now: Optional[float] = None) -> int:
+        """Range-query only the steps since the last refresh of a metric and ingest them"""
+        now = time.time() if now is None else now
+        last = self._last_ts.get(metric)
+        start = now - self.lookback if last is None else last + self.step
+        if start > now:
+            return 0
+        result = await client.query_range(query, start=start, end=now, step=self.step)
+        if result.get('status') != 'success':
+            logger.warning(f"⚠️ Anomaly refresh for {metric} failed: {result.get('error')}")
+            return 0
+        return self.ingest(metric, result['series'])
+
+    def anomalies(self, metrics: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Series currently in an anomalous run, largest magnitude first"""
+        found = []
+        for metric in (self._series if metrics is None else metrics):
+            for state in self._series.get(metric, {}).values():
+                if state.onset is None or state.run < self.min_run:
+                    continue
+                found.append({
+                    'metric': metric,
+                    'series': _series_name(state.labels),
+                    'labels': state.labels,
+                    'kind': state.kind,
+                    'direction': 'up' if state.peak > 0 else 'down',
+                    'onset': state.onset,
+                    'magnitude': round(abs(state.peak), 2),
+                    'value': state.peak_value,
+                    'baseline': round(state.mean, 3),
+                    'points': state.run,
+                })
+        found.sort(key=lambda a: a['magnitude'], reverse=True)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'series': {metric: len(states) for metric, states in self._series.items()},
+            'points_ingested': self.points_ingested,
+            'anomalous': len(self.anomalies()),
+        }
+
+
+def describe_anomaly(anomaly: Dict[str, Any]) -> str:
+    """One-line rendering used in tool summaries"""
+    onset = time.strftime('%H:%M:%S', time.localtime(anomaly['onset']))
+    label = 'level shift' if anomaly['kind'] == 'level_shift' else 'spike'
+    return (f"{anomaly['metric']} {label} on {anomaly['series']}: {anomaly['value']:.1f} "
+            f"vs baseline {anomaly['baseline']:.1f} ({anomaly['direction']} {anomaly['magnitude']:.1f}σ) "
+            f"since {onset}")
@@ -0,0 +1,266 @@
+"""
+Async Prometheus Client for SRE Tools
+Non-blocking variant of PrometheusClient built on pooled httpx.AsyncClient
+connections, so concurrent questions share keep-alive connections instead of
+opening a socket per PromQL query.
+"""
+
+import asyncio
+import os
+import logging
+import time
+from typing import Dict, Any, Optional, Union
+
+import httpx
+
+from .http_pool import get_http_client, get_semaphore
+from .mock_mode import mock_mode_enabled
+from .prometheus_client import PrometheusClient
+from .metric_summary import summarize_vector
+from .query_cache import QueryCache, normalize_query
+from .range_query import SeriesMatrix, parse_duration, split_range
+from ..services.circuit_breaker import CircuitOpen
+from ..services.telemetry import PROMETHEUS_QUERY_ERRORS, PROMETHEUS_QUERY_SECONDS
+from ..services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPrometheusClient(PrometheusClient):
+    """Asyncio client for the Prometheus API with pooled connections and bounded concurrency"""
+
+    def __init__(self, url: Optional[str] = None,
+                 timeout: Optional[float] = None,
+                 connect_timeout: Optional[float] = None,
+                 max_concurrency: Optional[int] = None,
+                 cache: Optional[QueryCache] = None):
+        """Initialize the client without touching the network"""
+        self.prometheus_url = url or os.getenv('PROMETHEUS_URL',
+                                              'http://localhost:9090')
+        self.mock_mode = mock_mode_enabled()
+        self.timeout = httpx.Timeout(
+            timeout if timeout is not None else float(os.getenv('PROMETHEUS_TIMEOUT', '10')),
+            connect=(connect_timeout if connect_timeout is not None
+                     else float(os.getenv('PROMETHEUS_CONNECT_TIMEOUT', '5')))
+        )
+        self.max_concurrency = (max_concurrency if max_concurrency is not None
+                                else int(os.getenv('PROMETHEUS_MAX_CONCURRENCY', '16')))
+        self.cache = cache if cache is not None else QueryCache()
+        # Prometheus rejects ranges over 11,000 points per series; smaller chunks also fetch in parallel
+        self.range_chunk_points = int(os.getenv('PROMETHEUS_RANGE_CHUNK_POINTS', '1000'))
+
+        if self.mock_mode:
+            logger.info("🎭 Running in mock mode for Prometheus")
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return get_http_client(self.prometheus_url, self.timeout,
+                               self.max_concurrency)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limit shared by every client for this URL on the running loop"""
+        return get_semaphore(self.prometheus_url, self.max_concurrency)
+
+    async def probe(self) -> bool:
+        """Check that Prometheus answers; if it does not, its circuit opens until a retry succeeds"""
+        if self.mock_mode:
+            return False
+        try:
+            response = await self.http.get('/api/v1/status/config')
+            if response.status_code == 200:
+                logger.info(f"📊 Connected to Prometheus at {self.prometheus_url}")
+                self.breaker.record_success()
+                return True
+            raise Exception(f"HTTP {response.status_code}")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to connect to Prometheus: {e}")
+            self.breaker.record_failure(e, trip=True)
+            return False
+
+    async def _send(self, path: str, params: Dict[str, Any]) -> httpx.Response:
+        """One API request through the circuit breaker and the concurrency limit"""
+        self.breaker.check()
+        try:
+            async with self._semaphore():
+                response = await self.http.get(path, params=params, headers=tracer.inject())
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_status(response.status_code)
+        return response
+
+    async def query_prometheus(self, query: str) -> Dict[str, Any]:
+        """Execute a PromQL query through the result cache"""
+        return await self.cache.get_or_fetch(query, lambda: self._query(query))
+
+    async def _query(self, query: str) -> Dict[str, Any]:
+        """Execute a PromQL query against Prometheus and return results"""
+        try:
+            if self.mock_mode:
+                return self._mock_response(query)
+
+            response = await self._send('/api/v1/query', {'query': query})
+            payload = response.json() if response.status_code == 200 else None
+            return self._parse_response(response.status_code, payload,
+                                        response.text, query)
+
+        except CircuitOpen as e:
+            return {'status': 'error', 'error': str(e), 'query': query, 'circuit_open': True}
+        except Exception as e:
+            logger.error(f"❌ Error executing query '{query}': {e}")
+            return {
+                'status': 'error',
+                'error': str(e) or type(e).__name__,
+                'query': query
+            }
+
+    async def query_many(self, queries: Dict[str, str],
+                         summarize: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Evaluate several named PromQL expressions concurrently.
+
+        Identical expressions (after normalization) are evaluated once and
+        shared; every named result carries the time its query took.
+        """
+        unique: Dict[str, str] = {}
+        for query in queries.values():
+            unique.setdefault(normalize_query(query), query)
+
+        async def timed(query: str) -> Dict[str, Any]:
+            started = time.perf_counter()
+            result = await self.query_prometheus(query)
+            return {**result, 'duration_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+        evaluated = dict(zip(unique, await asyncio.gather(
+            *(timed(query) for query in unique.values()))))
+
+        results = {}
+        for name, query in queries.items():
+            result = evaluated[normalize_query(query)]
+            if summarize and result['status'] == 'success' and result['data'].get('resultType') == 'vector':
+                result = {**result, 'stats': summarize_vector(result['data']['result'])}
+            results[name] = {**result, 'query': query}
+        return results
+
+    async def _query_range_chunk(self, query: str, start: float, end: float,
+                                 step: float) -> Dict[str, Any]:
+        """Fetch one step-aligned chunk of a range query"""
+        try:
+            if self.mock_mode:
+                return self._mock_range_response(query, start, end, step)
+
+            response = await self._send('/api/v1/query_range', {
+                'query': query, 'start': start, 'end': end, 'step': step
+            })
+            payload = response.json() if response.status_code == 200 else None
+            return self._parse_response(response.status_code, payload,
+                                        response.text, query)
+
+        except CircuitOpen as e:
+            return {'status': 'error', 'error': str(e), 'query': query, 'circuit_open': True}
+        except Exception as e:
+            logger.error(f"❌ Error executing range query '{query}': {e}")
+            return {
+                'status': 'error',
+                'error': str(e) or type(e).__name__,
+                'query': query
+            }
+
+    async def query_range(self, query: str,
+                          start: Optional[float] = None,
+                          end: Optional[float] = None,
+                          step: Union[str, float] = '1m',
+                          lookback: Union[str, float] = '1h') -> Dict[str, Any]:
+        """Execute a PromQL range query, fetching step-aligned chunks in parallel.
+
+        Chunks are ingested into a SeriesMatrix in time order as soon as each one
+        and all earlier ones have arrived, so raw JSON is never held for the whole range.
+        """
+        step_seconds = parse_duration(step)
+        end = time.time() if end is None else end
+        start = end - parse_duration(lookback) if start is None else start
+        chunks = split_range(start, end, step_seconds, self.range_chunk_points)
+
+        def fetch_chunk(chunk_start: float, chunk_end: float):
+            # Chunks sit on the step grid, so a repeated window hits the cache chunk by chunk
+            cache_key = f"range:{chunk_start}:{chunk_end}:{step_seconds}:{query}"
+            return self.cache.get_or_fetch(
+                cache_key,
+                lambda: self._query_range_chunk(query, chunk_start, chunk_end, step_seconds))
+
+        tasks = [asyncio.ensure_future(fetch_chunk(s, e)) for s, e in chunks]
+        matrix = SeriesMatrix()
+        try:
+            for task in tasks:
+                result = await task
+                if result['status'] != 'success':
+                    return result
+                matrix.ingest(result['data']['result'])
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return {
+            'status': 'success',
+            'resultType': 'matrix',
+            'query': query,
+            'start': chunks[0][0],
+            'end': chunks[-1][1],
+            'step': step_seconds,
+            'chunks': len(chunks),
+            'series': matrix,
+            'mock': self.mock_mode
+        }
+
+    async def _get(self, getter: str, metric: str, query: str,
+                   summarize) -> Dict[str, Any]:
+        """Run a getter's query and summarize it, recording latency and errors per getter"""
+        started = time.perf_counter()
+        with tracer.span(f"prometheus.{getter}", query=query) as span:
+            result = self._metric_result(metric, query, await self.query_prometheus(query), summarize)
+            if result['status'] != 'success':
+                span.status = 'error'
+                span.set('error', result.get('error', 'unknown'))
+        PROMETHEUS_QUERY_SECONDS.labels(getter).observe(time.perf_counter() - started)
+        if result['status'] != 'success':
+            PROMETHEUS_QUERY_ERRORS.labels(getter).inc()
+        return result
+
+    async def get_cpu_usage(self, instance: Optional[str] = None) -> Dict[str, Any]:
+        """Get CPU usage metrics"""
+        query = self._cpu_query(instance)
+        return await self._get('get_cpu_usage', 'cpu_usage_percentage', query,
+                               self._summarize_cpu_data)
+
+    async def get_memory_usage(self,
+                               instance: Optional[str] = None) -> Dict[str, Any]:
+        """Get memory usage metrics"""
+        query = self._memory_query(instance)
+        return await self._get('get_memory_usage', 'memory_usage_percentage', query,
+                               self._summarize_memory_data)
+
+    async def get_disk_usage(self,
+                             instance: Optional[str] = None) -> Dict[str, Any]:
+        """Get disk usage metrics"""
+        query = self._disk_query(instance)
+        return await self._get('get_disk_usage', 'disk_usage_percentage', query,
+                               self._summarize_disk_data)
+
+    async def get_service_health(self,
+                                 service_name: Optional[str] = None) -> Dict[str, Any]:
+        """Get service health status"""
+        query = self._health_query(service_name)
+        return await self._get('get_service_health', 'service_health', query,
+                               self._summarize_health_data)
+
+    async def get_http_requests_rate(self,
+                                     service: Optional[str] = None) -> Dict[str, Any]:
+        """Get HTTP request rate metrics"""
+        query = self._requests_rate_query(service)
+        return await self._get('get_http_requests_rate', 'http_requests_per_second', query,
+                               self._summarize_rate_data)
+
+    async def get_error_rate(self, service: Optional[str] = None) -> Dict[str, Any]:
+        """Get error rate metrics"""
+        query = self._error_rate_query(service)
+        return await self._get('get_error_rate', 'error_rate_percentage', query,
+                               self._summarize_error_data)
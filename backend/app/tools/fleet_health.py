@@ -0,0 +1,265 @@
+"""
+Fleet Health Report for SRE Tools
+System health report built from the six core getters and kept in memory. A
+background refresher rebuilds only the sections whose getter result changed
+and bumps the report's version only when its content does, so GET
+/sre/health serves pre-rendered bytes and polling dashboards get a 304 for
+an unchanged ETag.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metric_snapshot import MetricSnapshotStore
+from .series_index import SeriesIndex
+from ..services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Report section -> getter; keys are the agent's metric keys, so the series index is shared with it
+HEALTH_SECTIONS = {
+    'cpu': 'get_cpu_usage',
+    'memory': 'get_memory_usage',
+    'disk': 'get_disk_usage',
+    'health': 'get_service_health',
+    'requests': 'get_http_requests_rate',
+    'errors': 'get_error_rate',
+}
+# Section -> (warning, critical) level for any one series, in line with the demo alert rules
+THRESHOLDS = {
+    'cpu': (70, 80),
+    'memory': (70, 85),
+    'disk': (80, 90),
+    'errors': (5, 10),
+}
+UNITS = {'cpu': '%', 'memory': '%', 'disk': '%', 'errors': '%', 'requests': ' req/s'}
+# Least to most severe; the report takes the worst of its sections
+STATUS_ORDER = ('healthy', 'unknown', 'warning', 'critical')
+
+
+def _worst(statuses) -> str:
+    return max(statuses, key=STATUS_ORDER.index, default='unknown')
+
+
+class FleetHealth:
+    """Versioned, incrementally rebuilt fleet health report with a background refresher"""
+
+    def __init__(self, client, store: MetricSnapshotStore, index: SeriesIndex,
+                 interval: Optional[float] = None, max_age: Optional[float] = None,
+                 top_k: Optional[int] = None):
+        self.client = client
+        self.store = store
+        self.index = index
+        # 0 disables the background refresher; the report is then rebuilt on demand
+        self.interval = interval if interval is not None else float(os.getenv('HEALTH_REFRESH_INTERVAL', '15'))
+        # Snapshots younger than this are used as they are instead of querying Prometheus
+        self.max_age = max_age if max_age is not None else float(os.getenv('METRIC_SNAPSHOT_MAX_AGE', '30'))
+        self.top_k = top_k or int(os.getenv('HEALTH_TOP_K', '5'))
+
+        self._sections: Dict[str, Dict[str, Any]] = {}
+        # (fetched_at, stale) of the getter result each section was built from
+        self._sources: Dict[str, Tuple[float, bool]] = {}
+        self._services: Dict[str, Dict[str, Any]] = {}
+        self._digest: Optional[str] = None
+        self.report: Optional[Dict[str, Any]] = None
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.version = 0
+        self.refreshes = 0
+        self.rebuilt = 0
+        self._refreshed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _inputs(self) -> Dict[str, Tuple[float, Dict[str, Any]]]:
+        """(fetched_at, result) per getter: the snapshot if fresh enough, otherwise a live fetch"""
+        now = time.time()
+        inputs = {}
+        live = []
+        for getter in HEALTH_SECTIONS.values():
+            entry = self.store.latest(getter)
+            if entry is not None and now - entry[0] <= self.max_age:
+                inputs[getter] = entry
+            elif getter not in live:
+                live.append(getter)
+
+        results = await asyncio.gather(*(getattr(self.client, getter)() for getter in live),
+                                       return_exceptions=True)
+        for getter, result in zip(live, results):
+            if isinstance(result, Exception):
+                result = {'status': 'error', 'error': str(result) or type(result).__name__}
+            self.store.put(getter, result, now)
+            # A failed fetch falls back to the last good snapshot, however old
+            inputs[getter] = self.store.latest(getter) or (now, result)
+        return inputs
+
+    def _section(self, key: str, result: Dict[str, Any], stale: bool) -> Dict[str, Any]:
+        if result.get('status') != 'success':
+            if key == 'health':
+                self._services = {}
+            return {'status': 'unknown', 'summary': f"Error - {result.get('error', 'Unknown error')}"}
+        self.index.update(key, result['data'])
+        stats = result.get('stats') or {}
+        # Fetch times stay out of the report: a refresh with the same values must keep the same ETag
+        section: Dict[str, Any] = {'status': 'healthy', 'summary': result.get('summary', ''),
+                                   'series': stats.get('count', 0)}
+        if stale:
+            section['stale'] = True
+        if not stats.get('count'):
+            section['status'] = 'unknown'
+            return section
+
+        if key == 'health':
+            self._services = self._service_breakdown(key)
+            down = [name for service in self._services.values() for name in service['down']]
+            section['down'] = down[:self.top_k]
+            section['status'] = _worst(service['status'] for service in self._services.values())
+            return section
+
+        for stat in ('avg', 'p95', 'max'):
+            section[stat] = round(stats[stat], 2)
+        section['top'] = [{'name': s['name'], 'value': round(s['value'], 2)}
+                          for s in self.index.top_k(key, self.top_k)]
+        if key in THRESHOLDS:
+            warning, critical = THRESHOLDS[key]
+            section['status'] = ('critical' if stats['max'] >= critical else
+                                 'warning' if stats['max'] >= warning else 'healthy')
+        return section
+
+    def _service_breakdown(self, key: str) -> Dict[str, Dict[str, Any]]:
+        """Targets up per job, with the instances that are down"""
+        services = {}
+        for job in self.index.label_values(key, 'job'):
+            series = self.index.select(key, job=job)
+            down = sorted(s['name'] for s in series if s['value'] < 1)
+            services[job] = {
+                'status': 'critical' if len(down) == len(series) else 'warning' if down else 'healthy',
+                'up': len(series) - len(down),
+                'total': len(series),
+                'down': down,
+            }
+        return services
+
+    def _top_offenders(self) -> List[Dict[str, Any]]:
+        """Series past their warning level and down targets, most severe first"""
+        offenders = [{'metric': 'health', 'name': name, 'value': 0, 'status': service['status']}
+                     for service in self._services.values() for name in service['down']]
+        for key, (warning, critical) in THRESHOLDS.items():
+            for series in self._sections.get(key, {}).get('top', []):
+                if series['value'] >= warning:
+                    offenders.append({'metric': key, **series,
+                                      'status': 'critical' if series['value'] >= critical else 'warning'})
+        # Within a status, the series furthest past its own warning level first
+        offenders.sort(key=lambda o: (-STATUS_ORDER.index(o['status']),
+                                      -o['value'] / THRESHOLDS[o['metric']][0] if o['metric'] in THRESHOLDS else 0))
+        return offenders[:self.top_k]
+
+    def _summarize(self, status: str, offenders: List[Dict[str, Any]]) -> str:
+        text = f"Fleet {status}"
+        if offenders:
+            text += ": " + "; ".join(
+                f"{o['name']} down" if o['metric'] == 'health'
+                else f"{o['metric']} {o['value']:.1f}{UNITS[o['metric']]} on {o['name']}"
+                for o in offenders[:3])
+        if self._services:
+            up = sum(s['up'] for s in self._services.values())
+            total = sum(s['total'] for s in self._services.values())
+            text += f" | {up}/{total} targets up across {len(self._services)} services"
+        return text
+
+    async def refresh(self) -> bool:
+        """Rebuild the sections whose getter result changed; True if the report content changed"""
+        with tracer.span("fleet_health.refresh") as span:
+            inputs = await self._inputs()
+            now = time.time()
+            changed = []
+            for key, getter in HEALTH_SECTIONS.items():
+                fetched_at, result = inputs[getter]
+                source = (fetched_at, now - fetched_at > self.max_age)
+                if self._sources.get(key) == source:
+                    continue
+                self._sections[key] = self._section(key, result, stale=source[1])
+                self._sources[key] = source
+                changed.append(key)
+            self.refreshes += 1
+            self.rebuilt += len(changed)
+            self._refreshed_at = time.monotonic()
+            span.set('sections_rebuilt', len(changed))
+            if not changed:
+                return False
+
+            status = _worst(section['status'] for section in self._sections.values())
+            offenders = self._top_offenders()
+            content = {
+                'status': status,
+                'summary': self._summarize(status, offenders),
+                'top_offenders': offenders,
+                'services': self._services,
+                'sections': self._sections,
+            }
+            digest = hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()[:16]
+            if digest == self._digest:
+                return False
+            self._digest = digest
+            self.version += 1
+            # Copies, so sections rebuilt later never alter a report already served
+            self.report = json.loads(json.dumps({**content, 'version': self.version, 'updated_at': round(now, 3)}))
+            self.body = json.dumps(self.report).encode()
+            self.etag = f'"{self.version}-{digest}"'
+            span.set('version', self.version)
+        logger.info(f"🏥 Fleet health v{self.version}: {status} (rebuilt {', '.join(changed)})")
+        return True
+
+    async def current(self) -> Dict[str, Any]:
+        """The latest report; built on demand when no background refresher keeps it current"""
+        stale = self._refreshed_at is None or time.monotonic() - self._refreshed_at > (self.interval or 0)
+        if self.report is None or (self._task is None and stale):
+            await self.refresh()
+        return self.report
+
+    def rendered(self, report: Dict[str, Any]) -> Tuple[str, bytes]:
+        """ETag and JSON body of a report; the current report's are pre-rendered"""
+        if report is self.report:
+            return self.etag, self.body
+        body = json.dumps(report).encode()
+        return f'"{hashlib.sha1(body).hexdigest()[:16]}"', body
+
+    async def run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Fleet health refresh failed: {e}")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self) -> Optional[asyncio.Task]:
+        if self.interval <= 0 or self._task is not None:
+            return self._task
+        logger.info(f"🏥 Refreshing the fleet health report every {self.interval:g}s")
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'etag': self.etag,
+            'refreshes': self.refreshes,
+            'sections_rebuilt': self.rebuilt,
+            'source_ages_seconds': {key: round(time.time() - source[0], 3)
+                                    for key, source in self._sources.items()},
+        }
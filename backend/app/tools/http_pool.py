@@ -0,0 +1,59 @@
+"""
+Shared HTTP Connection Pools for SRE Tools
+Keep-alive httpx.AsyncClient pools and concurrency semaphores keyed by base
+URL, shared by the Prometheus, Loki and Alertmanager clients.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import weakref
+from typing import Dict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 keep-alive without it
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# One connection pool per base URL, per event loop. httpx pools are bound
+# to the loop that created them, and tests / the sync runner use their own loops.
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def get_http_client(base_url: str, timeout: httpx.Timeout,
+                    max_connections: int) -> httpx.AsyncClient:
+    """Return the shared keep-alive client for a base URL on the running loop"""
+    loop = asyncio.get_running_loop()
+    pools = _pools.setdefault(loop, {})
+    client = pools.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        pools[base_url] = client
+        logger.info(f"🔌 Opened HTTP connection pool for {base_url} "
+                    f"(http2={HTTP2_AVAILABLE}, max_connections={max_connections})")
+    return client
+
+
+def get_semaphore(base_url: str, limit: int) -> asyncio.Semaphore:
+    """Concurrency limit shared by every client for a base URL on the running loop"""
+    semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if base_url not in semaphores:
+        semaphores[base_url] = asyncio.Semaphore(limit)
+    return semaphores[base_url]
+
+
+async def close_http_clients():
+    """Close every pooled client owned by the running loop"""
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    _semaphores.pop(asyncio.get_running_loop(), None)
+    for client in pools.values():
+        await client.aclose()
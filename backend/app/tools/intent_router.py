@@ -0,0 +1,139 @@
+"""
+Intent Router for SRE Tools
+Declarative intent -> tool table compiled once into a single word-boundary
+regex, so routing a question is one scan regardless of how many intents exist.
+"""
+
+import re
+from typing import Any, Dict, List
+
+# Order matters: it is the order tool summaries are reported in.
+# Keywords are matched as whole words/phrases, plural and -ed/-ing forms included.
+INTENTS: Dict[str, Dict[str, Any]] = {
+    'comprehensive': {
+        'keywords': ['overall', 'comprehensive', 'everything', 'all metrics',
+                     'full analysis', 'complete', 'summary'],
+        'tools': ['prometheus', 'metrics_collector', 'performance_analyzer',
+                  'health_checker', 'traffic_monitor', 'error_monitor'],
+        'metrics': ['cpu', 'memory', 'disk', 'health', 'requests', 'errors'],
+    },
+    'cpu': {
+        'keywords': ['cpu', 'processor', 'cpu usage'],
+        'tools': ['prometheus', 'cpu_monitor'],
+        'metrics': ['cpu'],
+    },
+    'memory': {
+        'keywords': ['memory', 'ram', 'memory usage'],
+        'tools': ['prometheus', 'memory_monitor'],
+        'metrics': ['memory'],
+    },
+    'disk': {
+        'keywords': ['disk', 'storage', 'disk usage'],
+        'tools': ['prometheus', 'disk_monitor'],
+        'metrics': ['disk'],
+    },
+    'performance': {
+        'keywords': ['metric', 'performance', 'system performance'],
+        'tools': ['prometheus', 'metrics_collector', 'performance_analyzer'],
+        'metrics': ['cpu', 'memory', 'disk'],
+        'suppressed_by': ['comprehensive'],
+    },
+    'health': {
+        'keywords': ['service', 'health', 'status', 'uptime'],
+        'tools': ['prometheus', 'health_checker'],
+        'metrics': ['health'],
+    },
+    'traffic': {
+        'keywords': ['request', 'traffic', 'load', 'http'],
+        'tools': ['prometheus', 'traffic_monitor'],
+        'metrics': ['requests'],
+    },
+    'errors': {
+        'keywords': ['error', 'failure', 'error rate'],
+        'tools': ['prometheus', 'error_monitor'],
+        'metrics': ['errors'],
+    },
+    'logs': {
+        'keywords': ['log', 'debug', 'trace', 'tracing'],
+        'tools': ['loki', 'log_analyzer'],
+        'metrics': ['logs'],
+    },
+    'alerts': {
+        'keywords': ['alert', 'incident', 'problem', 'issue'],
+        'tools': ['alertmanager', 'incident_tracker'],
+        'metrics': ['alerts'],
+    },
+    'deployments': {
+        'keywords': ['deploy', 'deployment', 'rollback', 'release', 'commit'],
+        'tools': ['github', 'deployment_manager'],
+        'metrics': [],
+    },
+}
+
+# Used when nothing else matched
+DEFAULT_INTENT = 'general'
+DEFAULT_PLAN = {
+    'tools': ['general_analyzer'],
+    'metrics': ['overview'],
+}
+
+# Short stems ending consonant-vowel-consonant double it before -ed/-ing (debug -> debugging)
+_DOUBLES_FINAL = re.compile(r'(?:^|[^aeiou])[aeiou][bdglmnprt]$')
+
+
+def _inflections(keyword: str) -> List[str]:
+    """The keyword plus its plural, -ed and -ing forms ('deploy' -> 'deploys', 'deployed', 'deploying')"""
+    stem = keyword[:-1] if keyword.endswith('e') else keyword
+    forms = [keyword, keyword + 's', keyword + 'es', stem + 'ed', stem + 'ing']
+    if _DOUBLES_FINAL.search(keyword):
+        forms += [keyword + keyword[-1] + 'ed', keyword + keyword[-1] + 'ing']
+    return forms
+
+
+class IntentRouter:
+    """Routes a question to intents with one pass of a precompiled automaton"""
+
+    def __init__(self, intents: Dict[str, Dict[str, Any]] = INTENTS):
+        self.intents = intents
+        self._order = {name: i for i, name in enumerate(intents)}
+        self._keyword_intents: Dict[str, List[str]] = {}
+        for name, spec in intents.items():
+            for keyword in spec['keywords']:
+                for form in _inflections(self._canonical(keyword)):
+                    intents_for = self._keyword_intents.setdefault(form, [])
+                    if name not in intents_for:
+                        intents_for.append(name)
+
+        # Longest keywords first so multi-word phrases win over their prefixes
+        alternatives = sorted(self._keyword_intents, key=len, reverse=True)
+        self._pattern = re.compile(
+            r'\b(' + '|'.join(re.escape(k).replace(r'\ ', r'\s+') for k in alternatives) + r')\b',
+            re.IGNORECASE)
+
+    @staticmethod
+    def _canonical(keyword: str) -> str:
+        return ' '.join(keyword.lower().split())
+
+    def match(self, question: str) -> List[str]:
+        """Intents mentioned in the question, deduplicated, in table order"""
+        found = set()
+        for m in self._pattern.finditer(question):
+            found.update(self._keyword_intents[self._canonical(m.group(1))])
+        matched = [name for name in found
+                   if not any(s in found for s in self.intents[name].get('suppressed_by', ()))]
+        return sorted(matched, key=self._order.__getitem__)
+
+    def plan(self, question: str) -> Dict[str, List[str]]:
+        """Deduplicated tool and metric plan for a question"""
+        intents = self.match(question) or [DEFAULT_INTENT]
+        tools: Dict[str, None] = {}
+        metrics: Dict[str, None] = {}
+        for name in intents:
+            spec = self.intents.get(name, DEFAULT_PLAN)
+            tools.update(dict.fromkeys(spec['tools']))
+            metrics.update(dict.fromkeys(spec['metrics']))
+        return {'intents': intents, 'tools': list(tools), 'metrics': list(metrics)}
+
+
+# Built once at import so request handling never recompiles the table
+default_router = IntentRouter()
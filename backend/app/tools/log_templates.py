@@ -0,0 +1,138 @@
+"""
+Log Template Mining for SRE Tools
+Drain-style online clustering: each line is masked, tokenized and routed
+through a fixed-depth prefix tree to a handful of candidate templates, so
+adding a line costs the same no matter how many lines came before. The
+number of templates is capped; the least recently matched one is evicted.
+"""
+
+import heapq
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+WILDCARD = '<*>'
+
+# Variable parts masked before tokenizing, most specific first
+MASKS = [
+    (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE), '<UUID>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<IP>'),
+    (re.compile(r'\b0x[0-9a-f]+\b|\b[0-9a-f]{16,}\b', re.IGNORECASE), '<HEX>'),
+    (re.compile(r'(?<![A-Za-z])-?\d+(?:\.\d+)?(?:ms|s|%)?(?![A-Za-z])'), '<NUM>'),
+]
+
+# Label values remembered per template, to say which services a template comes from
+MAX_SOURCES = 5
+
+
+def mask(line: str) -> str:
+    for pattern, replacement in MASKS:
+        line = pattern.sub(replacement, line)
+    return line
+
+
+class LogCluster:
+    """One template with its occurrence count and first/last-seen timestamps"""
+
+    __slots__ = ('id', 'tokens', 'count', 'first_seen', 'last_seen', 'sources')
+
+    def __init__(self, cluster_id: int, tokens: List[str], ts: float):
+        self.id = cluster_id
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen = ts
+        self.last_seen = ts
+        self.sources: Dict[str, int] = {}
+
+    @property
+    def template(self) -> str:
+        return ' '.join(self.tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'template': self.template,
+            'count': self.count,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'sources': dict(sorted(self.sources.items(), key=lambda s: -s[1])),
+        }
+
+
+class LogTemplateMiner:
+    """Incremental Drain-style template clustering in bounded memory"""
+
+    def __init__(self, depth: int = 4, similarity: float = 0.5,
+                 max_children: int = 100, max_clusters: int = 1000,
+                 source_label: str = 'service_name'):
+        # Tokens 1..depth-2 route a line; length is the first level
+        self.prefix_tokens = max(depth - 2, 1)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.source_label = source_label
+        self._tree: Dict[Any, Any] = {}
+        # Insertion order doubles as recency: matched clusters move to the end
+        self._clusters: "OrderedDict[int, LogCluster]" = OrderedDict()
+        self._next_id = 0
+        self.lines = 0
+        self.evicted = 0
+
+    def _leaf(self, tokens: List[str]) -> List[int]:
+        """Cluster ids under the tree path for this token sequence, creating the path as needed"""
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[:self.prefix_tokens]:
+            # Tokens that still carry digits are variables; full nodes send newcomers to the wildcard branch
+            key = WILDCARD if any(c.isdigit() for c in token) else token
+            if key not in node and len(node) >= self.max_children:
+                key = WILDCARD
+            node = node.setdefault(key, {})
+        return node.setdefault(None, [])
+
+    def _match(self, leaf: List[int], tokens: List[str]) -> Optional[LogCluster]:
+        best, best_score = None, -1.0
+        for cluster_id in leaf:
+            cluster = self._clusters.get(cluster_id)
+            if cluster is None:
+                continue
+            same = sum(1 for a, b in zip(cluster.tokens, tokens) if a == b or a == WILDCARD)
+            score = same / len(tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+        return best if best is not None and best_score >= self.similarity else None
+
+    def add(self, line: str, ts: float, labels: Optional[Dict[str, str]] = None) -> LogCluster:
+        """Assign one line to a template, creating or generalizing one as needed"""
+        self.lines += 1
+        tokens = mask(line).split() or ['']
+        leaf = self._leaf(tokens)
+        cluster = self._match(leaf, tokens)
+        if cluster is None:
+            cluster = LogCluster(self._next_id, tokens, ts)
+            self._next_id += 1
+            self._clusters[cluster.id] = cluster
+            # Dead ids (evicted clusters) are dropped from the leaf as it is rebuilt
+            leaf[:] = [i for i in leaf if i in self._clusters] + [cluster.id]
+            if len(self._clusters) > self.max_clusters:
+                self._clusters.popitem(last=False)
+                self.evicted += 1
+        else:
+            cluster.tokens = [a if a == b else WILDCARD for a, b in zip(cluster.tokens, tokens)]
+            self._clusters.move_to_end(cluster.id)
+
+        cluster.count += 1
+        cluster.first_seen = min(cluster.first_seen, ts)
+        cluster.last_seen = max(cluster.last_seen, ts)
+        source = (labels or {}).get(self.source_label)
+        if source and (source in cluster.sources or len(cluster.sources) < MAX_SOURCES):
+            cluster.sources[source] = cluster.sources.get(source, 0) + 1
+        return cluster
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def top(self, k: int = 5) -> List[Dict[str, Any]]:
+        """The k most frequent templates; ties go to the one seen first"""
+        best: List[Tuple[int, float, LogCluster]] = heapq.nsmallest(
+            k, ((-c.count, c.first_seen, c) for c in self._clusters.values()),
+            key=lambda entry: entry[:2])
+        return [cluster.to_dict() for _, _, cluster in best]
@@ -0,0 +1,227 @@
+"""
+Loki Client for SRE Tools
+Pages through /loki/api/v1/query_range as an async generator and folds the
+lines into a LogTemplateMiner as they arrive, so an error summary over
+millions of lines never holds more than one page in memory.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import random
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from .http_pool import get_http_client
+from .log_templates import LogTemplateMiner
+from .mock_mode import mock_mode_enabled
+from .range_query import parse_duration
+from ..services.registry import get_circuit_breaker
+from ..services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Labels pushed by the demo stack's k6 log generator (testdata/2.send-logs.js)
+DEFAULT_ERROR_QUERY = '{detected_level=~"error|critical|fatal"}'
+
+LogEntry = Tuple[int, Dict[str, str], str]
+
+# Mock mode: the demo shop's services and the kinds of errors they log
+MOCK_SERVICES = ['frontend', 'backend', 'payment', 'inventory', 'shipping']
+MOCK_ERRORS = [
+    'Payment gateway timeout after {ms}ms for order {order}',
+    'Database connection refused: 10.0.{a}.{b}:5432',
+    'Inventory check failed for product {product}: stock service returned 503',
+    'Request {uuid} failed: upstream connect error',
+    'Shipping rate lookup failed for order {order}: invalid postcode',
+]
+MOCK_INTERVAL_NS = 2_000_000_000
+
+
+class LokiClient:
+    """Async Loki client with paged streaming and template-based error summaries"""
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None,
+                 page_limit: Optional[int] = None, max_lines: Optional[int] = None,
+                 time_budget: Optional[float] = None):
+        self.base_url = url or os.getenv('LOKI_URL', 'http://localhost:3100')
+        self.mock_mode = mock_mode_enabled()
+        self.timeout = httpx.Timeout(timeout or float(os.getenv('LOKI_TIMEOUT', '10')))
+        # Loki refuses pages over max_entries_limit_per_query (5000 by default)
+        self.page_limit = page_limit or int(os.getenv('LOKI_PAGE_LIMIT', '1000'))
+        self.max_lines = max_lines or int(os.getenv('LOKI_MAX_LINES', '1000000'))
+        # Stop paging after this long and summarize what was read, so a question isn't held up
+        self.time_budget = time_budget or float(os.getenv('LOKI_ANALYSIS_SECONDS', '5'))
+        self.error_query = os.getenv('LOKI_ERROR_QUERY', DEFAULT_ERROR_QUERY)
+        self.lookback = parse_duration(os.getenv('LOKI_LOOKBACK', '1h'))
+
+        if self.mock_mode:
+            logger.info("🎭 Running in mock mode for Loki")
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return get_http_client(self.base_url, self.timeout, 4)
+
+    @property
+    def breaker(self):
+        return get_circuit_breaker('loki')
+
+    async def probe(self) -> bool:
+        """Check that Loki is ready, feeding the answer to its circuit breaker"""
+        try:
+            response = await self.http.get('/ready')
+            if response.status_code != 200:
+                raise RuntimeError(f'HTTP {response.status_code}')
+        except Exception as e:
+            self.breaker.record_failure(e, trip=True)
+            return False
+        self.breaker.record_success()
+        return True
+
+    async def _page(self, query: str, start_ns: int, end_ns: int, limit: int) -> List[LogEntry]:
+        """One forward page of entries, all streams merged into timestamp order"""
+        if self.mock_mode:
+            return self._mock_page(start_ns, end_ns, limit)
+
+        self.breaker.check()
+        try:
+            response = await self.http.get('/loki/api/v1/query_range', params={
+                'query': query, 'start': start_ns, 'end': end_ns,
+                'limit': limit, 'direction': 'forward'
+            }, headers=tracer.inject())
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_status(response.status_code)
+        if response.status_code != 200:
+            raise RuntimeError(f'HTTP {response.status_code}: {response.text}')
+        payload = response.json()
+        if payload.get('status') != 'success':
+            raise RuntimeError(payload.get('error', 'Unknown error'))
+
+        # Each stream is already in time order; merge instead of sorting the page
+        streams = [[(int(ts), stream.get('stream', {}), line) for ts, line in stream.get('values', [])]
+                   for stream in payload['data']['result']]
+        return list(heapq.merge(*streams, key=lambda entry: entry[0]))[:limit]
+
+    def _mock_page(self, start_ns: int, end_ns: int, limit: int) -> List[LogEntry]:
+        """Deterministic error lines every two seconds, seeded by timestamp"""
+        entries = []
+        ts = -(-start_ns // MOCK_INTERVAL_NS) * MOCK_INTERVAL_NS
+        while ts <= end_ns and len(entries) < limit:
+            rng = random.Random(ts)
+            service = rng.choice(MOCK_SERVICES)
+            line = rng.choices(MOCK_ERRORS, weights=(5, 3, 2, 1, 1))[0].format(
+                ms=rng.randint(3000, 30000), order=rng.randint(10000, 99999),
+                a=rng.randint(0, 255), b=rng.randint(1, 254), product=rng.randint(1, 500),
+                uuid='%032x' % rng.getrandbits(128))
+            entries.append((ts, {'service_name': service, 'detected_level': 'error'}, line))
+            ts += MOCK_INTERVAL_NS
+        return entries
+
+    async def stream_logs(self, query: str, start: float, end: float,
+                          max_lines: Optional[int] = None,
+                          deadline: Optional[float] = None) -> AsyncIterator[LogEntry]:
+        """Yield (timestamp_ns, labels, line) from start to end, one page at a time.
+
+        Loki's start is inclusive, so each page resumes at the last timestamp
+        seen and skips the entries at that timestamp it already yielded.
+        With a deadline (time.perf_counter()), a page request still in flight
+        when it passes raises TimeoutError.
+        """
+        cursor, end_ns = int(start * 1e9), int(end * 1e9)
+        remaining = max_lines or self.max_lines
+        seen_at_cursor = set()
+        while remaining > 0:
+            limit = min(self.page_limit, remaining)
+            if deadline is None:
+                page = await self._page(query, cursor, end_ns, limit)
+            else:
+                async with asyncio.timeout(max(deadline - time.perf_counter(), 0)):
+                    page = await self._page(query, cursor, end_ns, limit)
+            fresh = [e for e in page if not (e[0] == cursor and (e[2], tuple(e[1].items())) in seen_at_cursor)]
+            for entry in fresh:
+                yield entry
+            remaining -= len(fresh)
+            if len(page) < self.page_limit or not page:
+                return
+            if not fresh:
+                # A whole page at one timestamp: step past it rather than loop
+                cursor, seen_at_cursor = cursor + 1, set()
+                continue
+            last = page[-1][0]
+            at_last = {(e[2], tuple(e[1].items())) for e in page if e[0] == last}
+            seen_at_cursor = seen_at_cursor | at_last if last == cursor else at_last
+            cursor = last
+
+    async def analyze_errors(self, query: Optional[str] = None, lookback: Optional[float] = None,
+                             top_k: int = 5, time_budget: Optional[float] = None) -> Dict[str, Any]:
+        """Cluster the error lines of the lookback window into templates and report the most frequent"""
+        query = query or self.error_query
+        end = time.time()
+        start = end - (lookback or self.lookback)
+        miner = LogTemplateMiner()
+        time_budget = time_budget or self.time_budget
+        deadline = time.perf_counter() + time_budget
+        truncated = False
+        with tracer.span("loki.analyze_errors", query=query) as span:
+            try:
+                async with aclosing(self.stream_logs(query, start, end, deadline=deadline)) as entries:
+                    async for ts, labels, line in entries:
+                        miner.add(line, ts / 1e9, labels)
+                        if time.perf_counter() > deadline:
+                            truncated = True
+                            break
+            except TimeoutError:
+                # A page was still loading when the budget ran out: summarize what was read
+                span.set('timed_out', True)
+                if not miner.lines:
+                    return {'status': 'error', 'error': f'No logs from Loki within {time_budget:g}s',
+                            'query': query}
+                truncated = True
+            except Exception as e:
+                logger.error(f"❌ Error reading Loki logs for '{query}': {e}")
+                span.status = 'error'
+                span.set('error', str(e))
+                if not miner.lines:
+                    return {'status': 'error', 'error': str(e) or type(e).__name__, 'query': query}
+                truncated = True
+            span.set('lines', miner.lines)
+            span.set('templates', len(miner))
+
+        templates = miner.top(top_k)
+        return {
+            'status': 'success',
+            'metric': 'error_logs',
+            'query': query,
+            'lines': miner.lines,
+            'template_count': len(miner),
+            'templates': templates,
+            'truncated': truncated,
+            'summary': self._summarize_templates(miner.lines, len(miner), templates, truncated),
+            'mock': self.mock_mode
+        }
+
+    @staticmethod
+    def _summarize_templates(lines: int, count: int, templates: List[Dict[str, Any]],
+                             truncated: bool) -> str:
+        if not lines:
+            return "No error logs in the window"
+        top = "; ".join(f"{t['count']}x {t['template']}" for t in templates[:3])
+        return (f"{lines}{'+' if truncated else ''} error lines in {count} templates - top: {top}")
+
+    async def query_logs(self, query: str, limit: int = 100,
+                         lookback: Optional[float] = None) -> Dict[str, Any]:
+        """Up to limit lines for a LogQL selector from the lookback window, oldest first"""
+        end = time.time()
+        start = end - (lookback or self.lookback)
+        try:
+            lines = [{'timestamp': ts / 1e9, 'labels': labels, 'line': line}
+                     async for ts, labels, line in self.stream_logs(query, start, end, max_lines=limit)]
+            return {'status': 'success', 'query': query, 'lines': lines}
+        except Exception as e:
+            return {'status': 'error', 'error': str(e) or type(e).__name__, 'query': query}
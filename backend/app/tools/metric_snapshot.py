@@ -0,0 +1,140 @@
+"""
+Metric Snapshot Store for SRE Tools
+Background prefetcher that keeps the core Prometheus signals warm in memory,
+so most questions are answered from a snapshot instead of a live query, and
+keeps the anomaly detector's range windows current off the request path.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The signals nearly every question touches: CPU, memory, disk, up, request rate, error rate
+CORE_GETTERS = (
+    'get_cpu_usage',
+    'get_memory_usage',
+    'get_disk_usage',
+    'get_service_health',
+    'get_http_requests_rate',
+    'get_error_rate',
+)
+
+
+class MetricSnapshotStore:
+    """Latest successful result per getter, stamped with when it was fetched"""
+
+    def __init__(self):
+        self._snapshots: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, getter: str, result: Dict[str, Any],
+            fetched_at: Optional[float] = None):
+        # A failed refresh never replaces the last good snapshot
+        if result.get('status') != 'success':
+            return
+        self._snapshots[getter] = (time.time() if fetched_at is None else fetched_at, result)
+
+    def latest(self, getter: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """(fetched_at, result) of the last good snapshot, however old, without counting a lookup"""
+        return self._snapshots.get(getter)
+
+    def age(self, getter: str) -> Optional[float]:
+        entry = self._snapshots.get(getter)
+        return None if entry is None else max(time.time() - entry[0], 0.0)
+
+    def get(self, getter: str, max_age: float) -> Optional[Dict[str, Any]]:
+        """Snapshot for a getter if it is no older than max_age seconds"""
+        age = self.age(getter)
+        if age is None or age > max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {**self._snapshots[getter][1], 'snapshot_age_seconds': round(age, 3)}
+
+    def clear(self):
+        self._snapshots.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'ages_seconds': {getter: round(self.age(getter), 3) for getter in self._snapshots},
+        }
+
+
+class MetricPrefetcher:
+    """Refreshes the core getters on a fixed interval into a MetricSnapshotStore.
+
+    Given an anomaly detector and its range queries, the same tick also feeds the
+    detector the steps since its last refresh, so questions only read anomalies.
+    """
+
+    def __init__(self, client, store: MetricSnapshotStore,
+                 interval: Optional[float] = None,
+                 getters: Iterable[str] = CORE_GETTERS,
+                 anomaly_detector=None,
+                 anomaly_queries: Optional[Dict[str, str]] = None):
+        self.client = client
+        self.store = store
+        # 0 disables prefetching; questions then always query Prometheus live
+        self.interval = interval if interval is not None else float(os.getenv('METRIC_PREFETCH_INTERVAL', '15'))
+        self.getters = tuple(getters)
+        self.anomaly_detector = anomaly_detector
+        self.anomaly_queries = dict(anomaly_queries or {}) if anomaly_detector is not None else {}
+        self.refreshes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh_once(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Fetch every core getter and anomaly range concurrently and store the successful results"""
+        fetched_at = time.time() if now is None else now
+        fetches = [getattr(self.client, getter)() for getter in self.getters]
+        fetches += [self.anomaly_detector.refresh(self.client, metric, query, now=fetched_at)
+                    for metric, query in self.anomaly_queries.items()]
+        outcomes = await asyncio.gather(*fetches, return_exceptions=True)
+        results, refreshed = outcomes[:len(self.getters)], outcomes[len(self.getters):]
+        for getter, result in zip(self.getters, results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Prefetch of {getter} failed: {result}")
+                continue
+            self.store.put(getter, result, fetched_at)
+        for metric, outcome in zip(self.anomaly_queries, refreshed):
+            if isinstance(outcome, Exception):
+                logger.warning(f"⚠️ Anomaly refresh for {metric} failed: {outcome}")
+        self.refreshes += 1
+        return dict(zip(self.getters, results))
+
+    async def run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.warning(f"⚠️ Metric prefetch failed: {e}")
+            # Fixed cadence: Prometheus load stays constant no matter how slow a refresh was
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self) -> Optional[asyncio.Task]:
+        if self.interval <= 0 or self._task is not None:
+            return self._task
+        logger.info(f"🔄 Prefetching {len(self.getters)} core metrics every {self.interval:g}s")
+        if self.anomaly_queries:
+            logger.info(f"🔄 Refreshing {len(self.anomaly_queries)} anomaly ranges on the same cadence")
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
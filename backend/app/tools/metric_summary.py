@@ -0,0 +1,74 @@
+"""
+Metric Summarization Engine for SRE Tools
+Parses a Prometheus instant-vector result once into NumPy arrays and computes
+every statistic the getters report in a single vectorized pass.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+def _series_name(labels: Dict[str, str]) -> str:
+    """Human-readable identifier for a series"""
+    for label in ('instance', 'service', 'job', 'pod', 'node'):
+        if labels.get(label):
+            return labels[label]
+    return ','.join(f'{k}={v}' for k, v in sorted(labels.items())
+                    if k != '__name__') or labels.get('__name__', 'series')
+
+
+def parse_vector(data: List[Dict[str, Any]]):
+    """Split a vector result into a float array and the matching label sets, dropping NaN/Inf"""
+    raw = []
+    labels = []
+    for item in data:
+        value = item.get('value', ())
+        if len(value) > 1:
+            raw.append(value[1])
+            labels.append(item.get('metric', {}))
+    # String -> float conversion happens in C for the whole batch
+    values = np.asarray(raw, dtype=np.float64)
+    finite = np.isfinite(values)
+    if not finite.all():
+        values = values[finite]
+        labels = [l for l, keep in zip(labels, finite) if keep]
+    return values, labels
+
+
+def summarize_vector(data: List[Dict[str, Any]], top_k: int = 5) -> Dict[str, Any]:
+    """Compute count/avg/min/max/sum/stddev/p50/p95/p99 and the top/bottom-k series of a vector result"""
+    values, labels = parse_vector(data or [])
+    stats: Dict[str, Any] = {'series': len(data or []), 'count': int(values.size)}
+    if not values.size:
+        return stats
+
+    p50, p95, p99 = np.percentile(values, PERCENTILES)
+    stats.update({
+        'avg': float(values.mean()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'sum': float(values.sum()),
+        'stddev': float(values.std()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'nonzero': int(np.count_nonzero(values)),
+    })
+
+    # argpartition keeps this O(n) for the selection; only the k winners get sorted
+    k = min(top_k, values.size)
+    if k:
+        top = np.argpartition(values, values.size - k)[values.size - k:]
+        top = top[np.argsort(values[top])[::-1]]
+        bottom = np.argpartition(values, k - 1)[:k]
+        bottom = bottom[np.argsort(values[bottom])]
+        stats['top'] = [_entry(labels[i], values[i]) for i in top]
+        stats['bottom'] = [_entry(labels[i], values[i]) for i in bottom]
+    return stats
+
+
+def _entry(labels: Dict[str, str], value: float) -> Dict[str, Any]:
+    return {'name': _series_name(labels), 'labels': labels, 'value': float(value)}
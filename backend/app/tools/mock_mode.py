@@ -0,0 +1,45 @@
+"""
+Mock Mode Switch for SRE Tools
+One reading of MOCK_MODE for every backend client, so Prometheus, Loki and
+Alertmanager agree on whether to serve simulated data.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+_ON = ('true', '1', 'yes', 'on')
+_OFF = ('false', '0', 'no', 'off')
+# Older releases read MOCK_MODE backwards: true selected the real backends and
+# false the simulator. These values now mean the opposite of what they used to.
+_FLIPPED = ('true', 'false')
+
+
+def mock_mode_enabled() -> bool:
+    """Whether clients should serve simulated data instead of calling their backends.
+
+    Unset or true/1/yes/on keeps mock mode on, so the demo and the tests run
+    without a Prometheus, Loki or Alertmanager to talk to. false/0/no/off
+    selects the real backends. Any other value raises ValueError rather than
+    guessing which side was meant.
+    """
+    value = os.getenv('MOCK_MODE', 'true').strip().lower()
+    if value in _ON:
+        return True
+    if value in _OFF:
+        return False
+    raise ValueError(f"MOCK_MODE={os.getenv('MOCK_MODE')!r} is not one of {', '.join(_ON + _OFF)}")
+
+
+def log_mock_mode() -> bool:
+    """Log which backends the clients will use; called once at startup"""
+    raw = os.getenv('MOCK_MODE')
+    enabled = mock_mode_enabled()
+    serving = 'simulated data' if enabled else 'the real Prometheus, Loki and Alertmanager'
+    if raw is not None and raw.strip().lower() in _FLIPPED:
+        logger.warning(f"⚠️ MOCK_MODE={raw.strip()}: serving {serving}. Releases before the mock "
+                       f"mode switch read this value the other way round; check it is still what you want")
+    else:
+        logger.info(f"🧪 MOCK_MODE={raw.strip() if raw is not None else 'unset'}: serving {serving}")
+    return enabled
@@ -5,12 +5,18 @@ Provides integration with Prometheus for metrics collection and analysis.
 
 import os
 import logging
-import random
+import threading
 import time
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Callable, Optional
 from dotenv import load_dotenv
 
+from .metric_summary import summarize_vector
+from .mock_mode import mock_mode_enabled
+from .query_cache import QueryCache
+from ..services.circuit_breaker import CircuitOpen
+from ..services.registry import get_circuit_breaker
+
 load_dotenv()
 
 # Set up logging
@@ -21,158 +27,111 @@ logger = logging.getLogger(__name__)
 class PrometheusClient:
     """Client for interacting with Prometheus API"""
     
-    def __init__(self, url: Optional[str] = None):
+    def __init__(self, url: Optional[str] = None,
+                 cache: Optional[QueryCache] = None):
         """Initialize Prometheus client"""
         self.prometheus_url = url or os.getenv('PROMETHEUS_URL', 
                                               'http://localhost:9090')
-        self.mock_mode = os.getenv('MOCK_MODE', 'false').lower() == 'false'
-        
-        if not self.mock_mode:
-            try:
-                # Test connection to Prometheus
-                response = requests.get(f"{self.prometheus_url}/api/v1/status/config", 
-                                      timeout=5)
-                if response.status_code == 200:
-                    logger.info(f"📊 Connected to Prometheus at {self.prometheus_url}")
-                else:
-                    raise Exception(f"HTTP {response.status_code}")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to connect to Prometheus: {e}")
-                logger.info("🎭 Falling back to mock mode")
-                self.mock_mode = True
+        self.mock_mode = mock_mode_enabled()
+        self.cache = cache if cache is not None else QueryCache()
+        # Keep-alive connection reuse across queries
+        self._session = requests.Session()
         
         if self.mock_mode:
             logger.info("🎭 Running in mock mode for Prometheus")
+        else:
+            # Probe in the background so construction never waits on Prometheus
+            threading.Thread(target=self.probe, name="prometheus-probe",
+                             daemon=True).start()
     
-    def _generate_mock_data(self, metric_name: str, 
-                          query: str) -> List[Dict[str, Any]]:
-        """Generate mock data for testing"""
-        mock_data = []
-        current_time = time.time()
-        
-        # Generate mock time series data
-        for i in range(5):
-            timestamp = current_time - (i * 60)  # 1 minute intervals
-            if 'cpu' in metric_name.lower():
-                value = random.uniform(20, 80)
-            elif 'memory' in metric_name.lower():
-                value = random.uniform(40, 90)
-            elif 'disk' in metric_name.lower():
-                value = random.uniform(10, 70)
-            elif 'error' in metric_name.lower():
-                value = random.uniform(0, 5)
-            elif 'request' in metric_name.lower():
-                value = random.uniform(100, 1000)
-            else:
-                value = random.uniform(0, 100)
-                
-            mock_data.append({
-                'metric': {'__name__': metric_name, 'instance': f'localhost:300{i+1}'},
-                'value': [timestamp, str(value)]
-            })
-        
-        return mock_data
-    
-    def query_prometheus(self, query: str) -> Dict[str, Any]:
-        """Execute a PromQL query and return results"""
+    def probe(self) -> bool:
+        """Check that Prometheus answers; if it does not, its circuit opens until a retry succeeds"""
         try:
-            if self.mock_mode:
-                mock_data = self._generate_mock_data(query, query)
-                return {
-                    'status': 'success',
-                    'data': {'result': mock_data},
-                    'query': query,
-                    'mock': True
-                }
-            
-            # Real Prometheus query
-            response = requests.get(
-                f"{self.prometheus_url}/api/v1/query",
-                params={'query': query},
-                timeout=10
-            )
-            
+            # Test connection to Prometheus
+            response = self._session.get(f"{self.prometheus_url}/api/v1/status/config", 
+                                  timeout=5)
             if response.status_code == 200:
-                data = response.json()
-                if data['status'] == 'success':
-                    return {
-                        'status': 'success',
-                        'data': data['data'],
-                        'query': query,
-                        'mock': False
-                    }
-                else:
-                    return {
-                        'status': 'error',
-                        'error': data.get('error', 'Unknown error'),
-                        'query': query
-                    }
-            else:
-                return {
-                    'status': 'error',
-                    'error': f'HTTP {response.status_code}: {response.text}',
-                    'query': query
-                }
-                
+                logger.info(f"📊 Connected to Prometheus at {self.prometheus_url}")
+                self.breaker.record_success()
+                return True
+            raise Exception(f"HTTP {response.status_code}")
         except Exception as e:
-            logger.error(f"Error querying Prometheus: {e}")
+            logger.warning(f"⚠️ Failed to connect to Prometheus: {e}")
+            self.breaker.record_failure(e, trip=True)
+            return False
+    
+    @property
+    def breaker(self):
+        """Circuit breaker shared by every client of Prometheus"""
+        return get_circuit_breaker('prometheus')
+    
+    @property
+    def simulator(self):
+        """Seeded simulator that answers queries in mock mode (shared, built on first use)"""
+        from ..services.registry import get_prometheus_simulator
+        return get_prometheus_simulator()
+    
+    def _mock_response(self, query: str) -> Dict[str, Any]:
+        """Build a mock instant-query response for a PromQL expression"""
+        return {**self.simulator.query(query), 'query': query, 'mock': True}
+    
+    def _mock_range_response(self, query: str, start: float, end: float,
+                             step: float) -> Dict[str, Any]:
+        """Build a mock range-query response for a PromQL expression"""
+        return {**self.simulator.query_range(query, start, end, step),
+                'query': query, 'mock': True}
+    
+    @staticmethod
+    def _parse_response(status_code: int, payload: Optional[Dict[str, Any]],
+                        text: str, query: str) -> Dict[str, Any]:
+        """Turn a raw Prometheus HTTP response into the client result format"""
+        if status_code != 200:
             return {
                 'status': 'error',
-                'error': str(e),
+                'error': f'HTTP {status_code}: {text}',
                 'query': query
             }
-            if 'cpu' in metric_name.lower():
-                value = random.uniform(10, 80)
-            elif 'memory' in metric_name.lower():
-                value = random.uniform(20, 90)
-            elif 'disk' in metric_name.lower():
-                value = random.uniform(30, 70)
-            elif 'up' in metric_name.lower():
-                value = 1.0
-            else:
-                value = random.uniform(1, 100)
-            
-            mock_data.append({
-                'metric': {
-                    'instance': f'localhost:{9000 + i}',
-                    'job': 'mock-service',
-                    '__name__': metric_name
-                },
-                'value': [timestamp, str(value)]
-            })
-        
-        return mock_data
-    
-    def query_prometheus(self, query: str) -> Dict[str, Any]:
-        """Execute a PromQL query and return results"""
-        try:
-            if self.mock_mode:
-                # Extract metric name from query for mock data
-                metric_name = (query.split('(')[0] if '(' in query 
-                             else query.split()[0])
-                mock_data = self._generate_mock_data(metric_name, query)
-                return {
-                    'status': 'success',
-                    'data': {
-                        'resultType': 'vector',
-                        'result': mock_data
-                    },
-                    'query': query,
-                    'mock': True
-                }
-            
-            # Real Prometheus query
-            result = self.prom.custom_query(query=query)
+        if payload and payload.get('status') == 'success':
             return {
                 'status': 'success',
-                'data': {
-                    'resultType': 'vector',
-                    'result': result
-                },
+                'data': payload['data'],
                 'query': query,
                 'mock': False
             }
+        return {
+            'status': 'error',
+            'error': (payload or {}).get('error', 'Unknown error'),
+            'query': query
+        }
+    
+    def query_prometheus(self, query: str) -> Dict[str, Any]:
+        """Execute a PromQL query through the result cache"""
+        return self.cache.get_or_fetch_sync(query, lambda: self._query(query))
+    
+    def _query(self, query: str) -> Dict[str, Any]:
+        """Execute a PromQL query against Prometheus and return results"""
+        try:
+            if self.mock_mode:
+                return self._mock_response(query)
             
+            # Real Prometheus query, unless it is known to be down
+            self.breaker.check()
+            try:
+                response = self._session.get(
+                    f"{self.prometheus_url}/api/v1/query",
+                    params={'query': query},
+                    timeout=10
+                )
+            except Exception as e:
+                self.breaker.record_failure(e)
+                raise
+            self.breaker.record_status(response.status_code)
+            payload = response.json() if response.status_code == 200 else None
+            return self._parse_response(response.status_code, payload,
+                                        response.text, query)
+                
+        except CircuitOpen as e:
+            return {'status': 'error', 'error': str(e), 'query': query, 'circuit_open': True}
         except Exception as e:
             logger.error(f"❌ Error executing query '{query}': {e}")
             return {
@@ -181,227 +140,180 @@ class PrometheusClient:
                 'query': query
             }
     
-    def get_cpu_usage(self, instance: Optional[str] = None) -> Dict[str, Any]:
-        """Get CPU usage metrics"""
+    @staticmethod
+    def _cpu_query(instance: Optional[str] = None) -> str:
+        # Averaged over each node's cores; a bare avg() would collapse the fleet into one series
         if instance:
-            query = ('100 - (avg(rate(node_cpu_seconds_total'
+            return ('100 - (avg by (instance, job) (rate(node_cpu_seconds_total'
                     f'{{mode="idle",instance="{instance}"}}[5m])) * 100)')
-        else:
-            query = ('100 - (avg(rate(node_cpu_seconds_total'
-                    '{mode="idle"}[5m])) * 100)')
-        
-        result = self.query_prometheus(query)
-        
-        if result['status'] == 'success':
-            return {
-                'metric': 'cpu_usage_percentage',
-                'query': query,
-                'data': result['data']['result'],
-                'summary': self._summarize_cpu_data(result['data']['result'])
-            }
-        return result
+        return ('100 - (avg by (instance, job) (rate(node_cpu_seconds_total'
+                '{mode="idle"}[5m])) * 100)')
     
-    def get_memory_usage(self, 
-                        instance: Optional[str] = None) -> Dict[str, Any]:
-        """Get memory usage metrics"""
+    @staticmethod
+    def _memory_query(instance: Optional[str] = None) -> str:
         if instance:
-            query = ('(1 - (node_memory_MemAvailable_bytes'
+            return ('(1 - (node_memory_MemAvailable_bytes'
                     f'{{instance="{instance}"}} / '
                     f'node_memory_MemTotal_bytes{{instance="{instance}"}}))'
                     ' * 100')
-        else:
-            query = ('(1 - (node_memory_MemAvailable_bytes / '
-                    'node_memory_MemTotal_bytes)) * 100')
-        
-        result = self.query_prometheus(query)
-        
-        if result['status'] == 'success':
-            return {
-                'metric': 'memory_usage_percentage',
-                'query': query,
-                'data': result['data']['result'],
-                'summary': self._summarize_memory_data(
-                    result['data']['result'])
-            }
-        return result
+        return ('(1 - (node_memory_MemAvailable_bytes / '
+                'node_memory_MemTotal_bytes)) * 100')
     
-    def get_disk_usage(self, 
-                      instance: Optional[str] = None) -> Dict[str, Any]:
-        """Get disk usage metrics"""
+    @staticmethod
+    def _disk_query(instance: Optional[str] = None) -> str:
         if instance:
-            query = ('100 - ((node_filesystem_avail_bytes'
+            return ('100 - ((node_filesystem_avail_bytes'
                     f'{{instance="{instance}",mountpoint="/"}} / '
                     f'node_filesystem_size_bytes{{instance="{instance}",'
                     'mountpoint="/"}}) * 100)')
-        else:
-            query = ('100 - ((node_filesystem_avail_bytes'
-                    '{mountpoint="/"} / '
-                    'node_filesystem_size_bytes{mountpoint="/"}) * 100)')
-        
-        result = self.query_prometheus(query)
-        
+        return ('100 - ((node_filesystem_avail_bytes'
+                '{mountpoint="/"} / '
+                'node_filesystem_size_bytes{mountpoint="/"}) * 100)')
+    
+    @staticmethod
+    def _health_query(service_name: Optional[str] = None) -> str:
+        if service_name:
+            return f'up{{job="{service_name}"}}'
+        return 'up'
+    
+    @staticmethod
+    def _requests_rate_query(service: Optional[str] = None) -> str:
+        if service:
+            return f'rate(http_requests_total{{service="{service}"}}[5m])'
+        return 'rate(http_requests_total[5m])'
+    
+    @staticmethod
+    def _error_rate_query(service: Optional[str] = None) -> str:
+        if service:
+            return ('rate(http_requests_total'
+                    f'{{service="{service}",status=~"5.."}}[5m]) / '
+                    f'rate(http_requests_total{{service="{service}"}}[5m])'
+                    ' * 100')
+        return ('rate(http_requests_total{status=~"5.."}[5m]) / '
+                'rate(http_requests_total[5m]) * 100')
+    
+    @staticmethod
+    def _metric_result(metric: str, query: str, result: Dict[str, Any],
+                       summarize: Callable[[Dict[str, Any]], str]) -> Dict[str, Any]:
+        """Shape a query result into the getter response format"""
         if result['status'] == 'success':
+            # One vectorized pass feeds both the summary text and the structured stats
+            stats = summarize_vector(result['data']['result'])
             return {
-                'metric': 'disk_usage_percentage',
+                'status': 'success',
+                'metric': metric,
                 'query': query,
                 'data': result['data']['result'],
-                'summary': self._summarize_disk_data(result['data']['result'])
+                'stats': stats,
+                'summary': summarize(stats)
             }
         return result
     
+    def get_cpu_usage(self, instance: Optional[str] = None) -> Dict[str, Any]:
+        """Get CPU usage metrics"""
+        query = self._cpu_query(instance)
+        return self._metric_result('cpu_usage_percentage', query,
+                                   self.query_prometheus(query),
+                                   self._summarize_cpu_data)
+    
+    def get_memory_usage(self, 
+                        instance: Optional[str] = None) -> Dict[str, Any]:
+        """Get memory usage metrics"""
+        query = self._memory_query(instance)
+        return self._metric_result('memory_usage_percentage', query,
+                                   self.query_prometheus(query),
+                                   self._summarize_memory_data)
+    
+    def get_disk_usage(self, 
+                      instance: Optional[str] = None) -> Dict[str, Any]:
+        """Get disk usage metrics"""
+        query = self._disk_query(instance)
+        return self._metric_result('disk_usage_percentage', query,
+                                   self.query_prometheus(query),
+                                   self._summarize_disk_data)
+    
     def get_service_health(self, 
                           service_name: Optional[str] = None) -> Dict[str, Any]:
         """Get service health status"""
-        if service_name:
-            query = f'up{{job="{service_name}"}}'
-        else:
-            query = 'up'
-        
-        result = self.query_prometheus(query)
-        
-        if result['status'] == 'success':
-            return {
-                'metric': 'service_health',
-                'query': query,
-                'data': result['data']['result'],
-                'summary': self._summarize_health_data(
-                    result['data']['result'])
-            }
-        return result
+        query = self._health_query(service_name)
+        return self._metric_result('service_health', query,
+                                   self.query_prometheus(query),
+                                   self._summarize_health_data)
     
     def get_http_requests_rate(self, 
                               service: Optional[str] = None) -> Dict[str, Any]:
         """Get HTTP request rate metrics"""
-        if service:
-            query = f'rate(http_requests_total{{service="{service}"}}[5m])'
-        else:
-            query = 'rate(http_requests_total[5m])'
-        
-        result = self.query_prometheus(query)
-        
-        if result['status'] == 'success':
-            return {
-                'metric': 'http_requests_per_second',
-                'query': query,
-                'data': result['data']['result'],
-                'summary': self._summarize_rate_data(result['data']['result'])
-            }
-        return result
+        query = self._requests_rate_query(service)
+        return self._metric_result('http_requests_per_second', query,
+                                   self.query_prometheus(query),
+                                   self._summarize_rate_data)
     
     def get_error_rate(self, service: Optional[str] = None) -> Dict[str, Any]:
         """Get error rate metrics"""
-        if service:
-            query = ('rate(http_requests_total'
-                    f'{{service="{service}",status=~"5.."}}[5m]) / '
-                    f'rate(http_requests_total{{service="{service}"}}[5m])'
-                    ' * 100')
-        else:
-            query = ('rate(http_requests_total{status=~"5.."}[5m]) / '
-                    'rate(http_requests_total[5m]) * 100')
-        
-        result = self.query_prometheus(query)
-        
-        if result['status'] == 'success':
-            return {
-                'metric': 'error_rate_percentage',
-                'query': query,
-                'data': result['data']['result'],
-                'summary': self._summarize_error_data(result['data']['result'])
-            }
-        return result
+        query = self._error_rate_query(service)
+        return self._metric_result('error_rate_percentage', query,
+                                   self.query_prometheus(query),
+                                   self._summarize_error_data)
     
-    def _summarize_cpu_data(self, data: List[Dict]) -> str:
+    def _summarize_cpu_data(self, stats: Dict[str, Any]) -> str:
         """Summarize CPU usage data"""
-        if not data:
+        if not stats['series']:
             return "No CPU data available"
-        
-        values = [float(item['value'][1]) for item in data 
-                 if len(item['value']) > 1]
-        if not values:
+        if not stats['count']:
             return "No valid CPU values"
         
-        avg_cpu = sum(values) / len(values)
-        max_cpu = max(values)
-        min_cpu = min(values)
-        
-        return (f"CPU Usage - Avg: {avg_cpu:.1f}%, "
-               f"Max: {max_cpu:.1f}%, Min: {min_cpu:.1f}%")
+        return (f"CPU Usage - Avg: {stats['avg']:.1f}%, "
+               f"Max: {stats['max']:.1f}%, Min: {stats['min']:.1f}%")
     
-    def _summarize_memory_data(self, data: List[Dict]) -> str:
+    def _summarize_memory_data(self, stats: Dict[str, Any]) -> str:
         """Summarize memory usage data"""
-        if not data:
+        if not stats['series']:
             return "No memory data available"
-        
-        values = [float(item['value'][1]) for item in data 
-                 if len(item['value']) > 1]
-        if not values:
+        if not stats['count']:
             return "No valid memory values"
         
-        avg_memory = sum(values) / len(values)
-        max_memory = max(values)
-        
-        return (f"Memory Usage - Avg: {avg_memory:.1f}%, "
-               f"Max: {max_memory:.1f}%")
+        return (f"Memory Usage - Avg: {stats['avg']:.1f}%, "
+               f"Max: {stats['max']:.1f}%")
     
-    def _summarize_disk_data(self, data: List[Dict]) -> str:
+    def _summarize_disk_data(self, stats: Dict[str, Any]) -> str:
         """Summarize disk usage data"""
-        if not data:
+        if not stats['series']:
             return "No disk data available"
-        
-        values = [float(item['value'][1]) for item in data 
-                 if len(item['value']) > 1]
-        if not values:
+        if not stats['count']:
             return "No valid disk values"
         
-        avg_disk = sum(values) / len(values)
-        max_disk = max(values)
-        
-        return (f"Disk Usage - Avg: {avg_disk:.1f}%, "
-               f"Max: {max_disk:.1f}%")
+        return (f"Disk Usage - Avg: {stats['avg']:.1f}%, "
+               f"Max: {stats['max']:.1f}%")
     
-    def _summarize_health_data(self, data: List[Dict]) -> str:
+    def _summarize_health_data(self, stats: Dict[str, Any]) -> str:
         """Summarize service health data"""
-        if not data:
+        if not stats['series']:
             return "No health data available"
         
-        up_services = sum(1 for item in data 
-                         if len(item['value']) > 1 and 
-                         float(item['value'][1]) == 1)
-        total_services = len(data)
+        up_services = stats.get('nonzero', 0)
+        total_services = stats['series']
         
         return f"Service Health - {up_services}/{total_services} services up"
     
-    def _summarize_rate_data(self, data: List[Dict]) -> str:
+    def _summarize_rate_data(self, stats: Dict[str, Any]) -> str:
         """Summarize request rate data"""
-        if not data:
+        if not stats['series']:
             return "No request rate data available"
-        
-        values = [float(item['value'][1]) for item in data 
-                 if len(item['value']) > 1]
-        if not values:
+        if not stats['count']:
             return "No valid rate values"
         
-        total_rate = sum(values)
-        avg_rate = total_rate / len(values)
-        
-        return (f"Request Rate - Total: {total_rate:.2f} req/s, "
-               f"Avg: {avg_rate:.2f} req/s")
+        return (f"Request Rate - Total: {stats['sum']:.2f} req/s, "
+               f"Avg: {stats['avg']:.2f} req/s")
     
-    def _summarize_error_data(self, data: List[Dict]) -> str:
+    def _summarize_error_data(self, stats: Dict[str, Any]) -> str:
         """Summarize error rate data"""
-        if not data:
+        if not stats['series']:
             return "No error rate data available"
-        
-        values = [float(item['value'][1]) for item in data 
-                 if len(item['value']) > 1]
-        if not values:
+        if not stats['count']:
             return "Error rate: 0%"
         
-        avg_error_rate = sum(values) / len(values)
-        max_error_rate = max(values)
-        
-        return (f"Error Rate - Avg: {avg_error_rate:.2f}%, "
-               f"Max: {max_error_rate:.2f}%")
+        return (f"Error Rate - Avg: {stats['avg']:.2f}%, "
+               f"Max: {stats['max']:.2f}%")
 
 
 def demo_prometheus_client():
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Prometheus Simulator for SRE Tools
+Seeded, deterministic stand-in for the Prometheus query API. Generates
+realistic per-instance series at any cardinality, replays incident scenarios
+modelled on the k6 scripts in demo-grafana-promethues-forked-edited/testdata,
+and can be served over HTTP with injected latency:
+
+    python -m app.tools.prometheus_simulator --port 9090 --instances 2000 --scenario cpu_spike
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Signal -> how to recognise it in PromQL and how its per-instance values behave.
+# Order matters: the first match wins, so error rate is checked before request rate.
+SIGNALS: Dict[str, Dict[str, Any]] = {
+    'errors': {'match': r'status=~"5|error', 'base': (0.1, 2.0), 'amplitude': 0.3, 'noise': 0.2, 'clip': (0, 100)},
+    'requests': {'match': r'http_requests|request', 'base': (50, 500), 'amplitude': 80, 'noise': 15, 'clip': (0, None)},
+    'cpu': {'match': r'cpu', 'base': (15, 55), 'amplitude': 10, 'noise': 3, 'clip': (0, 100)},
+    'memory': {'match': r'mem', 'base': (35, 75), 'amplitude': 4, 'noise': 1.5, 'clip': (0, 100)},
+    'disk': {'match': r'filesystem|disk', 'base': (20, 70), 'amplitude': 0.5, 'noise': 0.1, 'clip': (0, 100)},
+    'up': {'match': r'\bup\b'},
+    'restarts': {'match': r'process_start_time', 'base': (0, 0), 'amplitude': 0, 'noise': 0, 'clip': (0, None)},
+    'generic': {'match': r'', 'base': (0, 100), 'amplitude': 5, 'noise': 2, 'clip': (None, None)},
+}
+
+# Scenario -> phases, in seconds since the simulator's epoch. A phase either pins a
+# fraction of instances into a value range for one signal, or adds instances.
+# Mirrors testdata/1.cpu-usage.js, 3.add-instances.js and 4.resolve-alerts.js.
+SCENARIOS: Dict[str, List[Dict[str, Any]]] = {
+    'steady': [],
+    'cpu_spike': [
+        {'after': 60, 'until': 600, 'signal': 'cpu', 'instances': 0.1, 'range': (80, 100)},
+        # The spiking instances were just rolled out
+        {'after': 60, 'until': 600, 'signal': 'restarts', 'instances': 0.1, 'range': (1, 1)},
+    ],
+    'add_instances': [
+        {'after': 120, 'add_instances': 1.0},
+        {'after': 120, 'signal': 'cpu', 'instances': 0.34, 'range': (80, 100), 'offset': 0.5},
+        {'after': 120, 'signal': 'cpu', 'instances': 0.33, 'range': (0, 20), 'offset': 0.84},
+    ],
+    'resolved_alerts': [
+        {'until': 300, 'signal': 'cpu', 'instances': 1.0, 'range': (80, 100)},
+        {'after': 300, 'signal': 'cpu', 'instances': 1.0, 'range': (0, 20)},
+    ],
+}
+
+SERVICES = ('frontend', 'backend', 'payment', 'inventory', 'shipping')
+SCRAPE_INTERVAL = 15
+DAY = 86400
+
+_EQUALITY_MATCHER = re.compile(r'\b(instance|job|service)\s*=\s*"([^"]*)"')
+_BARE_SELECTOR = re.compile(r'^([a-zA-Z_:][\w:]*)\s*(\{.*\})?$')
+# Outermost aggregation: `avg by (instance) (...)` or `avg(...) by (instance)`
+_AGGREGATION = re.compile(r'\b(sum|avg|min|max|count)\s*(?:(by|without)\s*\(([^)]*)\)\s*)?\(')
+_GROUPING = re.compile(r'\s*(by|without)\s*\(([^)]*)\)')
+_AGGREGATE = {'sum': np.sum, 'avg': np.mean, 'min': np.min, 'max': np.max, 'count': len}
+
+
+def _aggregation(query: str) -> Optional[Tuple[str, str, List[str]]]:
+    """(operator, 'by'/'without', labels) of the query's first aggregation, if any"""
+    match = _AGGREGATION.search(query)
+    if match is None:
+        return None
+    op, clause, labels = match.groups()
+    if clause is None:
+        # The clause may follow the aggregated expression instead
+        depth, end = 1, match.end()
+        while end < len(query) and depth:
+            depth += {'(': 1, ')': -1}.get(query[end], 0)
+            end += 1
+        postfix = _GROUPING.match(query, end)
+        if postfix:
+            clause, labels = postfix.groups()
+    names = [label.strip() for label in (labels or '').split(',') if label.strip()]
+    return op, clause or 'by', names
+
+
+class PrometheusSimulator:
+    """Deterministic series generator answering instant and range PromQL queries"""
+
+    def __init__(self, seed: int = 42, instances: int = 5, scenario: str = 'steady',
+                 epoch: Optional[float] = None, down_ratio: float = 0.01):
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {scenario!r}; choose from {', '.join(SCENARIOS)}")
+        self.seed = seed
+        self.instances = instances
+        self.scenario = scenario
+        self.epoch = time.time() if epoch is None else epoch
+        self.down_ratio = down_ratio
+        self.max_instances = instances + sum(
+            math.ceil(instances * p.get('add_instances', 0)) for p in SCENARIOS[scenario])
+        self.names = [f'server{i + 1}' for i in range(self.max_instances)]
+        self.jobs = [SERVICES[i % len(SERVICES)] for i in range(self.max_instances)]
+        self._profiles: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @staticmethod
+    def classify(query: str) -> str:
+        lowered = query.lower()
+        for signal, spec in SIGNALS.items():
+            if re.search(spec['match'], lowered):
+                return signal
+        return 'generic'
+
+    def _profile(self, signal: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-instance base level and daily phase, fixed for the simulator's lifetime"""
+        if signal not in self._profiles:
+            rng = np.random.default_rng([self.seed, list(SIGNALS).index(signal)])
+            low, high = SIGNALS[signal]['base']
+            self._profiles[signal] = (rng.uniform(low, high, self.max_instances),
+                                      rng.uniform(0, 2 * math.pi, self.max_instances))
+        return self._profiles[signal]
+
+    def active_instances(self, t: float) -> int:
+        elapsed = t - self.epoch
+        return self.instances + sum(
+            math.ceil(self.instances * phase['add_instances'])
+            for phase in SCENARIOS[self.scenario]
+            if 'add_instances' in phase and self._active(phase, elapsed))
+
+    @staticmethod
+    def _active(phase: Dict[str, Any], elapsed: float) -> bool:
+        return phase.get('after', float('-inf')) <= elapsed < phase.get('until', float('inf'))
+
+    def values(self, signal: str, t: float) -> np.ndarray:
+        """Value of a signal for every active instance at time t; identical for identical inputs"""
+        n = self.active_instances(t)
+        bucket = int(t // SCRAPE_INTERVAL)
+        rng = np.random.default_rng([self.seed, list(SIGNALS).index(signal), bucket])
+
+        if signal == 'up':
+            return (rng.random(n) >= self.down_ratio).astype(np.float64)
+
+        spec = SIGNALS[signal]
+        base, phase = self._profile(signal)
+        values = (base[:n] + spec['amplitude'] * np.sin(2 * math.pi * t / DAY + phase[:n])
+                  + spec['noise'] * rng.standard_normal(n))
+
+        elapsed = t - self.epoch
+        for step in SCENARIOS[self.scenario]:
+            if step.get('signal') != signal or not self._active(step, elapsed):
+                continue
+            first = int(n * step.get('offset', 0))
+            count = min(math.ceil(n * step['instances']), n - first)
+            low, high = step['range']
+            values[first:first + count] = rng.uniform(low, high, count)
+
+        low, high = spec['clip']
+        return np.clip(values, low, high) if low is not None or high is not None else values
+
+    def _series(self, query: str, n: int) -> List[Tuple[int, Dict[str, str]]]:
+        """Indexes and label sets of the series a query selects"""
+        signal = self.classify(query)
+        matchers = dict(_EQUALITY_MATCHER.findall(query))
+        bare = _BARE_SELECTOR.match(query.strip())
+        selected = []
+        for i in range(n):
+            labels = {'instance': self.names[i], 'job': self.jobs[i]}
+            if signal in ('requests', 'errors'):
+                labels['service'] = self.jobs[i]
+            if any(labels.get(k) != v for k, v in matchers.items()):
+                continue
+            if bare:
+                labels = {'__name__': bare.group(1), **labels}
+            selected.append((i, labels))
+        return selected
+
+    def _vector(self, query: str, values: np.ndarray) -> List[Tuple[Dict[str, str], float]]:
+        """(labels, value) per output series; an aggregation yields one series per group"""
+        selected = self._series(query, len(values))
+        aggregation = _aggregation(query)
+        if aggregation is None:
+            return [(labels, float(values[i])) for i, labels in selected]
+        op, clause, names = aggregation
+        groups: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+        for i, labels in selected:
+            if clause == 'by':
+                kept = {k: v for k, v in labels.items() if k in names}
+            else:
+                kept = {k: v for k, v in labels.items() if k not in names and k != '__name__'}
+            groups.setdefault(tuple(sorted(kept.items())), []).append(values[i])
+        return [(dict(key), float(_AGGREGATE[op](members))) for key, members in groups.items()]
+
+    def query(self, query: str, t: Optional[float] = None) -> Dict[str, Any]:
+        """Prometheus /api/v1/query response body for an instant query"""
+        t = time.time() if t is None else t
+        values = self.values(self.classify(query), t)
+        result = [{'metric': labels, 'value': [t, repr(value)]}
+                  for labels, value in self._vector(query, values)]
+        return {'status': 'success', 'data': {'resultType': 'vector', 'result': result}}
+
+    def query_range(self, query: str, start: float, end: float, step: float) -> Dict[str, Any]:
+        """Prometheus /api/v1/query_range response body"""
+        if step <= 0:
+            return {'status': 'error', 'errorType': 'bad_data', 'error': 'step must be positive'}
+        signal = self.classify(query)
+        # Keyed by label set; dicts keep first-seen order, which is instance order
+        samples: Dict[Tuple[Tuple[str, str], ...], List[List[Any]]] = {}
+        t = start
+        while t <= end:
+            for labels, value in self._vector(query, self.values(signal, t)):
+                samples.setdefault(tuple(labels.items()), []).append([t, repr(value)])
+            t += step
+        result = [{'metric': dict(key), 'values': values} for key, values in samples.items()]
+        return {'status': 'success', 'data': {'resultType': 'matrix', 'result': result}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    simulator: PrometheusSimulator
+    latency = 0.0
+    jitter = 0.0
+    error_ratio = 0.0
+    rng = random.Random(0)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._handle(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self._handle(parse_qs(self.rfile.read(length).decode()))
+
+    def _handle(self, raw: Dict[str, List[str]]):
+        path = urlparse(self.path).path
+        params = {k: v[-1] for k, v in raw.items()}
+        if path in ('/-/ready', '/-/healthy'):
+            return self._send(200, b'Prometheus Simulator is Ready.\n', 'text/plain')
+        if path == '/api/v1/status/config':
+            return self._json(200, {'status': 'success', 'data': {'yaml': '# simulator\n'}})
+
+        time.sleep(self.latency + self.jitter * self.rng.random())
+        if self.error_ratio and self.rng.random() < self.error_ratio:
+            return self._json(503, {'status': 'error', 'errorType': 'unavailable', 'error': 'injected failure'})
+        try:
+            if path == '/api/v1/query':
+                t = float(params['time']) if 'time' in params else None
+                return self._json(200, self.simulator.query(params['query'], t))
+            if path == '/api/v1/query_range':
+                return self._json(200, self.simulator.query_range(
+                    params['query'], float(params['start']), float(params['end']), float(params['step'])))
+        except (KeyError, ValueError) as e:
+            return self._json(400, {'status': 'error', 'errorType': 'bad_data', 'error': str(e)})
+        self._json(404, {'status': 'error', 'errorType': 'not_found', 'error': path})
+
+    def _json(self, status: int, payload: Dict[str, Any]):
+        self._send(status, json.dumps(payload).encode(), 'application/json')
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    """HTTP front end for a PrometheusSimulator with injected latency and failures"""
+
+    daemon_threads = True
+    # The stdlib default backlog of 5 turns a burst of connections into 1s SYN retries
+    request_queue_size = 1024
+
+    def __init__(self, simulator: PrometheusSimulator, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, error_ratio: float = 0.0):
+        handler = type('SimulatorHandler', (_Handler,), {
+            'simulator': simulator, 'latency': latency, 'jitter': jitter,
+            'error_ratio': error_ratio, 'rng': random.Random(simulator.seed)})
+        super().__init__((host, port), handler)
+        self.simulator = simulator
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'SimulatorServer':
+        threading.Thread(target=self.serve_forever, name='prometheus-simulator', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def simulator_from_env() -> PrometheusSimulator:
+    """Simulator configured by PROMETHEUS_SIM_* variables; backs mock mode"""
+    return PrometheusSimulator(
+        seed=int(os.getenv('PROMETHEUS_SIM_SEED', '42')),
+        instances=int(os.getenv('PROMETHEUS_SIM_INSTANCES', '5')),
+        scenario=os.getenv('PROMETHEUS_SIM_SCENARIO', 'steady'),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a seeded Prometheus simulator over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9090)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--instances', type=int, default=100)
+    parser.add_argument('--scenario', choices=list(SCENARIOS), default='steady')
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every query")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random delay, up to this many seconds")
+    parser.add_argument('--error-ratio', type=float, default=0.0, help="Fraction of queries answered with HTTP 503")
+    args = parser.parse_args()
+
+    simulator = PrometheusSimulator(args.seed, args.instances, args.scenario)
+    server = SimulatorServer(simulator, args.host, args.port, args.latency, args.jitter, args.error_ratio)
+    print(f"🎭 Prometheus simulator ({args.instances} instances, scenario '{args.scenario}') on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+PromQL Result Cache for SRE Tools
+TTL + LRU cache in front of Prometheus queries with single-flight request
+coalescing, so a burst of identical questions costs one Prometheus round trip.
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+_QUOTED = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')')
+_SPACE_AROUND_PUNCTUATION = re.compile(r'\s*([(){}\[\],=!~<>+\-*/^%])\s*')
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a PromQL expression: insignificant whitespace removed, label values untouched"""
+    parts = _QUOTED.split(query.strip())
+    for i in range(0, len(parts), 2):
+        # Even indexes are outside quotes
+        collapsed = re.sub(r'\s+', ' ', parts[i])
+        parts[i] = _SPACE_AROUND_PUNCTUATION.sub(r'\1', collapsed)
+    return ''.join(parts)
+
+
+class QueryCache:
+    """Bounded TTL cache for query results with in-flight request coalescing"""
+
+    def __init__(self, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None,
+                 bucket_seconds: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('PROMQL_CACHE_TTL', '15'))
+        self.max_entries = (max_entries if max_entries is not None
+                            else int(os.getenv('PROMQL_CACHE_MAX_ENTRIES', '512')))
+        # Width of the evaluation-time bucket; queries evaluated in the same bucket share a result
+        self.bucket_seconds = bucket_seconds or float(os.getenv('PROMQL_CACHE_BUCKET', str(self.ttl or 15)))
+
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+        # The sync path is called from worker threads; the async path stays on one event loop
+        self._sync_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def cacheable(self, result: Dict[str, Any]) -> bool:
+        # Only successful results are worth remembering; errors are retried next time
+        return result.get('status') == 'success'
+
+    def key(self, query: str, eval_time: Optional[float] = None) -> Tuple[str, int]:
+        eval_time = time.time() if eval_time is None else eval_time
+        return normalize_query(query), int(eval_time // self.bucket_seconds)
+
+    def get(self, key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Tuple[str, int], value: Dict[str, Any]):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(self, query: str,
+                           fetch: Callable[[], Awaitable[Dict[str, Any]]],
+                           eval_time: Optional[float] = None) -> Dict[str, Any]:
+        """Return a cached result, join an identical in-flight fetch, or run the fetch"""
+        if self.ttl <= 0:
+            return await fetch()
+
+        key = self.key(query, eval_time)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request we joined was cancelled by its own caller's deadline, not ours
+                return await fetch()
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an un-awaited failure doesn't warn at GC time
+            future.exception()
+            raise
+        else:
+            if self.cacheable(result):
+                self.put(key, result)
+            future.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def get_or_fetch_sync(self, query: str,
+                          fetch: Callable[[], Dict[str, Any]],
+                          eval_time: Optional[float] = None) -> Dict[str, Any]:
+        """Blocking, thread-safe counterpart of get_or_fetch; results are cached but concurrent misses are not coalesced"""
+        if self.ttl <= 0:
+            return fetch()
+
+        key = self.key(query, eval_time)
+        with self._sync_lock:
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        # Fetch outside the lock so one slow query doesn't serialize the others
+        result = fetch()
+        if self.cacheable(result):
+            with self._sync_lock:
+                self.put(key, result)
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'hit_rate': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
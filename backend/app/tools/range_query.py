@@ -0,0 +1,111 @@
+"""
+Range Query Support for SRE Tools
+Step-aligned chunking of long PromQL range queries and a compact columnar
+store the chunks are streamed into.
+"""
+
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)')
+_UNIT_SECONDS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400,
+                 'w': 604800, 'y': 31536000}
+
+
+def parse_duration(value: Union[str, int, float]) -> float:
+    """Convert a Prometheus duration ('90s', '1h30m') or a number of seconds to seconds"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = value.strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(text)
+    if not parts or ''.join(n + u for n, u in parts) != text:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts)
+
+
+def split_range(start: float, end: float, step: float,
+                max_points: int) -> List[Tuple[float, float]]:
+    """Split [start, end] into chunks of at most max_points samples on the step grid.
+
+    Both ends are snapped down to a multiple of step so the same wall-clock
+    window always produces the same chunk boundaries, and consecutive chunks
+    never evaluate the same timestamp twice. Prometheus only evaluates grid
+    points anyway, so the partial step after the last one is not queried.
+    """
+    if step <= 0:
+        raise ValueError("step must be positive")
+    if end < start:
+        raise ValueError("end must not be before start")
+
+    aligned_start = (start // step) * step
+    aligned_end = (end // step) * step
+    chunk_span = step * (max(max_points, 1) - 1)
+    chunks = []
+    chunk_start = aligned_start
+    while chunk_start <= aligned_end:
+        chunk_end = min(chunk_start + chunk_span, aligned_end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + step
+    return chunks
+
+
+class SeriesColumns:
+    """One series stored as parallel float arrays"""
+
+    __slots__ = ('labels', 'timestamps', 'values')
+
+    def __init__(self, labels: Dict[str, str]):
+        self.labels = labels
+        self.timestamps = array('d')
+        self.values = array('d')
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'metric': self.labels,
+            'timestamps': self.timestamps.tolist(),
+            'values': self.values.tolist()
+        }
+
+
+class SeriesMatrix:
+    """Columnar range-query result: timestamps and values per label set"""
+
+    def __init__(self):
+        self.series: Dict[Tuple[Tuple[str, str], ...], SeriesColumns] = {}
+
+    @staticmethod
+    def series_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted(labels.items()))
+
+    def ingest(self, result: Iterable[Dict[str, Any]]):
+        """Append one matrix chunk ([{'metric': ..., 'values': [[ts, "v"], ...]}]) in time order"""
+        for item in result:
+            labels = item.get('metric', {})
+            key = self.series_key(labels)
+            columns = self.series.get(key)
+            if columns is None:
+                columns = self.series[key] = SeriesColumns(labels)
+            samples = item.get('values', ())
+            columns.timestamps.extend(float(ts) for ts, _ in samples)
+            columns.values.extend(float(v) for _, v in samples)
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def __iter__(self):
+        return iter(self.series.values())
+
+    @property
+    def sample_count(self) -> int:
+        return sum(len(columns) for columns in self.series.values())
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        return [columns.to_dict() for columns in self.series.values()]
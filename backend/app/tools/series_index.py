@@ -0,0 +1,148 @@
+"""
+Series Index for SRE Tools
+In-memory index over the latest vector result of each metric, with inverted
+label -> series postings, so the worst offenders on a large fleet can be
+named with partition-based top-K / bottom-K and robust outlier queries.
+Values come from the same vectorized parse as the metric summary.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .metric_summary import _series_name, parse_vector
+
+# Labels with inverted postings; other labels are stored but not indexed
+INDEXED_LABELS = ('instance', 'job', 'service')
+# Robust z-score above which a series counts as an outlier (Iglewicz & Hoaglin)
+OUTLIER_THRESHOLD = 3.5
+
+
+class _MetricSeries:
+    """Columnar snapshot of one metric: a value array, the matching label sets and postings"""
+
+    __slots__ = ('source', 'labels', 'values', 'postings')
+
+    def __init__(self, source: List[Dict[str, Any]]):
+        self.source = source
+        # Same batch parse the summary uses; NaN/Inf series are dropped there
+        self.values, self.labels = parse_vector(source)
+        self.postings: Dict[Tuple[str, str], List[int]] = {}
+        for position, labels in enumerate(self.labels):
+            for label in INDEXED_LABELS:
+                if label in labels:
+                    self.postings.setdefault((label, labels[label]), []).append(position)
+
+
+def _rank(values: np.ndarray, k: int, highest: bool) -> np.ndarray:
+    """Indices of the k highest (or lowest) values in rank order, ties in index order; O(n) selection"""
+    keys = -values if highest else values
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < keys.size:
+        candidates = np.flatnonzero(keys <= np.partition(keys, k - 1)[k - 1])
+    else:
+        candidates = np.arange(keys.size)
+    return candidates[np.argsort(keys[candidates], kind='stable')][:k]
+
+
+class SeriesIndex:
+    """Latest series per metric, queryable by label and by rank"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _MetricSeries] = {}
+        self._lock = threading.Lock()
+
+    def update(self, metric: str, data: List[Dict[str, Any]]) -> bool:
+        """Index a vector result for a metric; returns False if this exact result is already indexed"""
+        current = self._metrics.get(metric)
+        if current is not None and current.source is data:
+            return False
+        series = _MetricSeries(data)
+        with self._lock:
+            self._metrics[metric] = series
+        return True
+
+    def metrics(self) -> List[str]:
+        return list(self._metrics)
+
+    def __len__(self) -> int:
+        return sum(s.values.size for s in self._metrics.values())
+
+    def _select(self, series: _MetricSeries, matchers: Dict[str, str]) -> np.ndarray:
+        """Positions matching every label=value matcher, intersecting the smallest postings first"""
+        if not matchers:
+            return np.arange(series.values.size)
+        postings = sorted((series.postings.get((k, v), []) for k, v in matchers.items()), key=len)
+        if not postings[0]:
+            return np.empty(0, dtype=np.intp)
+        selected: Set[int] = set(postings[0])
+        for positions in postings[1:]:
+            selected.intersection_update(positions)
+        return np.fromiter(sorted(selected), dtype=np.intp, count=len(selected))
+
+    def _entry(self, series: _MetricSeries, position: int, **extra) -> Dict[str, Any]:
+        labels = series.labels[position]
+        return {'name': _series_name(labels), 'labels': labels,
+                'value': float(series.values[position]), **extra}
+
+    def select(self, metric: str, **matchers: str) -> List[Dict[str, Any]]:
+        series = self._metrics.get(metric)
+        if series is None:
+            return []
+        return [self._entry(series, int(p)) for p in self._select(series, matchers)]
+
+    def label_values(self, metric: str, label: str) -> List[str]:
+        """Distinct values of an indexed label for a metric"""
+        series = self._metrics.get(metric)
+        if series is None:
+            return []
+        return sorted(v for (k, v) in series.postings if k == label)
+
+    def _ranked(self, metric: str, k: int, highest: bool, matchers: Dict[str, str]) -> List[Dict[str, Any]]:
+        series = self._metrics.get(metric)
+        if series is None:
+            return []
+        positions = self._select(series, matchers)
+        ranked = _rank(series.values[positions], k, highest)
+        return [self._entry(series, int(positions[i])) for i in ranked]
+
+    def top_k(self, metric: str, k: int = 5, **matchers: str) -> List[Dict[str, Any]]:
+        """The k highest series, highest first"""
+        return self._ranked(metric, k, True, matchers)
+
+    def bottom_k(self, metric: str, k: int = 5, **matchers: str) -> List[Dict[str, Any]]:
+        """The k lowest series, lowest first"""
+        return self._ranked(metric, k, False, matchers)
+
+    def outliers(self, metric: str, threshold: float = OUTLIER_THRESHOLD,
+                 direction: str = 'high', limit: Optional[int] = None,
+                 **matchers: str) -> List[Dict[str, Any]]:
+        """Series whose modified z-score (median/MAD) exceeds the threshold, most extreme first"""
+        series = self._metrics.get(metric)
+        if series is None:
+            return []
+        positions = self._select(series, matchers)
+        if positions.size < 3:
+            return []
+        values = series.values[positions]
+        median = np.median(values)
+        mad = np.median(np.abs(values - median))
+        if mad == 0:
+            return []
+        scores = 0.6745 * (values - median) / mad
+        if direction == 'high':
+            hits = np.flatnonzero(scores > threshold)
+        elif direction == 'low':
+            hits = np.flatnonzero(scores < -threshold)
+        else:
+            hits = np.flatnonzero(np.abs(scores) > threshold)
+        order = hits[np.argsort(-np.abs(scores[hits]))]
+        if limit is not None:
+            order = order[:limit]
+        return [self._entry(series, int(positions[i]), score=round(float(scores[i]), 2)) for i in order]
+
+    def stats(self) -> Dict[str, Any]:
+        return {metric: {'series': int(s.values.size), 'indexed_labels': len(s.postings)}
+                for metric, s in self._metrics.items()}
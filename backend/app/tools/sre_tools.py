@@ -3,218 +3,449 @@ Enhanced SRE Tool Implementation with Prometheus Integration
 Single tool that analyzes questions and provides real metrics from Prometheus.
 """
 
-from typing import Dict, List, Any
+import asyncio
+import os
+import time
+from typing import Dict, List, Any, AsyncIterator, Awaitable, Callable, Optional
+from .anomaly_detector import AnomalyDetector, describe_anomaly
+from .intent_router import IntentRouter, default_router
+from .metric_snapshot import MetricSnapshotStore
 from .prometheus_client import PrometheusClient
-from ..services.llm_service import LLMService
+from .series_index import SeriesIndex
+from ..services.async_runner import run_sync
+from ..services.prompt_builder import CRITICAL, INFO, WARNING, Fact, PromptBuilder, dedupe, truncate
+from ..services.telemetry import ROUTING_SECONDS
+from ..services.tracing import tracer
+from ..services.registry import (get_agent_executor, get_alertmanager_client, get_anomaly_detector,
+                                 get_llm_service, get_loki_client, get_prometheus_client,
+                                 get_series_index, get_snapshot_store)
+
+
+# Metric key -> getter used to fill it, on the client named in METRIC_SOURCES (Prometheus by default)
+METRIC_GETTERS = {
+    'cpu': 'get_cpu_usage',
+    'memory': 'get_memory_usage',
+    'disk': 'get_disk_usage',
+    'health': 'get_service_health',
+    'requests': 'get_http_requests_rate',
+    'errors': 'get_error_rate',
+    'overview': 'get_service_health',
+    'logs': 'analyze_errors',
+    'alerts': 'get_alert_digest',
+}
+METRIC_SOURCES = {
+    'logs': 'loki',
+    'alerts': 'alertmanager',
+}
+# Only Prometheus results go through the snapshot store. Log analyses are read live
+# and the alert digest from the Alertmanager poller's own state, so a snapshot never
+# hides a newly resolved alert or a fresh error burst.
+
+# Intent -> tool summary line, rendered once the planned metrics are in
+INTENT_SUMMARIES = {
+    'cpu': lambda data: f"Retrieved CPU metrics: {data['cpu'].get('summary', 'No CPU data')}",
+    'memory': lambda data: f"Retrieved memory metrics: {data['memory'].get('summary', 'No memory data')}",
+    'disk': lambda data: f"Retrieved disk metrics: {data['disk'].get('summary', 'No disk data')}",
+    'performance': lambda data: "System performance overview: " + ' | '.join([
+        data['cpu'].get('summary', 'No CPU data'),
+        data['memory'].get('summary', 'No memory data'),
+        data['disk'].get('summary', 'No disk data')
+    ]),
+    'health': lambda data: f"Service health status: {data['health'].get('summary', 'No health data')}",
+    'traffic': lambda data: f"HTTP traffic analysis: {data['requests'].get('summary', 'No request data')}",
+    'errors': lambda data: f"Error rate analysis: {data['errors'].get('summary', 'No error data')}",
+    'logs': lambda data: f"Log analysis: {data['logs'].get('summary', 'No log data')}",
+    'alerts': lambda data: f"Alert status: {data['alerts'].get('summary', 'No alert data')}",
+    'deployments': lambda data: "Retrieved deployment history and rollback options",
+    'general': lambda data: f"General SRE analysis: {data['overview'].get('summary', 'System overview completed')}",
+}
+
+
+# Metric key -> (ranking, unit) used to name the worst offenders in its summary
+HOTSPOTS = {
+    'cpu': ('top', '%'),
+    'memory': ('top', '%'),
+    'disk': ('top', '%'),
+    'errors': ('top', '%'),
+    'requests': ('top', ' req/s'),
+    'health': ('down', ''),
+    'overview': ('down', ''),
+}
+HOTSPOT_K = 3
+
+# Metric key -> range query the anomaly detector follows for it
+ANOMALY_QUERIES = {
+    'cpu': PrometheusClient._cpu_query(),
+    'memory': PrometheusClient._memory_query(),
+    'disk': PrometheusClient._disk_query(),
+    'requests': PrometheusClient._requests_rate_query(),
+    'errors': PrometheusClient._error_rate_query(),
+}
+ANOMALIES_IN_SUMMARY = 3
+
+
+SUMMARY_MARKER = "SUMMARY:"
+RECOMMENDATIONS_MARKER = "RECOMMENDATIONS:"
 
 
 class SRETool:
     """Enhanced SRE tool with Prometheus integration for real metrics collection"""
     
-    def __init__(self):
+    def __init__(self, metrics_deadline: Optional[float] = None,
+                 router: Optional[IntentRouter] = None,
+                 snapshots: Optional[MetricSnapshotStore] = None,
+                 max_staleness: Optional[float] = None,
+                 series_index: Optional[SeriesIndex] = None,
+                 anomaly_detector: Optional[AnomalyDetector] = None,
+                 prompt_builder: Optional[PromptBuilder] = None):
         print("🔧 Initializing SRE Tool with Prometheus integration")
-        self.prometheus = PrometheusClient()
-        self.llm_service = LLMService()
+        self.router = router or default_router
+        self.prometheus = get_prometheus_client()
+        self.loki = get_loki_client()
+        self.alertmanager = get_alertmanager_client()
+        self.llm_service = get_llm_service()
+        self.executor = get_agent_executor()
+        self.snapshots = snapshots if snapshots is not None else get_snapshot_store()
+        self.series_index = series_index if series_index is not None else get_series_index()
+        self.anomaly_detector = anomaly_detector if anomaly_detector is not None else get_anomaly_detector()
+        self.prompt_builder = prompt_builder or PromptBuilder("summary")
+        # Per-question budget for metric collection; whatever is slower is reported as timed out
+        self.metrics_deadline = metrics_deadline if metrics_deadline is not None else float(os.getenv('METRICS_DEADLINE_SECONDS', '8'))
+        # Default staleness budget: prefetched snapshots younger than this answer without a live query
+        self.max_staleness = max_staleness if max_staleness is not None else float(os.getenv('METRIC_SNAPSHOT_MAX_AGE', '30'))
+        # Per-backend budget for a health probe; no answer in time counts as down
+        self.health_timeout = float(os.getenv('HEALTH_PROBE_TIMEOUT', '2'))
     
-    def _generate_natural_summary(self, prometheus_data: Dict[str, Any], tools_used: List[str], question: str, tool_summary) -> str:
-        """Generate a natural 2-3 sentence summary using LLama service for conversational tone"""
-        
-        # Prepare context for LLama
-        context_parts = []
-        context_parts.append(f"Original question: {question}")
-        context_parts.append(f"Tools used: {', '.join(tools_used)}")
-        context_parts.append(f"Technical summary: {tool_summary}")
-        
-        # Add metrics data if available
-        if prometheus_data:
-            context_parts.append("Metrics collected:")
-            for metric_type, data in prometheus_data.items():
-                if data.get('status') == 'success':
-                    summary = data.get('summary', 'No summary available')
-                    context_parts.append(f"  • {metric_type}: {summary}")
-                else:
-                    error_msg = data.get('error', 'Unknown error')
-                    context_parts.append(f"  • {metric_type}: Error - {error_msg}")
-        
-        # Create the prompt for LLama
-        llama_prompt = f"""As an expert Site Reliability Engineer, provide a natural, conversational 2-3 sentence summary based on this SRE analysis:
-
-{chr(10).join(context_parts)}
+    def _build_summary_prompt(self, prometheus_data: Dict[str, Any], tools_used: List[str], question: str, tool_summary) -> str:
+        """Build the LLama prompt asking for a conversational summary and recommendations"""
+        # One generation gives both the spoken summary and the recommendations,
+        # so the agent never needs a second round trip for the common case.
+        preamble = f"""As an expert Site Reliability Engineer, provide a natural, conversational summary and concrete recommendations based on this SRE analysis:
 
-Requirements:
+Original question: {truncate(question, self.prompt_builder.budget // 4)}
+Tools used: {', '.join(dedupe(tools_used))}"""
+        instructions = f"""Requirements:
 - Use a friendly, speaking tone like you're talking to a colleague
-- Keep it to 2-3 sentences maximum
-- Include key insights and actionable recommendations
+- Keep the summary to 2-3 sentences maximum
 - Be conversational but professional
 - If there are issues, mention them clearly but reassuringly
 - If everything looks good, be positive and encouraging
+- Give at most 3 short, actionable recommendations
 
-Respond in a natural speaking tone as if you're having a conversation."""
+Respond in exactly this format:
+{SUMMARY_MARKER} <your conversational summary>
+{RECOMMENDATIONS_MARKER}
+- <recommendation>"""
+        prompt = self.prompt_builder.build(preamble, self._prompt_facts(prometheus_data, tool_summary),
+                                           instructions, heading="Findings:")
+        return prompt["text"]
+    
+    @staticmethod
+    def _prompt_facts(prometheus_data: Dict[str, Any], tool_summary: str) -> List[Fact]:
+        """Severity-ranked facts for the prompt: anomalies and failures first, numbers instead of raw series"""
+        if not prometheus_data:
+            return [(INFO, part) for part in (tool_summary or "").split(" | ")]
+        
+        facts: List[Fact] = []
+        for key, data in prometheus_data.items():
+            # Keys that share a getter (health/overview) share a name, so their facts dedupe
+            name = data.get('metric', key)
+            if data.get('status') != 'success':
+                facts.append((WARNING, f"{name}: unavailable - {data.get('error', 'Unknown error')}"))
+                continue
+            facts.extend((CRITICAL, describe_anomaly(a)) for a in data.get('anomalies', []))
+            hotspots = data.get('hotspots', {})
+            if hotspots.get('down'):
+                facts.append((WARNING, f"{name}: down on {', '.join(s['name'] for s in hotspots['down'])}"))
+            for template in data.get('templates', [])[:ANOMALIES_IN_SUMMARY]:
+                facts.append((WARNING, f"{name}: {template['count']}x \"{template['template']}\" "
+                                       f"({', '.join(template['sources']) or 'unknown source'})"))
+            changes = data.get('changes', {})
+            facts.extend((CRITICAL if a['severity'] == 'critical' else WARNING,
+                          f"new alert {a['alertname']} ({a['severity']}) on {a['instance'] or a['service']}")
+                         for a in changes.get('new', []))
+            if changes.get('resolved'):
+                facts.append((INFO, "resolved alerts: " + ", ".join(
+                    f"{a['alertname']} on {a['instance'] or a['service']}" for a in changes['resolved'])))
+            if hotspots.get('outliers'):
+                facts.append((WARNING, f"{name}: outliers " + ", ".join(
+                    f"{s['name']} {s['value']:.1f}" for s in hotspots['outliers'])))
+            
+            stats = data.get('stats') or {}
+            if not stats.get('count'):
+                facts.append((INFO, f"{name}: {data.get('summary', 'no data')}"))
+            elif HOTSPOTS.get(key, ('',))[0] == 'down':
+                facts.append((INFO, f"{name}: {stats['sum']:.0f}/{stats['count']} targets up"))
+            else:
+                top = ", ".join(f"{s['name']} {s['value']:.1f}" for s in hotspots.get('top', []))
+                facts.append((INFO, f"{name}: avg {stats['avg']:.1f}, p95 {stats['p95']:.1f}, "
+                                    f"max {stats['max']:.1f} across {stats['count']} series"
+                                    + (f"; top {top}" if top else "")))
+        return facts
+    
+    @staticmethod
+    def _parse_analysis(text: str) -> Dict[str, Any]:
+        """Split a SUMMARY/RECOMMENDATIONS completion into its two parts"""
+        summary, _, recommendations = text.partition(RECOMMENDATIONS_MARKER)
+        summary = summary.strip()
+        if summary.startswith(SUMMARY_MARKER):
+            summary = summary[len(SUMMARY_MARKER):].strip()
+        return {
+            "natural_summary": summary,
+            "recommendations": [line.strip().lstrip('-*• ').strip()
+                                for line in recommendations.splitlines()
+                                if line.strip().lstrip('-*• ').strip()]
+        }
+    
+    def _generate_analysis(self, prometheus_data: Dict[str, Any], tools_used: List[str], question: str, tool_summary) -> Dict[str, Any]:
+        """Generate the conversational summary and recommendations with a single LLama call"""
+        llama_prompt = self._build_summary_prompt(prometheus_data, tools_used, question, tool_summary)
 
         try:
             # Get natural response from LLama
             llama_response = self.llm_service.ask_llama(llama_prompt)
             
             if llama_response.get('status') == 'success':
-                natural_summary = llama_response.get('response', '').strip()
-                # Ensure it's not too long and sounds conversational
-                if natural_summary and len(natural_summary) > 10:
-                    return natural_summary
+                analysis = self._parse_analysis(llama_response.get('response', ''))
+                # Ensure it's not too short to be a real answer
+                if len(analysis["natural_summary"]) > 10:
+                    return analysis
             
         except Exception as e:
             print(f"⚠️ Error getting LLama response: {e}")
         
         # Fallback to basic summary if LLama fails
+        return {
+            "natural_summary": self._fallback_summary(prometheus_data, tools_used, question),
+            "recommendations": [],
+            "fallback": True
+        }
+    
+    async def astream_analysis(self, prometheus_data: Dict[str, Any], tools_used: List[str], question: str, tool_summary) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the summary section token by token, then yield the parsed analysis.
+
+        Yields {"token": text} while the summary is generated and ends with
+        {"analysis": {...}}. Marker text is never streamed: the tail of the
+        buffer is held back until it cannot be the start of a marker.
+        """
+        llama_prompt = self._build_summary_prompt(prometheus_data, tools_used, question, tool_summary)
+        text = ""
+        emitted = 0
+        try:
+            async for token in self.llm_service.astream_llama(llama_prompt):
+                text += token
+                visible = self._streamable_summary(text)
+                if len(visible) > emitted:
+                    yield {"token": visible[emitted:]}
+                    emitted = len(visible)
+        except Exception as e:
+            print(f"⚠️ Error streaming LLama response: {e}")
+        
+        analysis = self._parse_analysis(text)
+        if not analysis["natural_summary"]:
+            analysis = {
+                "natural_summary": self._fallback_summary(prometheus_data, tools_used, question),
+                "recommendations": []
+            }
+        # Flush whatever the hold-back kept from the summary
+        if analysis["natural_summary"][emitted:]:
+            yield {"token": analysis["natural_summary"][emitted:]}
+        yield {"analysis": analysis}
+    
+    @staticmethod
+    def _streamable_summary(text: str) -> str:
+        """Part of a partial completion that is certainly summary text"""
+        stripped = text.lstrip()
+        if len(stripped) < len(SUMMARY_MARKER) and SUMMARY_MARKER.startswith(stripped):
+            return ""
+        if stripped.startswith(SUMMARY_MARKER):
+            stripped = stripped[len(SUMMARY_MARKER):].lstrip()
+        end = stripped.find(RECOMMENDATIONS_MARKER)
+        if end == -1:
+            end = max(len(stripped) - len(RECOMMENDATIONS_MARKER), 0)
+        return stripped[:end].rstrip() if end < len(stripped) else stripped[:end]
+    
+    def _fallback_summary(self, prometheus_data: Dict[str, Any], tools_used: List[str], question: str) -> str:
+        """Rule-based summary used when LLama is unavailable"""
         if not prometheus_data:
             return f"I've analyzed your question about {question.lower()} using {', '.join(tools_used)}. Everything looks good from what I can see. Let me know if you need more specific details!"
         
-        # Extract key insights for fallback
-        insights = []
-        critical_issues = []
-        
-        for metric_type, data in prometheus_data.items():
-            if data.get('status') == 'success':
-                summary = data.get('summary', '')
-                if 'high' in summary.lower() or 'critical' in summary.lower() or 'error' in summary.lower():
-                    critical_issues.append(f"{metric_type} shows concerning levels")
-                elif 'normal' in summary.lower() or 'healthy' in summary.lower() or 'good' in summary.lower():
-                    insights.append(f"{metric_type} is performing well")
+        # Detected anomalies, then down targets and fleet outliers, decide what is concerning;
+        # the summary text is never searched
+        anomalies = sorted((a for data in prometheus_data.values() for a in data.get('anomalies', [])),
+                           key=lambda a: a['magnitude'], reverse=True)
+        issues = [
+            f"{a['metric']} on {a['series']} is at {a['value']:.1f} against a {a['baseline']:.1f} baseline"
+            for a in anomalies
+        ]
+        for key, data in prometheus_data.items():
+            hotspots = data.get('hotspots', {})
+            if hotspots.get('down'):
+                # health and overview share a getter, so they share this line and dedupe
+                issues.append(f"{data.get('metric', key)} reports {', '.join(s['name'] for s in hotspots['down'])} down")
+            issues.extend(f"{key} on {s['name']} is an outlier at {s['value']:.1f}"
+                          for s in hotspots.get('outliers', []))
+        critical_issues = dedupe(issues)[:ANOMALIES_IN_SUMMARY]
+        insights = [] if any(data.get('status') != 'success' for data in prometheus_data.values()) else [
+            f"{metric_type} is within its normal range" for metric_type in prometheus_data
+        ]
         
         # Build fallback summary
         if critical_issues:
-            return f"I've found some issues that need attention: {', '.join(critical_issues)}. I used {', '.join(tools_used)} to gather this information. I'd recommend investigating these metrics further to prevent any potential problems."
+            return f"I've found some issues that need attention: {'; '.join(critical_issues)}. I used {', '.join(tools_used)} to gather this information. I'd recommend investigating these metrics further to prevent any potential problems."
         elif insights:
             return f"Good news! Your system looks healthy - {', '.join(insights)}. I checked this using {', '.join(tools_used)} and everything appears to be running smoothly. Keep monitoring these metrics to maintain this good performance."
         else:
             return f"I've collected data using {', '.join(tools_used)} to answer your question. The metrics are available but need a closer look to provide specific insights. Feel free to ask for more detailed analysis of any particular metric."
     
-    def execute(self, question: str) -> Dict[str, Any]:
-        """Execute tool based on question and return summary with real metrics"""
-        question_lower = question.lower()
-        tools_used = []
-        prometheus_data = {}
-        
-        # Check if user wants comprehensive analysis or multiple tools
-        comprehensive_keywords = ['overall', 'comprehensive', 'everything', 'all metrics', 'full analysis', 'complete', 'summary']
-        is_comprehensive = any(keyword in question_lower for keyword in comprehensive_keywords)
+    async def _fetch_metrics(self, plan: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]]) -> Dict[str, Any]:
+        """Run the planned metric fetches concurrently and return whatever finished before the deadline"""
+        if not plan:
+            return {}
         
-        if is_comprehensive:
-            # Use multiple tools for comprehensive analysis
-            tools_used.extend(['prometheus', 'metrics_collector', 'performance_analyzer', 'health_checker', 'traffic_monitor', 'error_monitor'])
-            
-            # Get all available metrics
-            cpu_result = self.prometheus.get_cpu_usage()
-            memory_result = self.prometheus.get_memory_usage()
-            disk_result = self.prometheus.get_disk_usage()
-            health_result = self.prometheus.get_service_health()
-            rate_result = self.prometheus.get_http_requests_rate()
-            error_result = self.prometheus.get_error_rate()
-            
-            prometheus_data = {
-                'cpu': cpu_result,
-                'memory': memory_result,
-                'disk': disk_result,
-                'health': health_result,
-                'requests': rate_result,
-                'errors': error_result
-            }
-            
-            tool_summary = "Comprehensive system analysis completed with all monitoring tools"
-            
-        # Individual metric analysis - using if instead of elif to allow multiple conditions
-        tool_summaries = []
-        
-        if any(keyword in question_lower for keyword in ['cpu', 'processor', 'cpu usage']):
-            tools_used.extend(['prometheus', 'cpu_monitor'])
-            cpu_result = self.prometheus.get_cpu_usage()
-            prometheus_data['cpu'] = cpu_result
-            tool_summaries.append(f"Retrieved CPU metrics: {cpu_result.get('summary', 'No CPU data')}")
-        
-        if any(keyword in question_lower for keyword in ['memory', 'ram', 'memory usage']):
-            tools_used.extend(['prometheus', 'memory_monitor'])
-            memory_result = self.prometheus.get_memory_usage()
-            prometheus_data['memory'] = memory_result
-            tool_summaries.append(f"Retrieved memory metrics: {memory_result.get('summary', 'No memory data')}")
+        tasks = {key: asyncio.ensure_future(fetch()) for key, fetch in plan.items()}
+        try:
+            done, not_done = await asyncio.wait(tasks.values(), timeout=self.metrics_deadline)
+        except asyncio.CancelledError:
+            # The request's own deadline fired: stop every outstanding query with it
+            for task in tasks.values():
+                task.cancel()
+            raise
         
-        if any(keyword in question_lower for keyword in ['disk', 'storage', 'disk usage']):
-            tools_used.extend(['prometheus', 'disk_monitor'])
-            disk_result = self.prometheus.get_disk_usage()
-            prometheus_data['disk'] = disk_result
-            tool_summaries.append(f"Retrieved disk metrics: {disk_result.get('summary', 'No disk data')}")
+        results = {}
+        for key, task in tasks.items():
+            if task in done:
+                try:
+                    results[key] = task.result()
+                except Exception as e:
+                    results[key] = {'status': 'error', 'error': str(e)}
+            else:
+                # Don't let a straggler hold up the answer
+                task.cancel()
+                results[key] = {
+                    'status': 'error',
+                    'error': f'Timed out after {self.metrics_deadline:.1f}s',
+                    'timed_out': True
+                }
         
-        if any(keyword in question_lower for keyword in ['metrics', 'performance', 'system performance']) and not is_comprehensive:
-            tools_used.extend(['prometheus', 'metrics_collector', 'performance_analyzer'])
-            # Get comprehensive metrics if not already collected
-            if 'cpu' not in prometheus_data:
-                cpu_result = self.prometheus.get_cpu_usage()
-                prometheus_data['cpu'] = cpu_result
-            if 'memory' not in prometheus_data:
-                memory_result = self.prometheus.get_memory_usage()
-                prometheus_data['memory'] = memory_result
-            if 'disk' not in prometheus_data:
-                disk_result = self.prometheus.get_disk_usage()
-                prometheus_data['disk'] = disk_result
+        if not_done:
+            print(f"⏱️ Metric deadline hit - partial results for: {', '.join(k for k, t in tasks.items() if t in not_done)}")
+        return results
+    
+    def execute(self, question: str, max_staleness: Optional[float] = None) -> Dict[str, Any]:
+        """Synchronous wrapper around aexecute for the CLI and demos"""
+        return run_sync(self.aexecute(question, max_staleness=max_staleness))
+    
+    async def aexecute(self, question: str, route: Optional[Dict[str, Any]] = None,
+                       max_staleness: Optional[float] = None) -> Dict[str, Any]:
+        """Execute tool based on question and return summary with real metrics"""
+        with tracer.span("sre_tool.execute"):
+            result = await self.acollect(question, route, max_staleness)
             
-            summaries = [
-                prometheus_data.get('cpu', {}).get('summary', 'No CPU data'),
-                prometheus_data.get('memory', {}).get('summary', 'No memory data'),
-                prometheus_data.get('disk', {}).get('summary', 'No disk data')
-            ]
-            tool_summaries.append(f"System performance overview: {' | '.join(summaries)}")
-        
-        if any(keyword in question_lower for keyword in ['service', 'health', 'status', 'uptime']):
-            tools_used.extend(['prometheus', 'health_checker'])
-            health_result = self.prometheus.get_service_health()
-            prometheus_data['health'] = health_result
-            tool_summaries.append(f"Service health status: {health_result.get('summary', 'No health data')}")
-        
-        if any(keyword in question_lower for keyword in ['requests', 'traffic', 'load', 'http']):
-            tools_used.extend(['prometheus', 'traffic_monitor'])
-            rate_result = self.prometheus.get_http_requests_rate()
-            prometheus_data['requests'] = rate_result
-            tool_summaries.append(f"HTTP traffic analysis: {rate_result.get('summary', 'No request data')}")
-        
-        if any(keyword in question_lower for keyword in ['error', 'errors', 'failure', 'error rate']):
-            tools_used.extend(['prometheus', 'error_monitor'])
-            error_result = self.prometheus.get_error_rate()
-            prometheus_data['errors'] = error_result
-            tool_summaries.append(f"Error rate analysis: {error_result.get('summary', 'No error data')}")
-        
-        if any(keyword in question_lower for keyword in ['logs', 'debug', 'trace']):
-            tools_used.extend(['loki', 'log_analyzer'])
-            tool_summaries.append("Analyzed application logs and error traces for debugging")
-        
-        if any(keyword in question_lower for keyword in ['alert', 'incident', 'problem', 'issue']):
-            tools_used.extend(['alertmanager', 'incident_tracker'])
-            tool_summaries.append("Checked active alerts and incident status")
+            # Generate natural language summary and recommendations in one LLM call
+            result.update(await self.executor.run_blocking(
+                self._generate_analysis, result.get("prometheus_data", {}),
+                result["tools_used"], question, result["tool_summary"]))
+            return result
+    
+    def route(self, question: str) -> Dict[str, Any]:
+        """Decide which tools and metrics a question needs, without fetching anything"""
+        with tracer.span("sre_tool.route") as span, ROUTING_SECONDS.labels().time():
+            plan = self.router.plan(question)
+            span.set("intents", ",".join(plan["intents"]))
+        return {
+            "tools_used": plan["tools"],
+            "metrics": {metric: METRIC_GETTERS[metric] for metric in plan["metrics"]},
+            "renderers": [INTENT_SUMMARIES[intent] for intent in plan["intents"]
+                          if intent in INTENT_SUMMARIES],
+            "is_comprehensive": "comprehensive" in plan["intents"]
+        }
+    
+    @staticmethod
+    def intent_key(route: Dict[str, Any]) -> tuple:
+        """Normalized intent of a routed question: paraphrases that pick the same tools share it"""
+        return (tuple(sorted(set(route["tools_used"]))),
+                tuple(sorted(route["metrics"])),
+                route["is_comprehensive"])
+    
+    async def _collect_metrics(self, metrics: Dict[str, str],
+                               max_staleness: Optional[float] = None) -> Dict[str, Any]:
+        """Serve each planned metric from a fresh enough snapshot, fetching only the rest live"""
+        max_staleness = self.max_staleness if max_staleness is None else max_staleness
+        prometheus_data = {}
+        live = {}
+        for key, getter in metrics.items():
+            snapshot = self.snapshots.get(getter, max_staleness) if key not in METRIC_SOURCES else None
+            if snapshot is not None:
+                prometheus_data[key] = snapshot
+            else:
+                live[key] = getattr(getattr(self, METRIC_SOURCES.get(key, 'prometheus')), getter)
         
-        if any(keyword in question_lower for keyword in ['deploy', 'rollback', 'release', 'commit']):
-            tools_used.extend(['github', 'deployment_manager'])
-            tool_summaries.append("Retrieved deployment history and rollback options")
+        # Fan out every live fetch at once - wall-clock cost is the slowest query, not the sum
+        with tracer.span("sre_tool.collect", snapshot_hits=len(prometheus_data), live_fetches=len(live)):
+            fetched = await self._fetch_metrics(live)
+        for key, result in fetched.items():
+            if key not in METRIC_SOURCES:
+                self.snapshots.put(metrics[key], result)
+        prometheus_data.update(fetched)
+        # Keep the route's metric order regardless of where each result came from
+        return {key: self._with_hotspots(key, prometheus_data[key]) for key in metrics}
+    
+    def _with_hotspots(self, key: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Index a metric's latest series and name its worst offenders in the summary"""
+        if result.get('status') != 'success' or key not in HOTSPOTS or 'data' not in result:
+            return result
+        self.series_index.update(key, result['data'])
+        ranking, unit = HOTSPOTS[key]
+        if ranking == 'down':
+            down = [s for s in self.series_index.bottom_k(key, HOTSPOT_K) if s['value'] < 1]
+            hotspots = {'down': down}
+            named = f"Down: {', '.join(s['name'] for s in down)}" if down else ""
+        else:
+            top = self.series_index.top_k(key, HOTSPOT_K)
+            outliers = self.series_index.outliers(key, limit=HOTSPOT_K)
+            hotspots = {'top': top, 'outliers': outliers}
+            named = "Top: " + ", ".join(f"{s['name']} {s['value']:.1f}{unit}" for s in top) if top else ""
+            if outliers:
+                named += f" (outliers: {', '.join(s['name'] for s in outliers)})"
+        # A fresh dict so snapshots keep their original summary
+        result = {**result, 'hotspots': hotspots}
+        if named:
+            result['summary'] = f"{result.get('summary', '')} | {named}"
+        return result
+    
+    def _anomalies(self, metrics: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Current anomalies of the planned metrics; the prefetcher keeps the detector's ranges fresh"""
+        return self.anomaly_detector.anomalies([key for key in metrics if key in ANOMALY_QUERIES])
+    
+    async def acollect(self, question: str, route: Optional[Dict[str, Any]] = None,
+                       max_staleness: Optional[float] = None) -> Dict[str, Any]:
+        """Route the question to tools and collect their metrics, without the LLM summary"""
+        route = route or self.route(question)
+        tools_used = route["tools_used"]
         
-        # Default case if no specific keywords matched and not comprehensive
-        if not tool_summaries and not is_comprehensive:
-            tools_used.append('general_analyzer')
-            # Get basic system overview
-            health_result = self.prometheus.get_service_health()
-            prometheus_data['overview'] = health_result
-            tool_summaries.append(f"General SRE analysis: {health_result.get('summary', 'System overview completed')}")
+        prometheus_data = await self._collect_metrics(route["metrics"], max_staleness)
+        anomalies = self._anomalies(route["metrics"])
+        for key in {a['metric'] for a in anomalies}:
+            prometheus_data[key] = {**prometheus_data[key],
+                                    'anomalies': [a for a in anomalies if a['metric'] == key]}
         
         # Combine all tool summaries
-        if is_comprehensive:
+        if route["is_comprehensive"]:
             tool_summary = "Comprehensive system analysis completed with all monitoring tools"
         else:
-            tool_summary = " | ".join(tool_summaries) if tool_summaries else "Analysis completed"
+            rendered = [render(prometheus_data) for render in route["renderers"]]
+            tool_summary = " | ".join(rendered) if rendered else "Analysis completed"
+        if anomalies:
+            tool_summary += " | Anomalies: " + "; ".join(
+                describe_anomaly(a) for a in anomalies[:ANOMALIES_IN_SUMMARY])
         
         print(f"🔍 SRE Tool executed - Tools used: {', '.join(tools_used)}")
         
-        # Generate natural language summary
-        natural_summary = self._generate_natural_summary(prometheus_data, tools_used, question, tool_summary)
-        
         result = {
             "tool_summary": tool_summary,
-            "natural_summary": natural_summary,
-            "tools_used": tools_used
+            "tools_used": tools_used,
+            "anomalies": anomalies
         }
         
         # Add Prometheus data if any was collected
@@ -225,10 +456,55 @@ Respond in a natural speaking tone as if you're having a conversation."""
             result["metrics_collected"] = False
         
         return result
+    
+    def health_check(self) -> Dict[str, Any]:
+        """Synchronous wrapper around ahealth_check for the CLI"""
+        return run_sync(self.ahealth_check())
+    
+    async def ahealth_check(self) -> Dict[str, Any]:
+        """Probe every backend concurrently and report each one with its circuit breaker state"""
+        backends = {'prometheus': self.prometheus, 'loki': self.loki,
+                    'alertmanager': self.alertmanager, 'llama': self.llm_service}
+        started = time.perf_counter()
+        with tracer.span("sre_tool.health_check") as span:
+            results = await asyncio.gather(*(self._probe(client) for client in backends.values()))
+            tools = dict(zip(backends, results))
+            up = sum(tool['status'] == 'up' for tool in tools.values())
+            span.set("up", up)
+        return {
+            'status': 'healthy' if up == len(tools) else 'unhealthy' if up == 0 else 'degraded',
+            'checked_in_ms': round((time.perf_counter() - started) * 1000, 1),
+            'tools': tools
+        }
+    
+    async def _probe(self, client) -> Dict[str, Any]:
+        """One backend's health; a tripped breaker is reported as it is until its next retry is due"""
+        breaker = client.breaker
+        if getattr(client, 'mock_mode', False):
+            return {'status': 'up', 'mock': True, 'circuit': breaker.snapshot()}
+        if not breaker.allow():
+            return {'status': 'skipped', 'error': breaker.last_error, 'circuit': breaker.snapshot()}
+        started = time.perf_counter()
+        try:
+            up = await asyncio.wait_for(client.probe(), self.health_timeout)
+        except asyncio.TimeoutError:
+            breaker.record_failure(f"No answer within {self.health_timeout:g}s", trip=True)
+            up = False
+        return {
+            'status': 'up' if up else 'down',
+            'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            'error': None if up else breaker.last_error,
+            'circuit': breaker.snapshot()
+        }
 
 
 def demo_sre_tool():
     """Demonstrate enhanced SRE Tool functionality with Prometheus"""
+    run_sync(ademo_sre_tool())
+
+
+async def ademo_sre_tool():
+    """Async body of the demo, so the API can run it on its event loop under a deadline"""
     print("🎬 Starting Enhanced SRE Tool Demo with Natural Summaries")
     print("=" * 60)
     
@@ -250,7 +526,7 @@ def demo_sre_tool():
     
     for question in test_questions:
         print(f"\n❓ Question: {question}")
-        result = tool.execute(question)
+        result = await tool.aexecute(question)
         print(f"📊 Technical Summary: {result['tool_summary']}")
         print(f"💬 Natural Summary: {result['natural_summary']}")
         print(f"🔧 Tools used: {', '.join(result['tools_used'])}")
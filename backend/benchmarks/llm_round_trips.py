@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the LLM stage of SREAgent.ask_question.
+
+Compares the default single-generation path with the opt-in insights path,
+using a fake Llama client with a fixed per-call latency and mock Prometheus.
+
+    uv run python -m benchmarks.llm_round_trips --llm-latency 0.5 --iterations 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+# Every LLM call is faked, but the client still insists on a key at construction
+os.environ.setdefault("LLAMA_API_KEY", "benchmark")
+
+from app.agents.sre_agent import SREAgent  # noqa: E402
+from app.services.response_cache import ResponseCache  # noqa: E402
+
+
+def install_fake_llm(agent: SREAgent, latency: float) -> list:
+    """Replace every LLM call with a sleep of `latency` seconds; returns the call log"""
+    calls = []
+
+    def fake_llama(question, *args, **kwargs):
+        calls.append("llama")
+        time.sleep(latency)
+        return {"status": "success",
+                "response": "SUMMARY: All systems nominal right now.\nRECOMMENDATIONS:\n- Keep monitoring"}
+
+    def fake_langgraph(question, *args, **kwargs):
+        calls.append("langgraph")
+        return {"status": "success", "response": "ok"}
+
+    agent.tool.llm_service.ask_llama = fake_llama
+    agent.llm_service.ask_llama = fake_llama
+    agent.llm_service.ask_langgraph = fake_langgraph
+    return calls
+
+
+async def measure(agent: SREAgent, calls: list, question: str,
+                  iterations: int, include_insights: bool) -> dict:
+    latencies = []
+    cached = 0
+    calls.clear()
+    for _ in range(iterations):
+        started = time.perf_counter()
+        answer = await agent.aask_question(question, include_insights=include_insights)
+        latencies.append((time.perf_counter() - started) * 1000)
+        cached += answer["cached"]
+    # A cached answer costs no LLM call and would understate the round trips
+    assert not cached, f"{cached} of {iterations} answers came from the response cache"
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "cache_misses": iterations - cached,
+        "llm_calls_per_question": calls.count("llama") / iterations,
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p95_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 2),
+    }
+
+
+async def main_async(args) -> dict:
+    agent = SREAgent()
+    # Every question must reach the LLM: a TTL of 0 turns the response cache off
+    agent.response_cache = ResponseCache(ttl=0)
+    calls = install_fake_llm(agent, args.llm_latency)
+    return {
+        "llm_latency_s": args.llm_latency,
+        "single_generation": await measure(agent, calls, args.question, args.iterations, False),
+        "with_insights": await measure(agent, calls, args.question, args.iterations, True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--llm-latency", type=float, default=0.5,
+                        help="Seconds each fake Llama call takes (default: 0.5)")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--question", default="What is the CPU usage?")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"⏱️ LLM round-trip benchmark (fake Llama latency {args.llm_latency}s)")
+    for path in ("single_generation", "with_insights"):
+        r = results[path]
+        print(f"  • {path}: {r['llm_calls_per_question']:.0f} LLM call(s)/question "
+              f"({r['cache_misses']}/{r['iterations']} cache misses), "
+              f"mean {r['mean_ms']}ms, p50 {r['p50_ms']}ms, p95 {r['p95_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Load test for the question pipeline.
+
+Replays the question corpus from test_questions.py against SREAgent and the
+FastAPI app, with the Prometheus simulator and a fake Llama server, at one
+or more concurrency levels. Reports p50/p95/p99 latency, throughput and a
+per-stage breakdown, and writes everything to JSON for diffing between commits.
+
+    uv run python -m benchmarks.load_test --clients 1,8,32 --requests 200
+    uv run python -m benchmarks.load_test --baseline benchmarks/results/before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from app.tools.prometheus_simulator import SCENARIOS, PrometheusSimulator, SimulatorServer
+from benchmarks.stubs import FakeLlamaServer
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(p / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+    }
+
+
+def question_corpus() -> List[str]:
+    """Every question in test_questions.test_scenarios, in file order"""
+    from test_questions import test_scenarios
+
+    questions = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for value in node.values():
+                walk(value)
+        else:
+            questions.extend(node)
+
+    walk(test_scenarios)
+    return questions
+
+
+def configure_environment(args, prometheus_url: str, llama_url: str):
+    """Point the app at the stand-ins; must run before the app's shared clients are built"""
+    os.environ["PROMETHEUS_URL"] = prometheus_url
+    os.environ["LLAMA_API_CLIENT_BASE_URL"] = llama_url
+    os.environ.setdefault("LLAMA_API_KEY", "benchmark")
+    # Query the stand-in at PROMETHEUS_URL rather than the in-process simulator
+    os.environ["MOCK_MODE"] = "false"
+    os.environ["AGENT_MAX_WORKERS"] = str(max(args.levels))
+    os.environ["AGENT_MAX_QUEUE"] = str(max(args.levels))
+    if not args.cache:
+        # Measure the pipeline itself, not how well a repeated corpus caches
+        for name in ("PROMQL_CACHE_TTL", "RESPONSE_CACHE_TTL", "METRIC_PREFETCH_INTERVAL",
+                     "METRIC_SNAPSHOT_MAX_AGE"):
+            os.environ[name] = "0"
+
+
+def stage_name(name: str) -> str:
+    # HTTP spans carry the route; everything else is already a stable stage name
+    return name.rsplit(" ", 1)[0] if name.startswith("HTTP ") else name
+
+
+async def run_level(call, questions: List[str], clients: int, requests: int) -> Dict:
+    """Fire `requests` questions from `clients` concurrent workers and aggregate the samples"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(questions[i % len(questions)])
+
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+
+    async def worker():
+        while True:
+            try:
+                question = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            ok, timing = await call(question)
+            elapsed = (time.perf_counter() - started) * 1000
+            if ok is not True:
+                errors[str(ok)] += 1
+                continue
+            latencies.append(elapsed)
+            for stage in timing.get("stages", []):
+                stages[stage_name(stage["name"])].append(stage["duration_ms"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    wall = time.perf_counter() - started
+    return {
+        "clients": clients,
+        "requests": requests,
+        "errors": dict(errors),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency": latency_summary(latencies),
+        "stages": {name: latency_summary(values) for name, values in sorted(stages.items())},
+    }
+
+
+def agent_caller():
+    from app.services.registry import get_sre_agent
+    from app.services.tracing import tracer
+
+    agent = get_sre_agent()
+
+    async def call(question: str):
+        with tracer.span("benchmark.question") as span:
+            answer = await agent.aask_question(question)
+        ok = True if "natural_summary" in answer else "agent_error"
+        return ok, tracer.breakdown(span.trace_id)
+
+    return call, None
+
+
+def app_caller():
+    import httpx
+    from app.main import app
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                               base_url="http://benchmark", timeout=120)
+
+    async def call(question: str):
+        response = await client.post("/sre/ask", json={"question": question},
+                                     headers={"X-SRE-Debug": "1"})
+        if response.status_code != 200:
+            return response.status_code, {}
+        return True, response.json().get("timing", {})
+
+    return call, client.aclose
+
+
+async def run(args) -> Dict:
+    questions = question_corpus()
+    results = {}
+    for target in args.targets:
+        call, close = agent_caller() if target == "agent" else app_caller()
+        try:
+            # One untimed pass warms connection pools and lazily built clients
+            await run_level(call, questions, 1, min(len(questions), 3))
+            results[target] = [await run_level(call, questions, clients, args.requests)
+                               for clients in args.levels]
+        finally:
+            if close:
+                await close()
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: Dict, baseline: Dict):
+    """Print p50/p95/throughput changes against an earlier result file"""
+    print(f"\n📊 Compared with {baseline['meta']['commit']}:")
+    for target, levels in current["results"].items():
+        before = {level["clients"]: level for level in baseline["results"].get(target, [])}
+        for level in levels:
+            old = before.get(level["clients"])
+            if not old:
+                continue
+            deltas = []
+            for key in ("p50_ms", "p95_ms"):
+                if old["latency"][key]:
+                    change = (level["latency"][key] - old["latency"][key]) / old["latency"][key] * 100
+                    deltas.append(f"{key} {change:+.1f}%")
+            if old["throughput_rps"]:
+                change = (level["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] * 100
+                deltas.append(f"throughput {change:+.1f}%")
+            print(f"  • {target} @ {level['clients']} clients: {', '.join(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", default="agent,app",
+                        help="Comma-separated: agent (SREAgent in-process), app (FastAPI /sre/ask)")
+    parser.add_argument("--clients", default="1,8",
+                        help="Comma-separated concurrency levels (default: 1,8)")
+    parser.add_argument("--requests", type=int, default=60, help="Questions per concurrency level")
+    parser.add_argument("--prometheus-latency", type=float, default=0.05,
+                        help="Seconds the Prometheus simulator waits per query (default: 0.05)")
+    parser.add_argument("--prometheus-jitter", type=float, default=0.0,
+                        help="Extra random delay per query, up to this many seconds")
+    parser.add_argument("--instances", type=int, default=10, help="Simulated instances (series per query)")
+    parser.add_argument("--scenario", default="steady", choices=list(SCENARIOS),
+                        help="Simulator scenario (default: steady)")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200)
+    parser.add_argument("--llm-first-token", type=float, default=0.1,
+                        help="Seconds before the fake Llama's first token (default: 0.1)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the query/response caches and snapshot prefetch enabled")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    args = parser.parse_args()
+    args.targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    args.levels = [int(c) for c in args.clients.split(",") if c.strip()]
+
+    simulator = PrometheusSimulator(instances=args.instances, scenario=args.scenario)
+    with SimulatorServer(simulator, latency=args.prometheus_latency, jitter=args.prometheus_jitter) as prometheus, \
+            FakeLlamaServer(args.llm_tokens_per_second, args.llm_first_token) as llama:
+        configure_environment(args, prometheus.url, llama.url)
+        started = time.time()
+        results = asyncio.run(run(args))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": round(started),
+            "python": sys.version.split()[0],
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+            "questions": len(question_corpus()),
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['meta']['commit']}-{report['meta']['timestamp']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    print(f"⏱️ Load test ({report['meta']['questions']} questions, Prometheus {args.prometheus_latency}s, "
+          f"Llama {args.llm_tokens_per_second:g} tok/s)")
+    for target, levels in results.items():
+        for level in levels:
+            lat = level["latency"]
+            print(f"  • {target} @ {level['clients']} clients: {level['throughput_rps']} req/s, "
+                  f"p50 {lat['p50_ms']}ms, p95 {lat['p95_ms']}ms, p99 {lat['p99_ms']}ms"
+                  + (f", errors {level['errors']}" if level["errors"] else ""))
+            for stage, summary in level["stages"].items():
+                print(f"      {stage}: p50 {summary['p50_ms']}ms, p95 {summary['p95_ms']}ms")
+    print(f"💾 Results written to {output}")
+
+    if args.baseline:
+        compare(report, json.loads(Path(args.baseline).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Local HTTP stand-ins for the benchmark harness.
+
+FakeLlamaServer speaks the Llama chat-completions API (plain and SSE
+streaming) at a configurable token rate, on 127.0.0.1 in a background thread,
+so the real SDK client is exercised end to end. Prometheus is stood in for by
+app.tools.prometheus_simulator.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+DEFAULT_COMPLETION = (
+    "SUMMARY: Everything looks healthy right now - CPU, memory and error rates are "
+    "all inside their normal ranges, so there is nothing urgent to chase.\n"
+    "RECOMMENDATIONS:\n"
+    "- Keep an eye on the p95 latency dashboard\n"
+    "- Review alert thresholds after the next release"
+)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The stdlib default backlog of 5 turns a burst of connections into 1s SYN retries
+    request_queue_size = 1024
+
+
+class StubServer:
+    """ThreadingHTTPServer on an ephemeral port, usable as a context manager"""
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self):
+        self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        stub = self
+
+        class Handler(self.handler_class):
+            server_stub = stub
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _LlamaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        stub = self.server_stub
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if urlparse(self.path).path.rstrip('/').split('/')[-1] != 'completions':
+            return self.send_error(404)
+
+        tokens = stub.tokens()
+        time.sleep(stub.time_to_first_token)
+        if body.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for token in tokens:
+                time.sleep(1 / stub.tokens_per_second)
+                self._chunk({'event': {'event_type': 'progress', 'delta': {'type': 'text', 'text': token}}})
+            self._chunk({'event': {'event_type': 'complete', 'delta': {'type': 'text', 'text': ''},
+                                   'stop_reason': 'stop'}})
+            self.wfile.write(b'0\r\n\r\n')
+            return
+
+        time.sleep(len(tokens) / stub.tokens_per_second)
+        payload = json.dumps({
+            'id': 'bench',
+            'completion_message': {'role': 'assistant', 'stop_reason': 'stop',
+                                   'content': {'type': 'text', 'text': ''.join(tokens)}},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _chunk(self, event):
+        data = f"data: {json.dumps(event)}\n\n".encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeLlamaServer(StubServer):
+    """Llama chat-completions API that 'generates' a fixed completion at a token rate"""
+
+    handler_class = _LlamaHandler
+
+    def __init__(self, tokens_per_second: float = 50, time_to_first_token: float = 0.2,
+                 completion: str = DEFAULT_COMPLETION):
+        super().__init__()
+        self.tokens_per_second = tokens_per_second
+        self.time_to_first_token = time_to_first_token
+        self.completion = completion
+
+    def tokens(self):
+        # Whitespace-delimited words stand in for tokens
+        words = self.completion.split(' ')
+        return [w if i == len(words) - 1 else w + ' ' for i, w in enumerate(words)]
@@ -36,6 +36,10 @@ def main():
         help="Trigger incident response workflow. "
              "Usage: --incident 'HighCPU' 'critical'"
     )
+    parser.add_argument(
+        "--insights", action="store_true",
+        help="Also run the deeper LLM insights pass for --question"
+    )
     parser.add_argument(
         "--health", action="store_true",
         help="Get system health report"
@@ -57,8 +61,8 @@ def main():
         # Handle different command types
         if args.demo:
             print("🎬 Running SRE Tools Demo...")
-            from app.tools.sre_tools import demo_sre_tools
-            demo_sre_tools()
+            from app.tools.sre_tools import demo_sre_tool
+            demo_sre_tool()
             return
 
         if args.tools_health:
@@ -78,7 +82,7 @@ def main():
             response = agent.execute_incident_response(alert_name, severity)
         elif args.question:
             print(f"❓ Asking question: {args.question}")
-            response = agent.ask_question(args.question)
+            response = agent.ask_question(args.question, args.insights)
         else:
             parser.print_help()
             return
@@ -0,0 +1,15 @@
+import os
+
+# The Llama client refuses to construct without a key; tests never hit the real API
+os.environ.setdefault("LLAMA_API_KEY", "test-key")
+
+import pytest
+from app.services import registry
+
+
+@pytest.fixture(autouse=True)
+def closed_circuits():
+    """Circuit breakers are shared through the registry; no test inherits another's tripped breaker"""
+    yield
+    for name in [name for name in registry._instances if name.startswith('circuit:')]:
+        registry._instances.pop(name, None)
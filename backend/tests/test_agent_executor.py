@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import registry
+from app.services.agent_executor import AgentExecutor, AgentOverloaded
+from app.services.telemetry import Histogram
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value)
+
+    assert histogram.to_dict()['buckets'] == {'0.1': 1, '1': 3, '+Inf': 4}
+    assert histogram.count == 4
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_retry_after():
+    executor = AgentExecutor(max_workers=1, max_queue=1, deadline=5)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+        return "done"
+
+    running = asyncio.ensure_future(executor.submit(blocked))
+    queued = asyncio.ensure_future(executor.submit(blocked))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(AgentOverloaded) as rejected:
+        await executor.submit(blocked)
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after >= 1
+
+    release.set()
+    assert await asyncio.gather(running, queued) == ["done", "done"]
+    stats = executor.stats()
+    assert stats['rejected'] == 1
+    assert stats['execution_seconds']['count'] == 2
+    assert stats['queue_wait_seconds']['count'] == 2
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_outstanding_work():
+    executor = AgentExecutor(max_workers=2, max_queue=2, deadline=0.1)
+    cancelled = []
+
+    async def slow_fetch():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def work():
+        await asyncio.gather(slow_fetch(), slow_fetch())
+
+    with pytest.raises(AgentOverloaded) as exceeded:
+        await executor.submit(work)
+
+    assert exceeded.value.status_code == 504
+    assert cancelled == [True, True]
+    assert executor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_leave_the_event_loop_free():
+    executor = AgentExecutor(max_workers=1)
+    gate = threading.Event()
+
+    blocking = asyncio.ensure_future(executor.run_blocking(gate.wait, 5))
+    # The loop keeps serving other coroutines while the SDK call blocks a worker thread
+    await asyncio.sleep(0.01)
+    assert not blocking.done()
+    gate.set()
+    assert await blocking is True
+
+
+def test_ask_route_returns_429_when_saturated(monkeypatch):
+    executor = AgentExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setitem(registry._instances, 'agent_executor', executor)
+    executor.active = executor.max_workers
+
+    with TestClient(app) as client:
+        response = client.post("/sre/ask", json={"question": "What is the CPU usage?"})
+        stats = client.get("/sre/executor/stats").json()
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert stats["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_abandons_but_cannot_stop_a_blocking_call():
+    executor = AgentExecutor(max_workers=1, deadline=0.05)
+    gate, finished = threading.Event(), threading.Event()
+
+    def sdk_call():
+        gate.wait(5)
+        finished.set()
+
+    with pytest.raises(AgentOverloaded):
+        await executor.submit(lambda: executor.run_blocking(sdk_call))
+
+    # The slot is free again, but the thread is still inside the call until it returns
+    assert executor.active == 0 and not finished.is_set()
+    gate.set()
+    assert await asyncio.to_thread(finished.wait, 5)
+
+
+def test_demo_route_goes_through_admission_control(monkeypatch):
+    executor = AgentExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setitem(registry._instances, 'agent_executor', executor)
+    executor.active = executor.max_workers
+
+    with TestClient(app) as client:
+        response = client.get("/sre/tools/demo")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_explicit_zero_deadline_is_kept(monkeypatch):
+    monkeypatch.setenv('AGENT_REQUEST_DEADLINE_SECONDS', '30')
+
+    assert AgentExecutor(deadline=0).deadline == 0
+    assert AgentExecutor().deadline == 30
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.tools.alertmanager_client import AlertmanagerClient, AlertSet, _normalize, fingerprint
+from app.tools.metric_snapshot import MetricSnapshotStore
+from app.tools.sre_tools import SRETool
+
+
+def alert(name, instance, severity='critical', state='active'):
+    labels = {'alertname': name, 'instance': instance, 'severity': severity, 'service': 'system'}
+    return {'labels': labels, 'fingerprint': fingerprint(labels), 'status': {'state': state},
+            'annotations': {'summary': name}, 'startsAt': '2024-01-01T00:00:00Z'}
+
+
+class AlertmanagerStub:
+    """Serves whatever is in .alerts on /api/v2/alerts"""
+
+    def __init__(self):
+        self.alerts = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(stub.alerts).encode()
+                self.send_response(200 if self.path.startswith('/api/v2/alerts') else 404)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return 'http://%s:%s' % self.server.server_address[:2]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_apply_reports_new_changed_and_resolved():
+    alerts = AlertSet()
+    first = alerts.apply([_normalize(alert('HighCPUUsage', 'server1')),
+                          _normalize(alert('HighMemoryUsage', 'server2'))], now=100)
+    second = alerts.apply([_normalize(alert('HighCPUUsage', 'server1', state='suppressed')),
+                           _normalize(alert('InstanceDown', 'server3'))], now=200)
+    unchanged = alerts.apply([_normalize(alert('HighCPUUsage', 'server1', state='suppressed')),
+                              _normalize(alert('InstanceDown', 'server3'))], now=300)
+
+    assert len(first['new']) == 2
+    assert [a['alertname'] for a in second['new']] == ['InstanceDown']
+    assert [a['alertname'] for a in second['resolved']] == ['HighMemoryUsage']
+    assert second['changed'][0]['previous'] == {'state': 'active', 'summary': 'HighCPUUsage'}
+    assert not any(unchanged.values())
+    assert alerts.version == 2
+    since = alerts.changes_since(150)
+    assert [len(since[k]) for k in ('new', 'resolved', 'changed')] == [1, 1, 1]
+
+
+def test_storm_diff_only_contains_what_changed():
+    storm = [_normalize(alert('HighCPUUsage', f'server{i}', severity='warning')) for i in range(5000)]
+    alerts = AlertSet()
+    alerts.apply(storm, now=1)
+
+    storm[7] = _normalize(alert('HighCPUUsage', 'server7', severity='warning', state='suppressed'))
+    diff = alerts.apply(storm[:-2], now=2)
+
+    assert [len(diff[k]) for k in ('new', 'resolved', 'changed')] == [0, 2, 1]
+    assert sum(len(v) for v in alerts.changes_since(1).values()) == 3
+
+
+def test_active_set_stays_in_severity_order_without_sorting():
+    alerts = AlertSet()
+    alerts.apply([_normalize(alert('LowMemoryWarning', 'server1', 'warning')),
+                  _normalize(alert('HighCPUUsage', 'server2')),
+                  _normalize(alert('Custom', 'server3', 'page'))], now=1)
+    alerts.apply([_normalize(alert('LowMemoryWarning', 'server1', 'warning', state='suppressed')),
+                  _normalize(alert('HighCPUUsage', 'server2')),
+                  _normalize(alert('Custom', 'server3', 'page')),
+                  _normalize(alert('InstanceDown', 'server4'))], now=2)
+
+    assert [a['alertname'] for a in alerts.active()] == ['HighCPUUsage', 'InstanceDown', 'LowMemoryWarning', 'Custom']
+    assert alerts.active()[2]['state'] == 'suppressed'
+    assert alerts.counts() == {'critical': 2, 'warning': 1, 'page': 1}
+    assert [a['alertname'] for a in alerts.active(limit=1)] == ['HighCPUUsage']
+
+    alerts.apply([_normalize(alert('InstanceDown', 'server4'))], now=3)
+    assert alerts.counts() == {'critical': 1}
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+    assert condition()
+
+
+@pytest.mark.asyncio
+async def test_digest_reads_the_background_pollers_state():
+    stub = AlertmanagerStub()
+    try:
+        client = AlertmanagerClient(url=stub.url, poll_interval=0.05)
+        client.mock_mode = False
+        stub.alerts = [alert('HighCPUUsage', 'server1')]
+        client.start()
+        await wait_for(lambda: client.alert_set.polls >= 1)
+
+        polls = client.alert_set.polls
+        digests = [await client.get_alert_digest() for _ in range(20)]
+        # Questions never poll while the background poller runs
+        assert client.alert_set.polls == polls
+        assert all(d['firing'] == 1 for d in digests)
+
+        stub.alerts = [alert('HighCPUUsage', 'server1'), alert('InstanceDown', 'server2')]
+        await wait_for(lambda: len(client.alert_set.alerts) == 2)
+        latest = await client.get_alert_digest()
+        await client.stop()
+    finally:
+        stub.close()
+
+    assert latest['firing'] == 2 and latest['change_counts']['new'] == 2
+
+
+@pytest.mark.asyncio
+async def test_client_polls_and_digests_deltas():
+    stub = AlertmanagerStub()
+    try:
+        # No background poller and no poll interval: every digest polls on demand
+        client = AlertmanagerClient(url=stub.url, poll_interval=0)
+        client.mock_mode = False
+        stub.alerts = [alert('HighCPUUsage', 'server1'), alert('LowMemoryWarning', 'server2', 'warning')]
+        await client.get_alert_digest()
+        stub.alerts = [alert('HighCPUUsage', 'server1'), alert('HighPaymentErrorRate', 'server4')]
+        digest = await client.get_alert_digest()
+    finally:
+        stub.close()
+
+    assert digest['status'] == 'success'
+    assert digest['firing'] == 2 and digest['by_severity'] == {'critical': 2}
+    assert digest['change_counts'] == {'new': 3, 'resolved': 1, 'changed': 0}
+    assert digest['summary'].startswith("2 firing (2 critical); 3 new")
+    assert "HighPaymentErrorRate on server4" in digest['summary']
+
+
+@pytest.mark.asyncio
+async def test_alerts_intent_reads_alertmanager_through_the_tool():
+    tool = SRETool(snapshots=MetricSnapshotStore(), max_staleness=0)
+    tool.alertmanager = AlertmanagerClient()
+    tool.alertmanager.mock_mode = True
+
+    result = await tool.acollect("Are there any active alerts?")
+
+    assert result['prometheus_data']['alerts']['status'] == 'success'
+    assert result['tool_summary'].startswith("Alert status: ")
+
+
+@pytest.mark.asyncio
+async def test_resolved_alert_shows_up_in_the_next_answer():
+    stub = AlertmanagerStub()
+    try:
+        tool = SRETool(snapshots=MetricSnapshotStore(), max_staleness=30)
+        tool.alertmanager = AlertmanagerClient(url=stub.url, poll_interval=0.05)
+        tool.alertmanager.mock_mode = False
+        stub.alerts = [alert('HighCPUUsage', 'server1'), alert('InstanceDown', 'server2')]
+        tool.alertmanager.start()
+        await wait_for(lambda: len(tool.alertmanager.alert_set.alerts) == 2)
+        first = await tool.acollect("Are there any active alerts?")
+
+        stub.alerts = [alert('HighCPUUsage', 'server1')]
+        await wait_for(lambda: len(tool.alertmanager.alert_set.alerts) == 1)
+        second = await tool.acollect("Are there any active alerts?")
+        await tool.alertmanager.stop()
+    finally:
+        stub.close()
+
+    assert first['prometheus_data']['alerts']['firing'] == 2
+    assert second['prometheus_data']['alerts']['firing'] == 1
+    assert second['prometheus_data']['alerts']['change_counts']['resolved'] == 1
@@ -0,0 +1,126 @@
+import statistics
+import pytest
+from app.tools.anomaly_detector import AnomalyDetector
+from app.tools.metric_snapshot import MetricPrefetcher, MetricSnapshotStore
+from app.tools.prometheus_client import PrometheusClient
+from app.tools.prometheus_simulator import PrometheusSimulator
+from app.tools.range_query import SeriesMatrix
+from app.tools.series_index import SeriesIndex
+from app.tools.sre_tools import ANOMALY_QUERIES, SRETool
+
+EPOCH = 1_700_000_000.0
+CPU = PrometheusClient._cpu_query()
+
+
+def matrix(values, labels=None, start=EPOCH, step=30):
+    m = SeriesMatrix()
+    m.ingest([{'metric': labels or {'instance': 'server1'},
+               'values': [[start + i * step, str(v)] for i, v in enumerate(values)]}])
+    return m
+
+
+class SimulatedRange:
+    """Range-query client answering from the simulator, recording each requested window"""
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.windows = []
+
+    async def query_range(self, query, start, end, step):
+        self.windows.append((start, end))
+        m = SeriesMatrix()
+        m.ingest(self.simulator.query_range(query, start, end, step)['data']['result'])
+        return {'status': 'success', 'series': m}
+
+
+def test_welford_baseline_matches_batch_statistics():
+    values = [40 + (i * 7) % 5 for i in range(40)]
+    detector = AnomalyDetector(lookback=3600, step=30)
+    detector.ingest('cpu', matrix(values))
+
+    state = next(iter(detector._series['cpu'].values()))
+    assert state.mean == pytest.approx(statistics.mean(values))
+    assert state.std == pytest.approx(statistics.stdev(values))
+
+
+def test_spike_is_reported_with_onset_and_cleared_when_it_ends():
+    baseline = [40 + (i * 7) % 5 for i in range(30)]
+    detector = AnomalyDetector(lookback=3600, step=30)
+    detector.ingest('cpu', matrix(baseline + [95, 96]))
+
+    [anomaly] = detector.anomalies()
+    assert anomaly['series'] == 'server1'
+    assert anomaly['onset'] == EPOCH + 30 * 30
+    assert anomaly['direction'] == 'up' and anomaly['value'] == 96
+    assert anomaly['magnitude'] > 10
+
+    detector.ingest('cpu', matrix([41, 42, 40], start=EPOCH + 32 * 30))
+    assert detector.anomalies() == []
+
+
+def test_a_single_outlier_is_not_reported():
+    baseline = [40 + (i * 7) % 5 for i in range(30)]
+    detector = AnomalyDetector(lookback=3600, step=30)
+    detector.ingest('cpu', matrix(baseline + [95, 41]))
+
+    assert detector.anomalies() == []
+
+
+def test_gradual_drift_is_a_level_shift():
+    baseline = [50 + (i % 3) for i in range(20)]
+    drift = [52 + 2 * i for i in range(10)]
+    detector = AnomalyDetector(lookback=3600, step=30)
+    detector.ingest('memory', matrix(baseline + drift))
+
+    [anomaly] = detector.anomalies(['memory'])
+    assert anomaly['kind'] == 'level_shift'
+    assert anomaly['points'] > 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_fetches_new_steps():
+    simulator = PrometheusSimulator(instances=20, scenario='cpu_spike', epoch=EPOCH)
+    client = SimulatedRange(simulator)
+    detector = AnomalyDetector(lookback=1800, step=30)
+
+    first = await detector.refresh(client, 'cpu', CPU, now=EPOCH)
+    assert await detector.refresh(client, 'cpu', CPU, now=EPOCH + 10) == 0
+    second = await detector.refresh(client, 'cpu', CPU, now=EPOCH + 150)
+
+    assert first == 20 * 61
+    assert second == 20 * 5
+    assert client.windows[-1][0] == EPOCH + 30
+    spiking = {a['series'] for a in detector.anomalies()}
+    assert spiking == {'server1', 'server2'}
+
+
+@pytest.mark.asyncio
+async def test_anomalies_feed_the_tool_and_fallback_summaries():
+    now = EPOCH + 150
+    simulator = PrometheusSimulator(instances=20, scenario='cpu_spike', epoch=EPOCH)
+
+    class SpikingPrometheus(SimulatedRange):
+        async def get_cpu_usage(self):
+            data = simulator.query(CPU, now)['data']['result']
+            return {'status': 'success', 'metric': 'cpu_usage_percentage', 'data': data,
+                    'summary': 'CPU Usage - Avg: 50.0%'}
+
+    detector = AnomalyDetector(lookback=1800, step=30)
+    tool = SRETool(snapshots=MetricSnapshotStore(), max_staleness=0, series_index=SeriesIndex(),
+                   anomaly_detector=detector)
+    tool.prometheus = SpikingPrometheus(simulator)
+
+    # Questions only read anomalies; the range refresh happens on the prefetcher's tick
+    result = await tool.acollect("What's the CPU usage?")
+    assert result['anomalies'] == [] and tool.prometheus.windows == []
+
+    prefetcher = MetricPrefetcher(tool.prometheus, MetricSnapshotStore(), interval=0, getters=(),
+                                  anomaly_detector=detector, anomaly_queries=ANOMALY_QUERIES)
+    await prefetcher.refresh_once(now=now)
+    result = await tool.acollect("What's the CPU usage?")
+
+    assert len(tool.prometheus.windows) == len(ANOMALY_QUERIES)
+    assert {a['series'] for a in result['anomalies']} == {'server1', 'server2'}
+    assert 'Anomalies: cpu' in result['tool_summary']
+    fallback = tool._fallback_summary(result['prometheus_data'], result['tools_used'], "cpu?")
+    assert fallback.startswith("I've found some issues") and 'server' in fallback
@@ -0,0 +1,94 @@
+import httpx
+import pytest
+from app.tools import async_prometheus_client, http_pool
+from app.tools.async_prometheus_client import AsyncPrometheusClient
+
+
+def prometheus_transport(handler_log: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        handler_log.append(request)
+        return httpx.Response(200, json={
+            'status': 'success',
+            'data': {'resultType': 'vector', 'result': [
+                {'metric': {'instance': 'node-1'}, 'value': [1700000000, '42.5']},
+                {'metric': {'instance': 'node-2'}, 'value': [1700000000, '57.5']},
+            ]}
+        })
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    requests_seen = []
+    transport = prometheus_transport(requests_seen)
+    real_client = httpx.AsyncClient
+
+    def pooled_client(**kwargs):
+        kwargs.pop('http2', None)
+        return real_client(transport=transport, **kwargs)
+
+    monkeypatch.setattr(async_prometheus_client.httpx, "AsyncClient", pooled_client)
+    prom = AsyncPrometheusClient(url="http://prometheus.test:9090", max_concurrency=2)
+    prom.mock_mode = False
+    prom.requests_seen = requests_seen
+    return prom
+
+
+@pytest.mark.asyncio
+async def test_getter_queries_prometheus_and_summarizes(client):
+    result = await client.get_cpu_usage()
+
+    assert result['status'] == 'success'
+    assert result['summary'] == "CPU Usage - Avg: 50.0%, Max: 57.5%, Min: 42.5%"
+    assert client.requests_seen[0].url.path == '/api/v1/query'
+
+
+@pytest.mark.asyncio
+async def test_clients_share_one_pool_per_url(client):
+    other = AsyncPrometheusClient(url="http://prometheus.test:9090")
+
+    assert client.http is other.http
+
+    await http_pool.close_http_clients()
+    assert client.http is not None
+
+
+@pytest.mark.asyncio
+async def test_http_error_is_reported_not_raised(monkeypatch):
+    transport = httpx.MockTransport(lambda request: httpx.Response(503, text="overloaded"))
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(async_prometheus_client.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=transport, base_url=kwargs['base_url']))
+    prom = AsyncPrometheusClient(url="http://unhealthy.test:9090")
+    prom.mock_mode = False
+
+    result = await prom.query_prometheus('up')
+
+    assert result['status'] == 'error'
+    assert 'HTTP 503' in result['error']
+
+
+@pytest.mark.asyncio
+async def test_query_many_dedupes_identical_queries(client):
+    results = await client.query_many({
+        'cpu': 'rate(node_cpu_seconds_total[5m])',
+        'cpu_again': 'rate( node_cpu_seconds_total[5m] )',
+        'up': 'up',
+    })
+
+    assert set(results) == {'cpu', 'cpu_again', 'up'}
+    assert len(client.requests_seen) == 2
+    assert results['cpu_again']['query'] == 'rate( node_cpu_seconds_total[5m] )'
+    assert results['up']['stats']['avg'] == 50.0
+    assert 'duration_ms' in results['cpu']
+
+
+def test_explicit_zero_settings_are_kept(monkeypatch):
+    monkeypatch.setenv('PROMETHEUS_TIMEOUT', '10')
+    monkeypatch.setenv('PROMETHEUS_MAX_CONCURRENCY', '16')
+
+    client = AsyncPrometheusClient(timeout=0, connect_timeout=0, max_concurrency=0)
+
+    assert client.timeout.read == 0 and client.timeout.connect == 0
+    assert client.max_concurrency == 0
+    assert AsyncPrometheusClient().timeout.read == 10
@@ -0,0 +1,99 @@
+import time
+import httpx
+import pytest
+from app.services import registry
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from app.tools import async_prometheus_client
+from app.tools.async_prometheus_client import AsyncPrometheusClient
+from app.tools.sre_tools import SRETool
+
+
+@pytest.fixture
+def prometheus_down(monkeypatch):
+    """A Prometheus answering 503 to everything, behind a breaker that trips after two failures"""
+    requests_seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        return httpx.Response(503, text="overloaded")
+
+    transport = httpx.MockTransport(handler)
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(async_prometheus_client.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=transport, base_url=kwargs['base_url']))
+    monkeypatch.setitem(registry._instances, 'circuit:prometheus',
+                        CircuitBreaker('prometheus', failure_threshold=2, backoff=60))
+    prom = AsyncPrometheusClient(url="http://down.test:9090")
+    prom.mock_mode = False
+    prom.requests_seen = requests_seen
+    return prom
+
+
+def test_breaker_lets_one_trial_through_and_doubles_its_backoff():
+    breaker = CircuitBreaker('test', failure_threshold=2, backoff=0.05, max_backoff=0.15)
+    breaker.record_failure('boom')
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure('boom')
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure('still down')
+    assert breaker.state == OPEN and breaker.backoff == 0.1
+
+    time.sleep(0.11)
+    assert breaker.allow()
+    breaker.record_failure('still down')
+    assert breaker.backoff == 0.15
+
+    time.sleep(0.16)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.backoff == 0.05 and breaker.trips == 3
+
+
+@pytest.mark.asyncio
+async def test_tripped_backend_is_skipped_without_a_request(prometheus_down):
+    for query in ('up', 'up == 0'):
+        result = await prometheus_down.query_prometheus(query)
+        assert 'HTTP 503' in result['error']
+
+    started = time.perf_counter()
+    result = await prometheus_down.query_prometheus('node_load1')
+
+    assert result['circuit_open'] is True
+    assert 'circuit open' in result['error']
+    assert len(prometheus_down.requests_seen) == 2
+    assert time.perf_counter() - started < 0.1
+
+
+@pytest.mark.asyncio
+async def test_health_check_probes_concurrently_and_reports_breakers(prometheus_down, monkeypatch):
+    monkeypatch.setitem(registry._instances, 'prometheus', prometheus_down)
+    tool = SRETool()
+    for client in (tool.loki, tool.alertmanager):
+        monkeypatch.setattr(client, 'mock_mode', True)
+
+    async def llama_up():
+        tool.llm_service.breaker.record_success()
+        return True
+
+    monkeypatch.setattr(tool.llm_service, 'probe', llama_up)
+
+    health = await tool.ahealth_check()
+
+    assert health['status'] == 'degraded'
+    prometheus = health['tools']['prometheus']
+    assert prometheus['status'] == 'down'
+    assert prometheus['circuit']['state'] == OPEN
+    assert 'HTTP 503' in prometheus['error']
+    assert health['tools']['loki']['status'] == 'up' and health['tools']['loki']['mock'] is True
+    assert health['tools']['llama']['status'] == 'up'
+
+    # Until its backoff has passed, a tripped backend is reported without being probed
+    again = await tool.ahealth_check()
+    assert again['tools']['prometheus']['status'] == 'skipped'
+    assert len(prometheus_down.requests_seen) == 1
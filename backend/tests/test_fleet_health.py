@@ -0,0 +1,106 @@
+import statistics
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import registry
+from app.tools.async_prometheus_client import AsyncPrometheusClient
+from app.tools.fleet_health import FleetHealth
+from app.tools.metric_snapshot import MetricSnapshotStore
+from app.tools.prometheus_simulator import PrometheusSimulator
+from app.tools.series_index import SeriesIndex
+
+
+class CountingClient:
+    """Mock-mode Prometheus client that counts getter calls"""
+
+    def __init__(self):
+        self.client = AsyncPrometheusClient()
+        self.client.mock_mode = True
+        self.calls = []
+
+    def __getattr__(self, getter):
+        async def call():
+            self.calls.append(getter)
+            return await getattr(self.client, getter)()
+        return call
+
+
+@pytest.fixture
+def spiking(monkeypatch):
+    # 20 instances two minutes into a CPU spike; one in ten targets down
+    simulator = PrometheusSimulator(instances=20, scenario='cpu_spike', epoch=time.time() - 120, down_ratio=0.1)
+    monkeypatch.setitem(registry._instances, 'prometheus_simulator', simulator)
+    return simulator
+
+
+@pytest.mark.asyncio
+async def test_report_has_services_and_top_offenders(spiking):
+    health = FleetHealth(CountingClient(), MetricSnapshotStore(), SeriesIndex(), interval=0)
+
+    report = await health.current()
+
+    assert report['status'] == 'critical'
+    assert report['sections']['cpu']['status'] == 'critical'
+    assert set(report['services']) == {'frontend', 'backend', 'payment', 'inventory', 'shipping'}
+    assert sum(s['total'] for s in report['services'].values()) == 20
+    assert report['top_offenders'][0]['status'] == 'critical'
+    assert {'server1', 'server2'} <= {o['name'] for o in report['top_offenders'] if o['metric'] == 'cpu'}
+    assert report['summary'].startswith("Fleet critical: ")
+
+
+@pytest.mark.asyncio
+async def test_only_changed_sections_are_rebuilt(spiking):
+    client = CountingClient()
+    store = MetricSnapshotStore()
+    health = FleetHealth(client, store, SeriesIndex(), interval=0)
+
+    assert await health.refresh() is True
+    etag, version = health.etag, health.version
+    assert len(client.calls) == 6 and health.rebuilt == 6
+
+    # Everything is still fresh in the snapshot store: nothing refetched, nothing rebuilt
+    assert await health.refresh() is False
+    assert (len(client.calls), health.rebuilt, health.etag) == (6, 6, etag)
+
+    cpu = store.latest('get_cpu_usage')[1]
+    store.put('get_cpu_usage', {**cpu, 'stats': {**cpu['stats'], 'max': 12.0}, 'summary': 'CPU calm'})
+    assert await health.refresh() is True
+    assert health.rebuilt == 7
+    assert health.version == version + 1 and health.etag != etag
+    assert health.report['sections']['cpu']['summary'] == 'CPU calm'
+
+
+def test_health_route_serves_etag_and_304(spiking):
+    with TestClient(app) as client:
+        first = client.get("/sre/health")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.json()["response"]["version"] >= 1
+
+        timings = []
+        for _ in range(50):
+            started = time.perf_counter()
+            response = client.get("/sre/health", headers={"If-None-Match": etag})
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 304
+            assert response.content == b""
+        assert client.get("/sre/health", headers={"If-None-Match": '"0-stale"'}).status_code == 200
+    assert statistics.median(timings) < 0.010
+
+
+def test_health_route_rebuilds_on_demand_without_a_refresher(spiking, monkeypatch):
+    store = MetricSnapshotStore()
+    health = FleetHealth(CountingClient(), store, SeriesIndex(), interval=0)
+    monkeypatch.setattr(registry.get_sre_agent(), 'fleet_health', health)
+    # No lifespan, so nothing refreshes the report in the background
+    client = TestClient(app)
+    etag = client.get("/sre/health").headers["etag"]
+
+    cpu = store.latest('get_cpu_usage')[1]
+    store.put('get_cpu_usage', {**cpu, 'stats': {**cpu['stats'], 'max': 12.0}, 'summary': 'CPU calm'})
+    response = client.get("/sre/health", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["response"]["sections"]["cpu"]["summary"] == 'CPU calm'
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import re
+import time
+import pytest
+from app.agents.incident_response import IncidentResponder, playbook
+from app.agents.sre_agent import SREAgent
+from app.services import registry
+from app.tools.alertmanager_client import _normalize
+from app.tools.intent_router import default_router
+from app.tools.prometheus_simulator import PrometheusSimulator
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    # Two minutes into a CPU spike: server1 and server2 are hot and were just restarted
+    simulator = PrometheusSimulator(instances=20, scenario='cpu_spike', epoch=time.time() - 120)
+    monkeypatch.setitem(registry._instances, 'prometheus_simulator', simulator)
+    agent = SREAgent()
+    for client in (agent.tool.prometheus, agent.tool.loki, agent.tool.alertmanager):
+        monkeypatch.setattr(client, 'mock_mode', True)
+    agent.tool.prometheus.cache.clear()
+    agent.incidents = IncidentResponder(agent.tool)
+
+    def fake_llama(question, *args, **kwargs):
+        return {"status": "success",
+                "response": "SUMMARY: server1 and server2 spiked right after a rollout.\nRECOMMENDATIONS:\n- Roll back"}
+
+    monkeypatch.setattr(agent.tool.llm_service, "ask_llama", fake_llama)
+    return agent
+
+
+def test_alert_names_map_to_metrics():
+    assert playbook('HighCPUUsage', default_router) == ['cpu', 'requests']
+    assert playbook('NewHighCPUUsageCustom', default_router) == ['cpu']
+    assert playbook('Watchdog', default_router) == ['overview']
+
+
+@pytest.mark.asyncio
+async def test_incident_response_triages_before_the_summary(agent):
+    events = [event async for event in agent.astream_incident_response('HighCPUUsage', 'critical')]
+
+    names = [event['event'] for event in events]
+    assert names.index('triage') < names.index('done')
+    assert [e['data']['step'] for e in events if e['event'] == 'step_started'][-1] == 'summary'
+
+    report = events[-1]['data']
+    assert report['status'] == 'success'
+    assert report['firing_on'][:2] == ['server1', 'server2']
+    assert {s['instance'] for s in report['suspects']} >= {'server1', 'server2'}
+    assert "likely a rollout" in report['triage']
+    assert report['natural_summary'] == "server1 and server2 spiked right after a rollout."
+    assert report['recommendations'] == ["Roll back"]
+    assert report['first_triage_ms'] < 2000
+    assert set(report['findings']) == {'alerts', 'metrics', 'anomalies', 'logs', 'restarts'}
+
+
+@pytest.mark.asyncio
+async def test_a_hung_backend_only_degrades_its_step(agent, monkeypatch):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(30)
+
+    monkeypatch.setattr(agent.tool.loki, 'analyze_errors', hang)
+    agent.incidents.step_timeout = 0.2
+
+    report = await agent.aexecute_incident_response('HighCPUUsage', 'critical')
+
+    assert report['status'] == 'partial'
+    assert report['steps']['logs']['status'] == 'timed_out'
+    assert report['steps']['triage']['status'] == 'success'
+    assert "logs: Error - Timed out" in report['triage']
+    assert report['duration_ms'] < 5000
+
+
+def test_log_query_matches_service_names_literally(agent):
+    services = ['api.v2', 'pay(ments)', 'odd"name']
+    agent.tool.alertmanager.alert_set.apply([
+        _normalize({'labels': {'alertname': 'HighErrorRate', 'service_name': name, 'instance': f'server{i}'},
+                    'fingerprint': name, 'status': {'state': 'active'}})
+        for i, name in enumerate(services)])
+
+    query = agent.incidents._log_query('HighErrorRate')
+
+    selector = query.split(' | service_name=~', 1)[1]
+    pattern = json.loads(selector)
+    assert all(re.fullmatch(pattern, name) for name in services)
+    assert not re.fullmatch(pattern, 'apixv2')
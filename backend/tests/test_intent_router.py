@@ -0,0 +1,55 @@
+import pytest
+from app.tools.intent_router import IntentRouter, default_router
+
+
+def test_whole_word_matching_avoids_substring_collisions():
+    assert default_router.match("Why is the download slow?") == []
+    assert default_router.match("What's the current traffic load?") == ['traffic']
+    assert 'health' not in default_router.match("Is the backup job set up?")
+
+
+def test_plurals_and_phrases_match():
+    assert default_router.match("Show me current failures") == ['errors']
+    assert default_router.match("Are all services running?") == ['health']
+    assert default_router.match("Check request volume") == ['traffic']
+    assert default_router.match("What are the current metrics?") == ['performance']
+
+
+@pytest.mark.parametrize("question, intent", [
+    ("Any alerting right now?", 'alerts'),
+    ("help me debugging the payment failures", 'logs'),
+    ("what got deployed today", 'deployments'),
+    ("Is the checkout service logging anything?", 'logs'),
+    ("Which commit was released last?", 'deployments'),
+    ("Who committed the last change?", 'deployments'),
+    ("Were any incidents traced back to the cache?", 'alerts'),
+])
+def test_inflected_keywords_match(question, intent):
+    assert intent in default_router.match(question)
+
+
+def test_intents_are_deduplicated_in_table_order():
+    assert default_router.match("Errors? CPU usage and cpu load, then more errors") == ['cpu', 'traffic', 'errors']
+
+
+def test_comprehensive_suppresses_performance():
+    plan = default_router.plan("Give me a comprehensive performance analysis")
+
+    assert plan['intents'] == ['comprehensive']
+    assert plan['metrics'] == ['cpu', 'memory', 'disk', 'health', 'requests', 'errors']
+
+
+def test_plan_deduplicates_tools_and_falls_back_to_general():
+    plan = default_router.plan("How is the processor performance?")
+    assert plan['tools'].count('prometheus') == 1
+    assert plan['metrics'] == ['cpu', 'memory', 'disk']
+
+    assert default_router.plan("What is SRE?") == {
+        'intents': ['general'], 'tools': ['general_analyzer'], 'metrics': ['overview']}
+
+
+def test_router_compiles_custom_tables():
+    router = IntentRouter({f"intent_{i}": {'keywords': [f"word{i}"], 'tools': [f"tool{i}"], 'metrics': []}
+                           for i in range(500)})
+
+    assert router.match("only word42 and word7 here") == ['intent_7', 'intent_42']
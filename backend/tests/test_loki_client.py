@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from app.tools.log_templates import LogTemplateMiner
+from app.tools.loki_client import LokiClient
+from app.tools.metric_snapshot import MetricSnapshotStore
+from app.tools.sre_tools import SRETool
+
+NOW_NS = 1_700_000_000 * 10**9
+
+
+class LokiStub:
+    """query_range over fixed streams: inclusive start, forward direction, limit per page"""
+
+    def __init__(self, streams, slow_after=None, delay=0.0):
+        self.streams = streams
+        self.pages = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                stub.pages += 1
+                if slow_after is not None and stub.pages > slow_after:
+                    time.sleep(delay)
+                start, end, limit = int(params['start']), int(params['end']), int(params['limit'])
+                entries = sorted((ts, i, line) for i, (_, values) in enumerate(stub.streams)
+                                 for ts, line in values if start <= ts <= end)[:limit]
+                result = [{'stream': labels, 'values': [[str(ts), line] for ts, j, line in entries if j == i]}
+                          for i, (labels, _) in enumerate(stub.streams)]
+                body = json.dumps({'status': 'success', 'data': {'resultType': 'streams', 'result': result}}).encode()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return 'http://%s:%s' % self.server.server_address[:2]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_client(url, **kwargs):
+    client = LokiClient(url=url, **kwargs)
+    client.mock_mode = False
+    return client
+
+
+@pytest.mark.asyncio
+async def test_paging_yields_every_line_once_across_timestamp_ties():
+    # Three lines share each timestamp, so page boundaries fall inside ties
+    payment = [(NOW_NS + (i // 3) * 10**9, f"payment line {i}") for i in range(50)]
+    checkout = [(NOW_NS + (i // 3) * 10**9, f"checkout line {i}") for i in range(40)]
+    stub = LokiStub([({'service_name': 'payment'}, payment), ({'service_name': 'checkout'}, checkout)])
+    try:
+        client = make_client(stub.url, page_limit=7)
+        lines = [entry async for entry in client.stream_logs('{job="x"}', NOW_NS / 1e9, NOW_NS / 1e9 + 60)]
+    finally:
+        stub.close()
+
+    assert len(lines) == 90
+    assert len({line for _, _, line in lines}) == 90
+    assert [ts for ts, _, _ in lines] == sorted(ts for ts, _, _ in lines)
+    assert stub.pages >= 90 // 7
+
+
+@pytest.mark.asyncio
+async def test_error_templates_are_counted_with_first_and_last_seen():
+    values = []
+    for i in range(300):
+        ts = NOW_NS - (300 - i) * 10**9
+        if i % 3 == 0:
+            values.append((ts, f"Payment gateway timeout after {1000 + i}ms for order {i}"))
+        elif i % 3 == 1:
+            values.append((ts, f"Database connection refused: 10.0.0.{i % 250}:5432"))
+        elif i < 30:
+            values.append((ts, f"Inventory check failed for product sku{i}"))
+    stub = LokiStub([({'service_name': 'payment', 'detected_level': 'error'}, values)])
+    try:
+        client = make_client(stub.url, page_limit=50)
+        client.lookback = 10**9
+        result = await client.analyze_errors()
+    finally:
+        stub.close()
+
+    assert result['status'] == 'success'
+    assert result['lines'] == 210
+    top = result['templates']
+    assert top[0]['template'] == "Payment gateway timeout after <NUM> for order <NUM>"
+    assert top[0]['count'] == 100
+    assert top[0]['first_seen'] == (NOW_NS - 300 * 10**9) / 1e9
+    assert top[1]['template'] == "Database connection refused: <IP>"
+    assert top[2]['template'] == "Inventory check failed for product <*>"
+    assert top[0]['sources'] == {'payment': 100}
+    assert '100x Payment gateway timeout' in result['summary']
+
+
+@pytest.mark.asyncio
+async def test_slow_page_is_cut_off_at_the_time_budget():
+    values = [(NOW_NS - (100 - i) * 10**9, f"Request {i} failed: upstream connect error") for i in range(100)]
+    stub = LokiStub([({'service_name': 'frontend'}, values)], slow_after=1, delay=2)
+    try:
+        client = make_client(stub.url, page_limit=20)
+        client.lookback = 10**9
+        started = time.perf_counter()
+        result = await client.analyze_errors(time_budget=0.3)
+        elapsed = time.perf_counter() - started
+    finally:
+        stub.close()
+
+    assert elapsed < 1
+    assert result['status'] == 'success'
+    assert result['truncated'] is True
+    assert result['lines'] == 20
+
+
+def test_miner_memory_is_bounded_by_max_clusters():
+    miner = LogTemplateMiner(max_clusters=20)
+    for i in range(5000):
+        miner.add(f"{'abcdefghij'[i % 10]}word{'klmnopqrst'[i // 10 % 10]} failure kind{chr(65 + i % 26)}", i)
+
+    assert len(miner) <= 20
+    assert miner.lines == 5000
+    assert miner.evicted > 0
+
+
+@pytest.mark.asyncio
+async def test_logs_intent_reads_loki_through_the_tool():
+    tool = SRETool(snapshots=MetricSnapshotStore(), max_staleness=0)
+    tool.loki = LokiClient(time_budget=5)
+    tool.loki.mock_mode = True
+
+    result = await tool.acollect("What do the logs show?")
+
+    logs = result['prometheus_data']['logs']
+    assert logs['status'] == 'success' and logs['lines'] > 0
+    assert result['tool_summary'].startswith("Log analysis: ")
+    assert "error lines in" in result['tool_summary']
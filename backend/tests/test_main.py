@@ -17,5 +17,7 @@ def test_root_route(client):
 def test_sre_ask_route(client):
     response = client.post("/sre/ask", json={"question": "What is SRE?"})
     assert response.status_code == 200
-    assert "response" in response.json()  # Adjust based on actual response structure
-    assert isinstance(response.json()["response"], str)  # Ensure the response is a string
\ No newline at end of file
+    assert "response" in response.json()
+    answer = response.json()["response"]
+    assert isinstance(answer["natural_summary"], str)
+    assert isinstance(answer["recommendations"], list)
\ No newline at end of file
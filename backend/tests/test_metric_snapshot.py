@@ -0,0 +1,93 @@
+import asyncio
+import time
+import pytest
+from app.tools.metric_snapshot import CORE_GETTERS, MetricPrefetcher, MetricSnapshotStore
+from app.tools.sre_tools import SRETool
+
+
+class CountingPrometheus:
+    """Stand-in client that records every getter call"""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = []
+
+    def __getattr__(self, getter):
+        async def fetch():
+            self.calls.append(getter)
+            await asyncio.sleep(self.delay)
+            return {'status': 'success', 'metric': getter, 'data': [], 'summary': f"{getter} live"}
+        return fetch
+
+
+def test_store_respects_max_age_and_keeps_last_good_result():
+    store = MetricSnapshotStore()
+    store.put('get_cpu_usage', {'status': 'success', 'summary': 'ok'}, fetched_at=time.time() - 20)
+    store.put('get_cpu_usage', {'status': 'error', 'error': 'boom'})
+
+    assert store.get('get_cpu_usage', max_age=30)['summary'] == 'ok'
+    assert store.get('get_cpu_usage', max_age=10) is None
+    assert store.get('get_disk_usage', max_age=30) is None
+    assert store.stats()['hits'] == 1
+    assert store.stats()['misses'] == 2
+
+
+@pytest.mark.asyncio
+async def test_prefetcher_refreshes_core_getters_on_interval():
+    client = CountingPrometheus()
+    store = MetricSnapshotStore()
+    prefetcher = MetricPrefetcher(client, store, interval=0.05)
+
+    prefetcher.start()
+    await asyncio.sleep(0.12)
+    await prefetcher.stop()
+
+    assert prefetcher.refreshes >= 2
+    assert set(client.calls) == set(CORE_GETTERS)
+    assert all(store.age(getter) is not None for getter in CORE_GETTERS)
+
+
+@pytest.mark.asyncio
+async def test_fresh_snapshot_answers_without_querying_prometheus():
+    store = MetricSnapshotStore()
+    await MetricPrefetcher(CountingPrometheus(), store, interval=0).refresh_once()
+    tool = SRETool(snapshots=store, max_staleness=30)
+    tool.prometheus = CountingPrometheus(delay=1)
+
+    started = time.perf_counter()
+    result = await tool.acollect("Give me a comprehensive system analysis")
+
+    assert time.perf_counter() - started < 0.5
+    assert tool.prometheus.calls == []
+    assert result["prometheus_data"]["cpu"]["summary"] == "get_cpu_usage live"
+    assert "snapshot_age_seconds" in result["prometheus_data"]["cpu"]
+
+
+@pytest.mark.asyncio
+async def test_staleness_budget_forces_live_query_for_old_snapshots():
+    store = MetricSnapshotStore()
+    store.put('get_cpu_usage', {'status': 'success', 'summary': 'old'}, fetched_at=time.time() - 60)
+    tool = SRETool(snapshots=store, max_staleness=30)
+    tool.prometheus = CountingPrometheus()
+
+    result = await tool.acollect("What is the CPU usage?", max_staleness=0)
+
+    assert tool.prometheus.calls == ['get_cpu_usage']
+    assert result["prometheus_data"]["cpu"]["summary"] == "get_cpu_usage live"
+    # The live result refreshes the snapshot for the next question
+    assert store.get('get_cpu_usage', max_age=5)["summary"] == "get_cpu_usage live"
+
+
+@pytest.mark.asyncio
+async def test_log_analysis_is_never_served_from_or_written_to_snapshots():
+    store = MetricSnapshotStore()
+    store.put('analyze_errors', {'status': 'success', 'summary': 'old'})
+    tool = SRETool(snapshots=store, max_staleness=30)
+    tool.loki = CountingPrometheus()
+
+    result = await tool.acollect("What do the logs show?")
+    await tool.acollect("What do the logs show?")
+
+    assert tool.loki.calls == ['analyze_errors', 'analyze_errors']
+    assert result["prometheus_data"]["logs"]["summary"] == "analyze_errors live"
+    assert store.get('analyze_errors', max_age=30)["summary"] == "old"
@@ -0,0 +1,42 @@
+import numpy as np
+from app.tools.metric_summary import summarize_vector
+from app.tools.prometheus_client import PrometheusClient
+
+
+def vector(values):
+    return [{'metric': {'instance': f'node-{i}'}, 'value': [1700000000, v]}
+            for i, v in enumerate(values)]
+
+
+def test_summarize_vector_single_pass_stats():
+    stats = summarize_vector(vector([str(v) for v in range(1, 101)]), top_k=3)
+
+    assert stats['count'] == 100
+    assert stats['avg'] == 50.5
+    assert stats['min'] == 1 and stats['max'] == 100
+    assert stats['p50'] == np.percentile(np.arange(1, 101), 50)
+    assert round(stats['p99'], 2) == 99.01
+    assert [t['name'] for t in stats['top']] == ['node-99', 'node-98', 'node-97']
+    assert [b['value'] for b in stats['bottom']] == [1.0, 2.0, 3.0]
+
+
+def test_summarize_vector_drops_non_finite_values():
+    stats = summarize_vector(vector(['NaN', '+Inf', '10', '20']))
+
+    assert stats['series'] == 4
+    assert stats['count'] == 2
+    assert stats['avg'] == 15
+
+
+def test_summarize_vector_empty():
+    assert summarize_vector([]) == {'series': 0, 'count': 0}
+
+
+def test_getter_summaries_use_shared_stats():
+    client = PrometheusClient.__new__(PrometheusClient)
+    result = client._metric_result('service_health', 'up',
+                                   {'status': 'success', 'data': {'result': vector(['1', '0', '1'])}},
+                                   client._summarize_health_data)
+
+    assert result['summary'] == "Service Health - 2/3 services up"
+    assert result['stats']['bottom'][0]['name'] == 'node-1'
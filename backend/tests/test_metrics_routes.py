@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_batch_metrics_route(client):
+    response = client.post("/sre/metrics/batch", json={"queries": {
+        "cpu": "node_cpu_seconds_total",
+        "cpu_dup": "node_cpu_seconds_total",
+        "memory": "node_memory_MemAvailable_bytes",
+    }})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["results"]) == {"cpu", "cpu_dup", "memory"}
+    assert body["unique_queries"] == 2
+    assert body["results"]["cpu"]["status"] == "success"
+    assert "stats" in body["results"]["memory"]
+
+
+def test_batch_metrics_route_requires_queries(client):
+    response = client.post("/sre/metrics/batch", json={"queries": {}})
+    assert response.status_code == 422
+
+
+def test_cache_stats_route(client):
+    response = client.get("/sre/cache/stats")
+    assert response.status_code == 200
+    assert "hits" in response.json()["query_cache"]
+
+
+def test_hotspots_route_bounds_k(client):
+    assert client.get("/sre/hotspots", params={"k": 0}).status_code == 422
+    assert client.get("/sre/hotspots", params={"k": 10_000}).status_code == 422
@@ -0,0 +1,153 @@
+import pytest
+from app.tools.async_prometheus_client import AsyncPrometheusClient
+from app.tools.mock_mode import log_mock_mode, mock_mode_enabled
+from app.tools.prometheus_client import PrometheusClient
+from app.tools.prometheus_simulator import PrometheusSimulator, SimulatorServer
+
+EPOCH = 1_700_000_000.0
+CPU = PrometheusClient._cpu_query()
+
+
+def cpu_values(simulator, t):
+    return [float(s['value'][1]) for s in simulator.query(CPU, t)['data']['result']]
+
+
+def test_same_seed_and_time_give_identical_series():
+    a = PrometheusSimulator(seed=3, instances=50, epoch=EPOCH)
+    b = PrometheusSimulator(seed=3, instances=50, epoch=EPOCH)
+    c = PrometheusSimulator(seed=4, instances=50, epoch=EPOCH)
+
+    assert a.query(CPU, EPOCH + 30) == b.query(CPU, EPOCH + 30)
+    assert a.query(CPU, EPOCH + 30) != c.query(CPU, EPOCH + 30)
+
+
+def test_getter_queries_map_to_realistic_signals_at_high_cardinality():
+    simulator = PrometheusSimulator(instances=2000, epoch=EPOCH)
+
+    cpu = cpu_values(simulator, EPOCH)
+    up = simulator.query(PrometheusClient._health_query(), EPOCH)['data']['result']
+    errors = simulator.query(PrometheusClient._error_rate_query(), EPOCH)['data']['result']
+
+    assert len(cpu) == 2000 and all(0 <= v <= 100 for v in cpu)
+    assert {s['value'][1] for s in up} <= {'1.0', '0.0'}
+    assert up[0]['metric']['__name__'] == 'up'
+    assert max(float(s['value'][1]) for s in errors) < 10
+
+
+def test_label_matchers_select_series():
+    simulator = PrometheusSimulator(instances=20, epoch=EPOCH)
+
+    one = simulator.query(PrometheusClient._cpu_query('server7'), EPOCH)['data']['result']
+    payment = simulator.query(PrometheusClient._health_query('payment'), EPOCH)['data']['result']
+
+    assert [s['metric']['instance'] for s in one] == ['server7']
+    assert len(payment) == 4 and all(s['metric']['job'] == 'payment' for s in payment)
+
+
+def test_aggregations_collapse_like_prometheus():
+    simulator = PrometheusSimulator(instances=20, epoch=EPOCH)
+    per_instance = cpu_values(simulator, EPOCH)
+
+    bare = simulator.query('100 - (avg(rate(node_cpu_seconds_total{mode="idle"}[5m])) * 100)',
+                           EPOCH)['data']['result']
+    assert len(bare) == 1 and bare[0]['metric'] == {}
+    assert float(bare[0]['value'][1]) == pytest.approx(sum(per_instance) / len(per_instance))
+
+    by_job = simulator.query('avg by (job) (rate(node_cpu_seconds_total{mode="idle"}[5m]))',
+                             EPOCH)['data']['result']
+    postfix = simulator.query('avg(rate(node_cpu_seconds_total{mode="idle"}[5m])) by (job)',
+                              EPOCH)['data']['result']
+    assert len(by_job) == 5 and all(set(s['metric']) == {'job'} for s in by_job)
+    assert postfix == by_job
+
+    count = simulator.query('count without (instance) (up)', EPOCH)['data']['result']
+    assert sum(float(s['value'][1]) for s in count) == 20
+    assert all('instance' not in s['metric'] and '__name__' not in s['metric'] for s in count)
+
+    over_time = simulator.query_range('max(up)', EPOCH, EPOCH + 120, 60)['data']['result']
+    assert len(over_time) == 1 and len(over_time[0]['values']) == 3
+
+
+def test_scenarios_follow_the_k6_scripts():
+    spike = PrometheusSimulator(instances=100, scenario='cpu_spike', epoch=EPOCH)
+    assert sum(v >= 80 for v in cpu_values(spike, EPOCH + 120)) >= 10
+
+    resolved = PrometheusSimulator(instances=30, scenario='resolved_alerts', epoch=EPOCH)
+    assert min(cpu_values(resolved, EPOCH + 10)) >= 80
+    assert max(cpu_values(resolved, EPOCH + 400)) <= 20
+
+    grown = PrometheusSimulator(instances=30, scenario='add_instances', epoch=EPOCH)
+    assert len(cpu_values(grown, EPOCH + 10)) == 30
+    assert len(cpu_values(grown, EPOCH + 200)) == 60
+
+
+def test_range_query_steps_through_the_scenario():
+    simulator = PrometheusSimulator(instances=3, scenario='resolved_alerts', epoch=EPOCH)
+
+    result = simulator.query_range(CPU, EPOCH, EPOCH + 600, 60)['data']['result']
+
+    assert len(result) == 3
+    values = [float(v) for _, v in result[0]['values']]
+    assert len(values) == 11
+    assert values[0] >= 80 and values[-1] <= 20
+
+
+@pytest.mark.asyncio
+async def test_async_client_queries_the_simulator_over_http():
+    simulator = PrometheusSimulator(instances=25, epoch=EPOCH)
+    with SimulatorServer(simulator, latency=0.01) as server:
+        prom = AsyncPrometheusClient(url=server.url)
+        prom.mock_mode = False
+
+        assert await prom.probe() is True
+        cpu = await prom.get_cpu_usage()
+        matrix = await prom.query_range('up', start=EPOCH, end=EPOCH + 300, step='1m')
+
+    assert cpu['status'] == 'success'
+    assert cpu['stats']['count'] == 25
+    assert len(matrix['series']) == 25
+
+
+def test_mock_mode_is_backed_by_the_simulator():
+    client = PrometheusClient()
+    client.mock_mode = True
+
+    first = client.query_prometheus('up')
+    assert first['mock'] is True
+    assert first['data']['result'][0]['metric']['instance'] == 'server1'
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, True), ('true', True), ('1', True), (' Yes ', True),
+    ('false', False), ('OFF', False), (' no ', False), ('0', False),
+])
+def test_mock_mode_setting(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv('MOCK_MODE', raising=False)
+    else:
+        monkeypatch.setenv('MOCK_MODE', value)
+
+    assert mock_mode_enabled() is expected
+
+
+@pytest.mark.parametrize('value', ['', 'real', 'simulated', 'enabled'])
+def test_unrecognised_mock_mode_fails_loudly(monkeypatch, value):
+    monkeypatch.setenv('MOCK_MODE', value)
+
+    with pytest.raises(ValueError, match='MOCK_MODE'):
+        mock_mode_enabled()
+
+
+@pytest.mark.parametrize('value, warns', [('true', True), ('false', True), ('off', False), (None, False)])
+def test_startup_log_shows_the_resolved_mode(monkeypatch, caplog, value, warns):
+    if value is None:
+        monkeypatch.delenv('MOCK_MODE', raising=False)
+    else:
+        monkeypatch.setenv('MOCK_MODE', value)
+
+    with caplog.at_level('INFO', logger='app.tools.mock_mode'):
+        enabled = log_mock_mode()
+
+    [record] = caplog.records
+    assert (record.levelname == 'WARNING') is warns
+    assert ('simulated data' if enabled else 'real Prometheus') in record.getMessage()
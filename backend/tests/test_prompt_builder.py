@@ -0,0 +1,61 @@
+from app.services.llm_service import LLMService
+from app.services.prompt_builder import CRITICAL, DETAIL, INFO, WARNING, PromptBuilder, estimate_tokens
+from app.services.telemetry import LLM_PROMPT_TOKENS
+from app.tools.metric_summary import summarize_vector
+from app.tools.sre_tools import SRETool
+
+
+def test_facts_are_deduped_ranked_and_truncated_deterministically():
+    builder = PromptBuilder("test", budget=50)
+    facts = [(INFO, "cpu: avg 41.0"), (DETAIL, "summary restating everything " * 5),
+             (CRITICAL, "cpu spike on server12"), (INFO, "cpu: avg 41.0"), (WARNING, "up: down on server3")]
+
+    first = builder.build("Question: how is the fleet?", facts)
+    second = builder.build("Question: how is the fleet?", list(facts))
+
+    assert first == second
+    lines = first["text"].splitlines()
+    assert lines.index("• cpu spike on server12") < lines.index("• up: down on server3") < lines.index("• cpu: avg 41.0")
+    assert first["facts"] == 3 and first["dropped"] == 1
+    assert "(+1 lower-priority facts omitted)" in first["text"]
+    assert first["tokens"] <= 50
+
+
+def test_summary_prompt_summarizes_series_numerically_within_budget():
+    data = [{'metric': {'instance': f'server{i}'}, 'value': [0, str(i % 97)]} for i in range(2000)]
+    cpu = {'status': 'success', 'metric': 'cpu_usage_percentage', 'data': data,
+           'stats': summarize_vector(data), 'summary': 'CPU Usage - Avg: 47.9%',
+           'hotspots': {'top': [{'name': 'server96', 'value': 96.0}]},
+           'anomalies': [{'metric': 'cpu', 'series': 'server96', 'kind': 'spike', 'direction': 'up',
+                          'onset': 0, 'magnitude': 4.2, 'value': 96.0, 'baseline': 48.0, 'points': 1}]}
+    health = {'status': 'success', 'metric': 'service_health', 'summary': 'ok',
+              'stats': {'count': 10, 'sum': 9.0}, 'hotspots': {'down': [{'name': 'server3', 'value': 0.0}]}}
+    tool = SRETool()
+    tools = ['prometheus', 'cpu_monitor', 'prometheus', 'health_checker', 'prometheus']
+    before = LLM_PROMPT_TOKENS.labels("summary").count
+
+    prompt = tool._build_summary_prompt({'cpu': cpu, 'health': health, 'overview': health},
+                                        tools, "How is the fleet doing?", "CPU | health")
+
+    assert "Tools used: prometheus, cpu_monitor, health_checker\n" in prompt
+    assert prompt.count("service_health: 9/10 targets up") == 1
+    assert prompt.index("cpu spike on server96") < prompt.index("service_health: down on server3")
+    assert "max 96.0 across 2000 series; top server96 96.0" in prompt
+    assert "server1999" not in prompt
+    assert estimate_tokens(prompt) <= tool.prompt_builder.budget
+    assert LLM_PROMPT_TOKENS.labels("summary").count == before + 1
+
+
+def test_insights_prompt_keeps_anomalies_when_context_overflows():
+    service = LLMService()
+    service._prompt_builders["insights"] = PromptBuilder("insights", budget=120)
+    summary = " | ".join(f"Retrieved metric {i}: " + "x" * 80 for i in range(10))
+
+    [_, user] = service._build_llama_messages(
+        "Why is checkout slow?", ['prometheus', 'prometheus', 'loki'],
+        summary + " | Anomalies: cpu spike on server12", "Everything is on fire " * 20)
+
+    assert "Tools used: prometheus, loki\n" in user["content"]
+    assert "Anomalies: cpu spike on server12" in user["content"]
+    assert "Everything is on fire" not in user["content"]
+    assert user["content"].endswith("recommended next steps.")
@@ -0,0 +1,122 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app.tools.prometheus_client import PrometheusClient
+from app.tools.query_cache import QueryCache, normalize_query
+
+
+def test_normalize_query_ignores_whitespace_but_not_label_values():
+    assert normalize_query('rate( http_requests_total [5m] )') == 'rate(http_requests_total[5m])'
+    assert normalize_query('sum by (job) (up)') == normalize_query('sum by(job)(up)')
+    assert normalize_query('up{job="a b"}') != normalize_query('up{job="ab"}')
+
+
+@pytest.mark.asyncio
+async def test_repeated_query_is_served_from_cache():
+    cache = QueryCache(ttl=30, max_entries=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {'status': 'success', 'data': {'result': []}}
+
+    await cache.get_or_fetch('rate(http_requests_total[5m])', fetch)
+    await cache.get_or_fetch('rate(http_requests_total [5m])', fetch)
+
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_share_one_fetch():
+    cache = QueryCache(ttl=30, max_entries=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'status': 'success', 'data': {'result': []}}
+
+    results = await asyncio.gather(*[cache.get_or_fetch('up', fetch) for _ in range(50)])
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert cache.stats()['coalesced'] == 49
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached_and_lru_is_bounded():
+    cache = QueryCache(ttl=30, max_entries=2)
+
+    async def failing():
+        return {'status': 'error', 'error': 'boom'}
+
+    await cache.get_or_fetch('up', failing)
+    assert cache.stats()['entries'] == 0
+
+    for query in ['a', 'b', 'c']:
+        async def fetch():
+            return {'status': 'success', 'data': {'result': []}}
+        await cache.get_or_fetch(query, fetch)
+
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['evictions'] == 1
+
+
+@pytest.mark.asyncio
+async def test_evaluation_time_buckets_are_separate_entries():
+    cache = QueryCache(ttl=300, max_entries=10, bucket_seconds=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {'status': 'success', 'data': {'result': []}}
+
+    await cache.get_or_fetch('up', fetch, eval_time=0)
+    await cache.get_or_fetch('up', fetch, eval_time=59)
+    await cache.get_or_fetch('up', fetch, eval_time=61)
+
+    assert len(calls) == 2
+
+
+def test_sync_client_queries_go_through_the_cache(monkeypatch):
+    client = PrometheusClient(cache=QueryCache(ttl=30, max_entries=10))
+    client.mock_mode = True
+    served = []
+    mock_response = client._mock_response
+    monkeypatch.setattr(client, '_mock_response', lambda query: served.append(query) or mock_response(query))
+
+    first = client.get_cpu_usage()
+    second = client.get_cpu_usage()
+
+    assert len(served) == 1
+    assert first['summary'] == second['summary']
+    assert client.cache.stats()['hits'] == 1
+
+
+def test_sync_cache_is_safe_across_threads():
+    cache = QueryCache(ttl=30, max_entries=8)
+
+    def lookup(i):
+        query = f'up{{job="job{i % 16}"}}'
+        return cache.get_or_fetch_sync(query, lambda: {'status': 'success', 'data': query})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lookup, range(2000)))
+
+    assert all(r['status'] == 'success' for r in results)
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 2000
+    assert stats['entries'] <= 8
+
+
+def test_explicit_zero_max_entries_keeps_nothing(monkeypatch):
+    monkeypatch.setenv('PROMQL_CACHE_MAX_ENTRIES', '512')
+    cache = QueryCache(ttl=60, max_entries=0)
+
+    cache.put(('up', 0), {'status': 'success'})
+
+    assert cache.max_entries == 0
+    assert cache.get(('up', 0)) is None
@@ -0,0 +1,74 @@
+import httpx
+import pytest
+from app.tools import async_prometheus_client
+from app.tools.async_prometheus_client import AsyncPrometheusClient
+from app.tools.range_query import SeriesMatrix, parse_duration, split_range
+
+
+def test_parse_duration():
+    assert parse_duration('90s') == 90
+    assert parse_duration('1h30m') == 5400
+    assert parse_duration(15) == 15
+    with pytest.raises(ValueError):
+        parse_duration('5 minutes')
+
+
+def test_split_range_is_step_aligned_and_contiguous():
+    chunks = split_range(1005, 4000, step=60, max_points=11)
+
+    assert chunks[0][0] == 960
+    for (_, prev_end), (next_start, _) in zip(chunks, chunks[1:]):
+        assert next_start == prev_end + 60
+    assert all((end - start) / 60 + 1 <= 11 for start, end in chunks)
+    assert chunks[-1][1] == 3960
+    # Any end within the same step gives the same chunks, so the newest one is cacheable too
+    assert split_range(1005, 4019, step=60, max_points=11) == chunks
+
+
+def test_series_matrix_appends_chunks_columnar():
+    matrix = SeriesMatrix()
+    matrix.ingest([{'metric': {'instance': 'a'}, 'values': [[0, '1'], [60, '2']]}])
+    matrix.ingest([{'metric': {'instance': 'a'}, 'values': [[120, '3']]},
+                   {'metric': {'instance': 'b'}, 'values': [[120, '9']]}])
+
+    series = {s.labels['instance']: s for s in matrix}
+    assert list(series['a'].timestamps) == [0, 60, 120]
+    assert list(series['a'].values) == [1.0, 2.0, 3.0]
+    assert matrix.sample_count == 4
+
+
+@pytest.mark.asyncio
+async def test_query_range_fetches_chunks_and_merges_in_order(monkeypatch):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        start = float(request.url.params['start'])
+        end = float(request.url.params['end'])
+        step = float(request.url.params['step'])
+        seen.append((start, end))
+        values = []
+        ts = start
+        while ts <= end:
+            values.append([ts, str(ts / step)])
+            ts += step
+        return httpx.Response(200, json={'status': 'success', 'data': {
+            'resultType': 'matrix',
+            'result': [{'metric': {'instance': 'node-1'}, 'values': values}]
+        }})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(async_prometheus_client.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=httpx.MockTransport(handler),
+                                                     base_url=kwargs['base_url']))
+    prom = AsyncPrometheusClient(url="http://range.test:9090")
+    prom.mock_mode = False
+    prom.range_chunk_points = 10
+
+    result = await prom.query_range('up', start=0, end=3540, step='1m')
+
+    assert result['status'] == 'success'
+    assert result['chunks'] == 6
+    assert len(seen) == 6
+    (series,) = list(result['series'])
+    assert list(series.timestamps) == [i * 60.0 for i in range(60)]
+    assert series.values[-1] == 59.0
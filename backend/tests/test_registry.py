@@ -0,0 +1,47 @@
+import threading
+import time
+from app.services import registry
+from app.services.llm_service import LLMService, send_to_langgraph
+from app.tools.sre_tools import SRETool
+
+
+def test_clients_are_shared_across_agent_tool_and_helpers(monkeypatch):
+    tool = SRETool()
+
+    assert tool.llm_service is registry.get_llm_service()
+    assert tool.prometheus is registry.get_prometheus_client()
+    assert registry.get_sre_agent().llm_service is tool.llm_service
+
+    constructed = []
+    monkeypatch.setattr(LLMService, "__init__", lambda self: constructed.append(self))
+    send_to_langgraph("What is SRE?")
+    assert constructed == []
+
+
+def test_llm_service_builds_sdk_clients_lazily(monkeypatch):
+    monkeypatch.delenv("LLAMA_API_KEY", raising=False)
+    service = LLMService()
+
+    # Would raise if the Llama client were created eagerly without a key
+    assert service._llama_api is None
+
+
+def test_concurrent_first_use_builds_one_instance(monkeypatch):
+    monkeypatch.setattr(registry, "_instances", {})
+    built = []
+
+    def slow_factory():
+        time.sleep(0.05)
+        built.append(object())
+        return built[-1]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        registry._get_or_create("thing", slow_factory))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert all(r is built[0] for r in results)
@@ -0,0 +1,123 @@
+import time
+import pytest
+from app.tools.metric_snapshot import MetricSnapshotStore
+from app.tools.prometheus_client import PrometheusClient
+from app.tools.prometheus_simulator import PrometheusSimulator
+from app.tools.series_index import SeriesIndex
+from app.tools.sre_tools import SRETool
+
+EPOCH = 1_700_000_000.0
+
+
+def vector(*series):
+    return [{'metric': labels, 'value': [EPOCH, str(value)]} for labels, value in series]
+
+
+def test_top_bottom_and_label_matchers():
+    index = SeriesIndex()
+    index.update('cpu', vector(
+        ({'instance': 'a', 'job': 'api'}, 10),
+        ({'instance': 'b', 'job': 'api'}, 90),
+        ({'instance': 'c', 'job': 'db'}, 95),
+        ({'instance': 'd', 'job': 'db'}, 'NaN'),
+    ))
+
+    assert [s['name'] for s in index.top_k('cpu', 2)] == ['c', 'b']
+    assert [s['name'] for s in index.bottom_k('cpu', 1)] == ['a']
+    assert [s['name'] for s in index.top_k('cpu', 5, job='api')] == ['b', 'a']
+    assert index.select('cpu', job='db', instance='c')[0]['value'] == 95
+    assert index.select('cpu', job='nope') == []
+    assert index.label_values('cpu', 'job') == ['api', 'db']
+    assert index.top_k('memory', 3) == []
+
+
+def test_ties_keep_series_order():
+    index = SeriesIndex()
+    index.update('health', vector(*[({'instance': f'server{i}'}, 0 if i % 3 else 1) for i in range(10)]))
+
+    assert [s['name'] for s in index.bottom_k('health', 3)] == ['server1', 'server2', 'server4']
+    assert [s['name'] for s in index.top_k('health', 2)] == ['server0', 'server3']
+
+
+def test_cpu_query_keeps_one_series_per_node():
+    # What Prometheus returns for a bare avg(...): one series without labels, so no node can be named
+    index = SeriesIndex()
+    index.update('cpu', [{'metric': {}, 'value': [EPOCH, '37.5']}])
+    assert [s['name'] for s in index.top_k('cpu', 3)] == ['series']
+    assert index.outliers('cpu') == []
+
+    # The CPU query aggregates per node instead, so each node is its own series
+    for query in (PrometheusClient._cpu_query(), PrometheusClient._cpu_query('server7')):
+        assert 'avg by (instance, job) (' in query
+        assert 'avg(' not in query
+
+
+def test_outliers_use_median_absolute_deviation():
+    index = SeriesIndex()
+    index.update('cpu', vector(*[({'instance': f'server{i}'}, 40 + i % 5) for i in range(50)],
+                               ({'instance': 'hot'}, 99), ({'instance': 'cold'}, 1)))
+
+    assert [s['name'] for s in index.outliers('cpu')] == ['hot']
+    assert [s['name'] for s in index.outliers('cpu', direction='both')] == ['hot', 'cold']
+
+
+def test_same_result_is_not_reindexed():
+    index = SeriesIndex()
+    data = vector(({'instance': 'a'}, 1))
+
+    assert index.update('cpu', data) is True
+    assert index.update('cpu', data) is False
+    assert index.update('cpu', list(data)) is True
+
+
+def test_queries_stay_fast_at_tens_of_thousands_of_series():
+    simulator = PrometheusSimulator(instances=20000, epoch=EPOCH)
+    data = simulator.query(PrometheusClient._cpu_query(), EPOCH)['data']['result']
+    index = SeriesIndex()
+    index.update('cpu', data)
+
+    started = time.perf_counter()
+    top = index.top_k('cpu', 10)
+    index.bottom_k('cpu', 10, job=data[0]['metric']['job'])
+    index.outliers('cpu', limit=10)
+    elapsed = time.perf_counter() - started
+
+    assert len(index) == 20000
+    assert top[0]['value'] == max(float(s['value'][1]) for s in data)
+    assert elapsed < 0.1
+
+
+@pytest.mark.asyncio
+async def test_tool_summary_names_the_worst_offenders():
+    class FleetPrometheus:
+        async def get_cpu_usage(self):
+            return {'status': 'success', 'metric': 'cpu_usage_percentage', 'summary': 'CPU Usage - Max: 97.0%',
+                    'data': vector(({'instance': 'server1'}, 20), ({'instance': 'server12'}, 97),
+                                   ({'instance': 'server7'}, 60))}
+
+    tool = SRETool(snapshots=MetricSnapshotStore(), max_staleness=0, series_index=SeriesIndex())
+    tool.prometheus = FleetPrometheus()
+
+    result = await tool.acollect("What's the CPU usage?")
+
+    cpu = result['prometheus_data']['cpu']
+    assert [s['name'] for s in cpu['hotspots']['top']] == ['server12', 'server7', 'server1']
+    assert 'Top: server12 97.0%' in result['tool_summary']
+
+
+@pytest.mark.asyncio
+async def test_fallback_summary_reports_outliers():
+    class FleetPrometheus:
+        async def get_cpu_usage(self):
+            return {'status': 'success', 'metric': 'cpu_usage_percentage', 'summary': 'CPU Usage - Max: 99.0%',
+                    'data': vector(*[({'instance': f'server{i}'}, 20 + i % 3) for i in range(10)],
+                                   ({'instance': 'server42'}, 99))}
+
+    tool = SRETool(snapshots=MetricSnapshotStore(), max_staleness=0, series_index=SeriesIndex())
+    tool.prometheus = FleetPrometheus()
+
+    result = await tool.acollect("What's the CPU usage?")
+    fallback = tool._fallback_summary(result['prometheus_data'], result['tools_used'], "cpu?")
+
+    assert fallback.startswith("I've found some issues")
+    assert "cpu on server42 is an outlier at 99.0" in fallback
@@ -0,0 +1,90 @@
+import pytest
+from app.agents.sre_agent import SREAgent
+from app.tools.metric_snapshot import MetricSnapshotStore
+from app.tools.sre_tools import SRETool
+
+
+def test_parse_analysis_splits_summary_and_recommendations():
+    analysis = SRETool._parse_analysis(
+        "SUMMARY: CPU is a bit warm but fine.\nRECOMMENDATIONS:\n- Watch node-3\n* Add an alert\n")
+
+    assert analysis["natural_summary"] == "CPU is a bit warm but fine."
+    assert analysis["recommendations"] == ["Watch node-3", "Add an alert"]
+
+
+def test_parse_analysis_without_markers_keeps_whole_text():
+    analysis = SRETool._parse_analysis("Everything looks healthy right now.")
+
+    assert analysis == {"natural_summary": "Everything looks healthy right now.", "recommendations": []}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = SREAgent()
+    calls = []
+
+    def fake_llama(question, *args, **kwargs):
+        calls.append(question)
+        return {"status": "success",
+                "response": "SUMMARY: Memory is steady across the fleet.\nRECOMMENDATIONS:\n- Nothing urgent"}
+
+    monkeypatch.setattr(agent.tool.llm_service, "ask_llama", fake_llama)
+    monkeypatch.setattr(agent.llm_service, "ask_llama", fake_llama)
+    agent.llm_calls = calls
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_question_costs_one_llm_generation(agent):
+    response = await agent.aask_question("What's the memory usage?")
+
+    assert len(agent.llm_calls) == 1
+    assert response["natural_summary"] == "Memory is steady across the fleet."
+    assert response["recommendations"] == ["Nothing urgent"]
+    assert "llama" not in response
+
+
+@pytest.mark.asyncio
+async def test_insights_run_only_when_requested(agent):
+    response = await agent.aask_question("What's the memory usage?", include_insights=True)
+
+    assert len(agent.llm_calls) == 2
+    assert response["llama"]["status"] == "success"
+    assert response["langgraph"]["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_paraphrased_questions_hit_response_cache(agent):
+    first = await agent.aask_question("What is the CPU usage?")
+    second = await agent.aask_question("Show me CPU utilization")
+
+    assert len(agent.llm_calls) == 1
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["natural_summary"] == first["natural_summary"]
+    assert "Show me CPU utilization" in second["llm_thought"]
+    assert agent.response_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_errored_collection_is_not_cached(agent, monkeypatch):
+    async def prometheus_down():
+        return {"status": "error", "error": "prometheus is unavailable (circuit open, next retry in 5s)"}
+
+    monkeypatch.setattr(agent.tool.prometheus, "get_cpu_usage", prometheus_down)
+    # No prefetched CPU snapshot to answer from instead
+    monkeypatch.setattr(agent.tool, "snapshots", MetricSnapshotStore())
+    first = await agent.aask_question("What is the CPU usage?")
+    second = await agent.aask_question("Show me CPU utilization")
+
+    assert first["degraded"] is True
+    assert second["cached"] is False
+    assert len(agent.llm_calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_different_intents_are_cached_separately(agent):
+    await agent.aask_question("What is the CPU usage?")
+    await agent.aask_question("What's the disk usage?")
+
+    assert len(agent.llm_calls) == 2
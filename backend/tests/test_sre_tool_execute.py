@@ -0,0 +1,108 @@
+import asyncio
+import time
+import pytest
+from app.tools.metric_snapshot import MetricSnapshotStore
+from app.tools.sre_tools import SRETool
+
+
+class SlowPrometheus:
+    """Stand-in Prometheus client whose getters each take a fixed amount of time"""
+
+    def __init__(self, delay: float, slow_delay: float = None):
+        self.delay = delay
+        self.slow_delay = slow_delay
+
+    async def _result(self, metric: str, delay: float):
+        await asyncio.sleep(delay)
+        return {'status': 'success', 'metric': metric, 'data': [], 'summary': f"{metric} ok"}
+
+    async def get_cpu_usage(self):
+        return await self._result('cpu', self.delay)
+
+    async def get_memory_usage(self):
+        return await self._result('memory', self.delay)
+
+    async def get_disk_usage(self):
+        return await self._result('disk', self.delay)
+
+    async def get_service_health(self):
+        return await self._result('health', self.delay)
+
+    async def get_http_requests_rate(self):
+        return await self._result('requests', self.delay)
+
+    async def get_error_rate(self):
+        return await self._result('errors', self.slow_delay or self.delay)
+
+
+@pytest.fixture
+def sre_tool(monkeypatch):
+    tool = SRETool(metrics_deadline=1.0, snapshots=MetricSnapshotStore())
+    monkeypatch.setattr(tool, "_generate_analysis",
+                        lambda *args: {"natural_summary": "natural summary", "recommendations": []})
+    return tool
+
+
+def test_comprehensive_fetches_run_concurrently(sre_tool):
+    sre_tool.prometheus = SlowPrometheus(delay=0.3)
+
+    started = time.perf_counter()
+    result = sre_tool.execute("Give me a comprehensive system analysis")
+    elapsed = time.perf_counter() - started
+
+    assert set(result["prometheus_data"]) == {'cpu', 'memory', 'disk', 'health', 'requests', 'errors'}
+    # Six 0.3s fetches run serially would take 1.8s
+    assert elapsed < 0.9
+
+
+def test_deadline_returns_partial_results(sre_tool):
+    sre_tool.prometheus = SlowPrometheus(delay=0.05, slow_delay=3)
+
+    started = time.perf_counter()
+    result = sre_tool.execute("What's the CPU usage and error rate?")
+    elapsed = time.perf_counter() - started
+
+    data = result["prometheus_data"]
+    assert data['cpu']['status'] == 'success'
+    assert data['errors']['status'] == 'error'
+    assert data['errors']['timed_out'] is True
+    assert elapsed < 2
+    assert "Retrieved CPU metrics: cpu ok" in result["tool_summary"]
+
+
+def test_explicit_zero_deadline_is_kept(monkeypatch):
+    monkeypatch.setenv('METRICS_DEADLINE_SECONDS', '8')
+
+    assert SRETool(metrics_deadline=0, snapshots=MetricSnapshotStore()).metrics_deadline == 0
+    assert SRETool(snapshots=MetricSnapshotStore()).metrics_deadline == 8
+
+
+def test_overlapping_intents_fetch_each_metric_once(sre_tool):
+    calls = []
+    prometheus = SlowPrometheus(delay=0)
+    original = prometheus.get_cpu_usage
+
+    async def counting_cpu():
+        calls.append('cpu')
+        return await original()
+
+    prometheus.get_cpu_usage = counting_cpu
+    sre_tool.prometheus = prometheus
+
+    sre_tool.execute("Show me CPU and system performance")
+
+    assert calls == ['cpu']
+
+
+@pytest.mark.asyncio
+async def test_aexecute_does_not_block_event_loop(sre_tool):
+    sre_tool.prometheus = SlowPrometheus(delay=0.2)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        sre_tool.aexecute("What is the CPU usage?") for _ in range(20)
+    ])
+    elapsed = time.perf_counter() - started
+
+    assert len(results) == 20
+    assert elapsed < 1
@@ -0,0 +1,103 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+from app.main import app
+from app.models.request_models import SRERequest
+from app.routes.sre import IncidentRequest, ask_sre_question_stream, trigger_incident_response_stream
+from app.services import registry
+from app.services.agent_executor import AgentExecutor
+from app.services.registry import get_llm_service
+
+
+async def fake_stream(*args, **kwargs):
+    for token in ["SUM", "MARY: All ", "systems ", "nominal, nothing to worry about.",
+                  "\nRECOMMEN", "DATIONS:\n- Keep ", "an eye on CPU\n"]:
+        yield token
+
+
+async def failing_stream(*args, **kwargs):
+    raise RuntimeError("llama unavailable")
+    yield
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(get_llm_service(), "astream_llama", fake_stream)
+    with TestClient(app) as client:
+        yield client
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_sse_sends_tool_summary_before_tokens(client):
+    response = client.post("/sre/ask/stream", json={"question": "What is the CPU usage?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "tool_summary" and names[-1] == "done"
+    assert names.count("token") > 1
+    assert "cpu" in events[0][1]["metrics"]
+    streamed = "".join(data["text"] for name, data in events if name == "token")
+    assert streamed == "All systems nominal, nothing to worry about."
+    assert events[-1][1]["natural_summary"] == streamed
+    assert events[-1][1]["recommendations"] == ["Keep an eye on CPU"]
+
+
+def test_sse_falls_back_when_llm_stream_fails(client, monkeypatch):
+    monkeypatch.setattr(get_llm_service(), "astream_llama", failing_stream)
+
+    events = parse_sse(client.post("/sre/ask/stream", json={"question": "cpu?"}).text)
+
+    assert events[-1][0] == "done"
+    assert events[-1][1]["natural_summary"]
+
+
+def test_websocket_streams_events(client):
+    with client.websocket_connect("/sre/ws/ask") as ws:
+        ws.send_json({"question": "What's the memory usage?"})
+        events = []
+        while not events or events[-1]["event"] != "done":
+            events.append(ws.receive_json())
+
+    assert events[0]["event"] == "tool_summary"
+    assert "".join(e["data"]["text"] for e in events if e["event"] == "token") == \
+        "All systems nominal, nothing to worry about."
+
+
+
+
+async def drop_before_first_chunk(response):
+    """Run a streaming response against a client that is gone before the headers go out"""
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("client went away")
+
+    with pytest.raises(ClientDisconnect):
+        await response({"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}}, receive, send)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("route, request_body", [
+    (ask_sre_question_stream, SRERequest(question="What is the CPU usage?")),
+    (trigger_incident_response_stream, IncidentRequest(alert_name="HighCPUUsage", severity="critical")),
+])
+async def test_sse_slot_is_released_when_client_drops_before_first_chunk(monkeypatch, route, request_body):
+    executor = AgentExecutor(max_workers=1)
+    monkeypatch.setitem(registry._instances, 'agent_executor', executor)
+
+    response = await route(request_body)
+    assert executor.stats()["active"] == 1
+    await drop_before_first_chunk(response)
+
+    assert executor.stats()["active"] == 0
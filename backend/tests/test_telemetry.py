@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.registry import get_llm_service
+from app.services.telemetry import TelemetryRegistry
+
+
+def test_registry_renders_exposition_format():
+    registry = TelemetryRegistry()
+    calls = registry.histogram('demo_seconds', 'Demo latency', ['getter'], buckets=(0.1, 1))
+    errors = registry.counter('demo_errors_total', 'Demo errors', ['getter'])
+    calls.labels('get_cpu_usage').observe(0.5)
+    errors.labels('get_cpu_usage').inc()
+
+    text = registry.render()
+
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{getter="get_cpu_usage",le="0.1"} 0' in text
+    assert 'demo_seconds_bucket{getter="get_cpu_usage",le="+Inf"} 1' in text
+    assert 'demo_seconds_count{getter="get_cpu_usage"} 1' in text
+    assert 'demo_errors_total{getter="get_cpu_usage"} 1.0' in text
+
+
+def test_metrics_endpoint_covers_pipeline_stages(monkeypatch):
+    monkeypatch.setattr(get_llm_service().llama_api.chat.completions, "create",
+                        lambda **kwargs: (_ for _ in ()).throw(RuntimeError("offline")))
+
+    with TestClient(app) as client:
+        client.post("/sre/ask", json={"question": "What is the CPU usage?", "max_staleness": 0})
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    text = response.text
+    assert 'sre_intent_routing_seconds_count' in text
+    assert 'sre_prometheus_query_seconds_count{getter="get_cpu_usage"}' in text
+    assert 'sre_llm_call_seconds_count{method="ask_llama"}' in text
+    assert 'sre_cache_lookups_total{cache="query",result="misses"}' in text
+    assert 'sre_http_request_seconds_count{method="POST",route="/sre/ask",status="200"}' in text
+    assert 'sre_agent_execution_seconds_count' in text
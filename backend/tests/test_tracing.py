@@ -0,0 +1,71 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.agent_executor import AgentExecutor
+from app.services.registry import get_llm_service
+from app.services.tracing import OTLPFileExporter, RingBufferExporter, Tracer, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def test_parse_traceparent_rejects_malformed_headers():
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == {
+        "trace_id": TRACE_ID, "parent_id": PARENT_ID}
+    assert parse_traceparent("00-abc-def-01") is None
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent(None) is None
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_tasks_and_worker_threads(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    buffer = RingBufferExporter(max_spans=100)
+    tracer = Tracer(exporters=[buffer, OTLPFileExporter(str(path))])
+    executor = AgentExecutor(max_workers=2)
+
+    def blocking_llm_call():
+        with tracer.span("llm.ask_llama"):
+            pass
+
+    with tracer.span("root", f"00-{TRACE_ID}-{PARENT_ID}-01") as root:
+        async def getter():
+            with tracer.span("prometheus.get_cpu_usage"):
+                await asyncio.sleep(0)
+        await asyncio.gather(getter(), getter())
+        await executor.run_blocking(blocking_llm_call)
+
+    spans = {s.name: s for s in buffer.trace(TRACE_ID)}
+    assert root.parent_id == PARENT_ID
+    assert spans["prometheus.get_cpu_usage"].parent_id == root.span_id
+    assert spans["llm.ask_llama"].parent_id == root.span_id
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 4
+    exported = lines[-1]["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert exported["traceId"] == TRACE_ID
+    assert exported["parentSpanId"] == PARENT_ID
+
+
+def test_ask_returns_timing_breakdown_with_debug_header(monkeypatch):
+    monkeypatch.setattr(get_llm_service().llama_api.chat.completions, "create",
+                        lambda **kwargs: (_ for _ in ()).throw(RuntimeError("offline")))
+
+    with TestClient(app) as client:
+        response = client.post("/sre/ask",
+                               json={"question": "What is the memory usage?", "max_staleness": 0},
+                               headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01",
+                                        "X-SRE-Debug": "1"})
+        plain = client.post("/sre/ask", json={"question": "What is the memory usage?"})
+        listed = client.get("/sre/traces").json()
+
+    body = response.json()
+    assert response.headers["traceparent"].startswith(f"00-{TRACE_ID}-")
+    assert body["timing"]["trace_id"] == TRACE_ID
+    stages = {stage["name"] for stage in body["timing"]["stages"]}
+    assert {"sre_tool.route", "sre_tool.collect", "prometheus.get_memory_usage",
+            "llm.ask_llama", "sre_tool.execute", "sre_agent.ask_question"} <= stages
+    assert "timing" not in plain.json()
+    assert any(t["trace_id"] == TRACE_ID for t in listed["traces"])
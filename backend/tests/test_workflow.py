@@ -0,0 +1,74 @@
+import asyncio
+import time
+import pytest
+from app.services.workflow import Step, Workflow
+from app.tools.query_cache import QueryCache
+
+
+def sleeper(seconds, value, calls=None):
+    async def run(inputs):
+        if calls is not None:
+            calls.append(value)
+        await asyncio.sleep(seconds)
+        return {'status': 'success', 'value': value, 'inputs': sorted(inputs)}
+    return run
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_concurrently_and_dependents_wait():
+    workflow = Workflow('test', [
+        Step('a', sleeper(0.2, 'a')),
+        Step('b', sleeper(0.2, 'b')),
+        Step('c', sleeper(0.2, 'c')),
+        Step('join', sleeper(0, 'join'), after=['a', 'b', 'c']),
+    ])
+    started = time.perf_counter()
+    events = [event async for event in workflow.stream()]
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.35
+    order = [(e['event'], e['data'].get('step')) for e in events]
+    assert order.index(('step_started', 'join')) > max(order.index(('step_finished', s)) for s in 'abc')
+    done = events[-1]['data']
+    assert done['results']['join']['inputs'] == ['a', 'b', 'c']
+    assert all(step['status'] == 'success' for step in done['steps'].values())
+
+
+@pytest.mark.asyncio
+async def test_timed_out_step_is_reported_and_dependents_still_run():
+    workflow = Workflow('test', [
+        Step('slow', sleeper(5, 'slow'), timeout=0.05),
+        Step('fast', sleeper(0, 'fast')),
+        Step('report', lambda inputs: asyncio.sleep(0, {'status': 'success', 'seen': inputs}),
+             after=['slow', 'fast']),
+    ])
+    result = await workflow.run()
+
+    assert result['steps']['slow']['status'] == 'timed_out'
+    assert result['results']['report']['seen']['slow']['timed_out'] is True
+    assert result['steps']['report']['status'] == 'success'
+    assert result['duration_ms'] < 1000
+
+
+@pytest.mark.asyncio
+async def test_memoized_steps_are_shared_across_concurrent_runs():
+    calls = []
+    memo = QueryCache(ttl=60)
+
+    def workflow(name):
+        return Workflow('test', [
+            Step('shared', sleeper(0.05, 'shared', calls), memo_key='fleet'),
+            Step('own', sleeper(0, name, calls)),
+        ], memo=memo)
+
+    runs = await asyncio.gather(*(workflow(f'alert{i}').run() for i in range(10)))
+
+    assert calls.count('shared') == 1
+    assert all(run['results']['shared']['value'] == 'shared' for run in runs)
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError, match='cycle'):
+        Workflow('test', [Step('a', sleeper(0, 'a'), after=['b']), Step('b', sleeper(0, 'b'), after=['a'])])
+    with pytest.raises(ValueError, match='unknown'):
+        Workflow('test', [Step('a', sleeper(0, 'a'), after=['missing'])])